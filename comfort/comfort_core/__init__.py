@@ -4,6 +4,9 @@ from comfort.comfort_core.doctype.commission_range.commission_range import (
 from comfort.comfort_core.doctype.commission_settings.commission_settings import (
     CommissionSettings as CommissionSettings,
 )
+from comfort.comfort_core.doctype.ikea_purchase.ikea_purchase import (
+    IkeaPurchase as IkeaPurchase,
+)
 from comfort.comfort_core.doctype.ikea_settings.ikea_settings import (
     IkeaSettings as IkeaSettings,
 )
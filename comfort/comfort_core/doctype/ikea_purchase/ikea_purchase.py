@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from comfort.utils import TypedDocument
+
+
+class IkeaPurchase(TypedDocument):
+    purchase_id: str
+    status: str
+    price: int
+    purchase_datetime: datetime
+    datetime_formatted: str
+    store: str | None
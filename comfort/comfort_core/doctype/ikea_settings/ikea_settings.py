@@ -7,10 +7,18 @@ from comfort.utils import TypedDocument
 
 class IkeaSettings(TypedDocument):
     zip_code: str | None
+    delivery_services_cache_ttl: int
+    item_catalog_max_age: int
+    items_chunk_size: int
+    items_concurrency: int
+    purchase_info_concurrency: int
     authorized_token: str | None
     authorized_token_expiration: int | None
     guest_token: str | None
     guest_token_expiration: datetime | str | None
 
     def on_change(self) -> None:
+        from comfort.integrations.ikea import clear_token_cache
+
         self.clear_cache()
+        clear_token_cache()
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import csv
+import multiprocessing
 import os
-from typing import Any
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Literal
 
 import click
 import sentry_sdk
@@ -12,8 +17,12 @@ import frappe.utils.scheduler
 from comfort.comfort_core import CommissionSettings
 from comfort.comfort_core.hooks import after_install
 from comfort.entities import Customer, Item
+from comfort.entities.doctype.item.item import defer_weight_propagation
+from comfort.finance import utils as finance_utils
 from comfort.hooks import app_name
+from comfort.stock import utils as stock_utils
 from comfort.transactions import PurchaseOrder, SalesOrder
+from comfort.transactions import utils as transactions_utils
 from comfort.utils import doc_exists, get_all, get_doc, new_doc
 from frappe.commands import get_site, pass_context
 from frappe.core.doctype.doctype.doctype import DocType
@@ -187,9 +196,10 @@ def _make_items() -> None:
             ],
         },
     ]
-    for doc in items:
-        if not doc_exists(doc["doctype"], doc["item_code"]):
-            Item(doc).insert()
+    with defer_weight_propagation():
+        for doc in items:
+            if not doc_exists(doc["doctype"], doc["item_code"]):
+                Item(doc).insert()
 
 
 def _make_sales_order():
@@ -284,6 +294,136 @@ def write_translations(context: Any, untranslated_file: str | None, lang: str) -
         print("All translated!")
 
 
+@click.command("rebuild-stock-balance")
+@click.option("--check", is_flag=True, help="Only report mismatches")
+@pass_context
+def rebuild_stock_balance(context: Any, check: bool) -> None:
+    "Compare Stock Balance Bin with Stock Entries and rebuild it"
+    connect(context)
+    mismatches = stock_utils.check_stock_balance()
+    for (stock_type, item_code), (bin_qty, ledger_qty) in sorted(mismatches.items()):
+        print(f"{stock_type}, {item_code}: {bin_qty} in bin, {ledger_qty} in ledger")
+    print(f"{len(mismatches)} mismatches found")
+
+    if mismatches and not check:
+        stock_utils.rebuild_stock_balance()
+        frappe.db.commit()
+        print("Rebuilt")
+
+
+@click.command("rebuild-account-balance")
+@click.option("--check", is_flag=True, help="Only report mismatches")
+@pass_context
+def rebuild_account_balance(context: Any, check: bool) -> None:
+    "Compare Account Daily Balance with GL Entries and rebuild it"
+    connect(context)
+    mismatches = finance_utils.check_account_daily_balance()
+    for (account, date), (balance, ledger_balance) in sorted(mismatches.items()):
+        print(
+            f"{account}, {date}: {balance} in daily balance, {ledger_balance} in ledger"
+        )
+    print(f"{len(mismatches)} mismatches found")
+
+    if mismatches and not check:
+        finance_utils.rebuild_account_daily_balance()
+        frappe.db.commit()
+        print("Rebuilt")
+
+
+_StatusDoctype = Literal["Sales Order", "Purchase Order"]
+
+
+def _recompute_statuses_chunk(
+    doctype: _StatusDoctype, names: list[str], dry_run: bool
+) -> transactions_utils.Changes:
+    recompute = {
+        "Sales Order": transactions_utils.recompute_sales_order_statuses,
+        "Purchase Order": transactions_utils.recompute_purchase_order_totals,
+    }[doctype]
+    changes = recompute(names, write=not dry_run)
+    if not dry_run:
+        frappe.db.commit()
+    return changes
+
+
+def _recompute_statuses_chunk_in_worker(
+    site: str,
+    sites_path: str,
+    doctype: _StatusDoctype,
+    names: list[str],
+    dry_run: bool,
+) -> transactions_utils.Changes:
+    """Run chunk in pool worker with its own connection that is closed afterwards."""
+    frappe.init(site, sites_path=sites_path)
+    try:
+        frappe.connect()
+        return _recompute_statuses_chunk(doctype, names, dry_run)
+    finally:
+        frappe.destroy()
+
+
+@click.command("recompute-statuses")
+@click.option("--chunk-size", default=500, help="Documents per chunk")
+@click.option("--processes", default=1, help="Spread chunks across this many processes")
+@click.option("--dry-run", is_flag=True, help="Only report changes")
+@click.option("--verbose", is_flag=True, help="Print every changed field")
+@pass_context
+def recompute_statuses(
+    context: Any, chunk_size: int, processes: int, dry_run: bool, verbose: bool
+) -> None:
+    "Recompute Sales Order statuses and Purchase Order totals"
+    connect(context)
+    doctypes: tuple[tuple[_StatusDoctype, type[Any]], ...] = (
+        ("Sales Order", SalesOrder),
+        ("Purchase Order", PurchaseOrder),
+    )
+    tasks: list[tuple[_StatusDoctype, list[str]]] = []
+    for doctype, cls in doctypes:
+        names = get_all(cls, pluck="name", filter={"docstatus": ("!=", 2)})
+        for idx in range(0, len(names), chunk_size):
+            tasks.append((doctype, names[idx : idx + chunk_size]))
+    total = sum(len(names) for _, names in tasks)
+
+    start = time.perf_counter()
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = list(
+                executor.map(
+                    _recompute_statuses_chunk_in_worker,
+                    repeat(frappe.local.site),
+                    repeat(frappe.local.sites_path),
+                    *zip(*tasks),
+                    repeat(dry_run),
+                )
+            )
+    else:
+        results = [_recompute_statuses_chunk(d, n, dry_run) for d, n in tasks]
+    elapsed = time.perf_counter() - start
+
+    changed_fields: Counter[tuple[str, str]] = Counter()
+    changed_docs: Counter[str] = Counter()
+    for (doctype, _), changes in zip(tasks, results):
+        changed_docs[doctype] += len(changes)
+        for name, fields in sorted(changes.items()):
+            for field, (old, new) in fields.items():
+                changed_fields[doctype, field] += 1
+                if verbose:
+                    print(f"{doctype} {name}: {field} {old!r} -> {new!r}")
+
+    for (doctype, field), count in sorted(changed_fields.items()):
+        print(f"{doctype}, {field}: {count} changed")
+    print(
+        f"{sum(changed_docs.values())} of {total} documents changed"
+        + (" (dry run)" if dry_run else "")
+    )
+    print(
+        f"Processed {total} documents in {elapsed:.1f}s"
+        f" ({total / elapsed if elapsed else 0:.0f} per second)"
+    )
+
+
 def _patch_scheduler_enqueue_events_for_site() -> None:
     if not os.getenv("SENTRY_DSN"):
         return
@@ -330,4 +470,13 @@ def start_worker(queue: str, quiet: bool = False) -> None:
     start_worker(queue=queue, quiet=quiet)
 
 
-commands = [demo, reset, write_translations, start_scheduler, start_worker]
+commands = [
+    demo,
+    reset,
+    write_translations,
+    rebuild_stock_balance,
+    rebuild_account_balance,
+    recompute_statuses,
+    start_scheduler,
+    start_worker,
+]
@@ -7,3 +7,6 @@ from comfort.entities.doctype.item_category.item_category import (
 from comfort.entities.doctype.item_category_table.item_category_table import (
     ItemCategoryTable as ItemCategoryTable,
 )
+from comfort.entities.doctype.item_component.item_component import (
+    ItemComponent as ItemComponent,
+)
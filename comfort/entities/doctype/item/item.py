@@ -2,19 +2,27 @@ from __future__ import annotations
 
 import re
 from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, Iterator
 
+import frappe
 from comfort.utils import (
     TypedDocument,
     ValidationError,
     _,
+    clear_item_values_cache,
     count_qty,
     doc_exists,
     get_all,
-    get_doc,
 )
+from frappe.utils import now
 
 from ..child_item.child_item import ChildItem
 from ..item_category_table.item_category_table import ItemCategoryTable
+from ..item_component.item_component import (
+    delete_item_components,
+    update_item_components,
+)
 
 
 class ItemMethods:
@@ -57,15 +65,7 @@ class ItemMethods:
             self.weight += weight_map[d.item_code] * d.qty
 
     def calculate_weight_in_parent_docs(self) -> None:
-        parent_items = get_all(
-            ChildItem, field="parent", filter={"item_code": self.item_code}
-        )
-        parent_item_names = list({d.parent for d in parent_items})
-        for d in parent_item_names:
-            if doc_exists("Item", d):
-                doc = get_doc(Item, d)
-                doc.calculate_weight()
-                doc.save_without_validating()
+        propagate_weight([self.item_code])
 
 
 class Item(TypedDocument, ItemMethods):
@@ -77,6 +77,105 @@ class Item(TypedDocument, ItemMethods):
 
     def on_change(self) -> None:
         self.clear_cache()
+        clear_item_values_cache([self.item_code])
 
     def on_update(self) -> None:
         self.calculate_weight_in_parent_docs()
+        update_item_components([self.item_code])
+
+    def on_trash(self) -> None:
+        delete_item_components([self.item_code])
+        clear_item_values_cache([self.item_code])
+
+
+def _update_weight(parents: Iterable[str]) -> list[str]:
+    parents = tuple(set(parents))
+    if not parents:
+        return []
+
+    frappe.db.sql(
+        """
+        UPDATE `tabItem` AS parent_item
+        JOIN (
+            SELECT child_item.parent, SUM(IFNULL(item.weight, 0) * child_item.qty) AS weight
+            FROM `tabChild Item` AS child_item
+            LEFT JOIN `tabItem` AS item ON item.name = child_item.item_code
+            WHERE child_item.parenttype = 'Item' AND child_item.parent IN %(parents)s
+            GROUP BY child_item.parent
+        ) AS weights ON weights.parent = parent_item.name
+        SET parent_item.weight = weights.weight,
+            parent_item.modified = %(modified)s,
+            parent_item.modified_by = %(user)s
+        """,
+        values={"parents": parents, "modified": now(), "user": frappe.session.user},
+    )
+    for name in parents:
+        frappe.clear_document_cache("Item", name)
+    clear_item_values_cache(parents)
+    return list(parents)
+
+
+def calculate_weight_for_items(item_codes: Iterable[str]) -> list[str]:
+    """Recalculate weight of combinations among `item_codes` and of combinations that contain them.
+
+    Same as `calculate_weight()` and `calculate_weight_in_parent_docs()`, but for many items
+    with two queries. Returns names of recalculated Items.
+    """
+    item_codes = tuple(set(item_codes))
+    if not item_codes:
+        return []
+
+    return _update_weight(
+        frappe.db.sql_list(  # type: ignore
+            """
+            SELECT DISTINCT parent FROM `tabChild Item`
+            WHERE parenttype = 'Item' AND (parent IN %(items)s OR item_code IN %(items)s)
+            """,
+            values={"items": item_codes},
+        )
+    )
+
+
+def propagate_weight(item_codes: Iterable[str]) -> list[str]:
+    """Recalculate weight of combinations that contain `item_codes` with one `UPDATE`.
+
+    Inside `defer_weight_propagation()` item codes are collected and propagated once
+    when the block exits. Returns names of recalculated Items.
+    """
+    if frappe.flags.deferred_weight_item_codes is not None:
+        frappe.flags.deferred_weight_item_codes.update(item_codes)
+        return []
+
+    item_codes = tuple(set(item_codes))
+    if not item_codes:
+        return []
+
+    return _update_weight(
+        frappe.db.sql_list(  # type: ignore
+            """
+            SELECT DISTINCT parent FROM `tabChild Item`
+            WHERE parenttype = 'Item' AND item_code IN %(items)s
+            """,
+            values={"items": item_codes},
+        )
+    )
+
+
+@contextmanager
+def defer_weight_propagation() -> Iterator[None]:
+    """Postpone `propagate_weight()` calls until the end of bulk update.
+
+    Shared components (like hinges) are used by hundreds of combinations, so
+    updating them one by one would recalculate the same parents over and over.
+    """
+    if frappe.flags.deferred_weight_item_codes is not None:
+        yield
+        return
+
+    frappe.flags.deferred_weight_item_codes = set()
+    try:
+        yield
+        item_codes: set[str] = frappe.flags.deferred_weight_item_codes
+    finally:
+        frappe.flags.deferred_weight_item_codes = None
+    propagate_weight(item_codes)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+import frappe
+from comfort.utils import (
+    TypedDocument,
+    after_commit,
+    bulk_insert,
+    count_qty,
+    get_standard_values,
+    is_after_commit_pending,
+)
+
+_CACHE_KEY = "item_components"
+_CACHE_TTL = 24 * 60 * 60
+
+
+class ItemComponent(TypedDocument):
+    item_code: str
+    leaf_item_code: str
+    leaf_item_name: str | None
+    qty: int
+
+
+def on_doctype_update() -> None:
+    frappe.db.add_unique("Item Component", ["item_code", "leaf_item_code"])
+
+
+def _clear_cache() -> None:
+    frappe.cache().delete_value(_CACHE_KEY)
+
+
+def _clear_cache_after_commit() -> None:
+    """Clear cache now and once more after commit.
+
+    Until commit, other workers can cache old rows, so components are loaded
+    from database and not written to Redis.
+    """
+    _clear_cache()
+    after_commit(_clear_cache)
+
+
+def delete_item_components(item_codes: Iterable[str]) -> None:
+    item_codes = tuple(set(item_codes))
+    if not item_codes:
+        return
+
+    frappe.db.sql(
+        "DELETE FROM `tabItem Component` WHERE item_code IN %(items)s",
+        values={"items": item_codes},
+    )
+    _clear_cache_after_commit()
+
+
+def update_item_components(item_codes: Iterable[str]) -> None:
+    """Rebuild components of `item_codes` from their Child Items."""
+    item_codes = tuple(set(item_codes))
+    if not item_codes:
+        return
+
+    delete_item_components(item_codes)
+    rows = frappe.db.sql(
+        """
+        SELECT parent, item_code, MAX(item_name), SUM(qty)
+        FROM `tabChild Item`
+        WHERE parenttype = 'Item' AND parent IN %(items)s
+        GROUP BY parent, item_code
+        """,
+        values={"items": item_codes},
+    )
+    standard_values = get_standard_values()
+    bulk_insert(
+        "Item Component",
+        [
+            {
+                "name": frappe.generate_hash(length=10),
+                "item_code": parent,
+                "leaf_item_code": item_code,
+                "leaf_item_name": item_name,
+                "qty": int(qty),
+                **standard_values,
+            }
+            for parent, item_code, item_name, qty in rows
+        ],
+    )
+    _clear_cache_after_commit()
+
+
+def _load_item_components() -> dict[str, list[tuple[str, str | None, int]]]:
+    res: dict[str, list[tuple[str, str | None, int]]] = {}
+    for item_code, leaf_item_code, leaf_item_name, qty in frappe.db.sql(
+        """
+        SELECT item_code, leaf_item_code, leaf_item_name, qty
+        FROM `tabItem Component`
+        ORDER BY item_code, leaf_item_code
+        """
+    ):
+        res.setdefault(item_code, []).append((leaf_item_code, leaf_item_name, qty))
+    return res
+
+
+def get_item_components() -> dict[str, list[tuple[str, str | None, int]]]:
+    """Get `{item_code: [(leaf_item_code, leaf_item_name, qty), ...]}` for all combinations.
+
+    Loaded from Redis and rebuilt from Item Component after changes are committed.
+    """
+    if is_after_commit_pending(_clear_cache):
+        return _load_item_components()
+
+    cache = frappe.cache()
+    components = cache.get_value(_CACHE_KEY)
+    if components is None:
+        components = _load_item_components()
+        cache.set_value(_CACHE_KEY, components, expires_in_sec=_CACHE_TTL)
+    return components
+
+
+def get_components(items: Iterable[Any]) -> list[Any]:
+    """Split combinations among `items` into components without querying database.
+
+    Returns `frappe._dict`s with `parent_item_code`, `item_code`, `item_name` and `qty`
+    multiplied by quantity of combination. Items that are not combinations are skipped.
+    """
+    components = get_item_components()
+    return [
+        frappe._dict(
+            parent_item_code=item_code,
+            item_code=leaf_item_code,
+            item_name=leaf_item_name,
+            qty=leaf_qty * qty,
+        )
+        for item_code, qty in count_qty(items).items()
+        for leaf_item_code, leaf_item_name, leaf_qty in components.get(item_code, ())
+    ]
@@ -1,4 +1,7 @@
 from comfort.finance.doctype.account.account import Account as Account
+from comfort.finance.doctype.account_daily_balance.account_daily_balance import (
+    AccountDailyBalance as AccountDailyBalance,
+)
 from comfort.finance.doctype.compensation.compensation import (
     Compensation as Compensation,
 )
@@ -4,6 +4,7 @@ from typing import Any
 
 import frappe
 from comfort.finance.doctype.gl_entry.gl_entry import GLEntry
+from comfort.finance.utils import clear_account_groups_cache
 from comfort.utils import get_all, get_doc
 from frappe.desk.treeview import make_tree_args
 from frappe.utils.nestedset import NestedSet
@@ -16,6 +17,13 @@ class Account(NestedSet):
     parent_account: str | None
     indent: int
 
+    def on_change(self) -> None:
+        clear_account_groups_cache()
+
+    def on_trash(self, allow_root_deletion: bool = False) -> None:
+        super().on_trash(allow_root_deletion)
+        clear_account_groups_cache()
+
 
 @frappe.whitelist()
 def get_children(doctype: str, parent: str = "", is_root: bool = False):
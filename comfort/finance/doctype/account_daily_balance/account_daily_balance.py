@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import datetime
+
+import frappe
+from comfort.utils import TypedDocument
+
+
+class AccountDailyBalance(TypedDocument):
+    account: str
+    date: datetime.date
+    debit: int
+    credit: int
+
+
+def on_doctype_update() -> None:
+    frappe.db.add_unique("Account Daily Balance", ["account", "date"])
@@ -1,6 +1,6 @@
 from typing import Any, Literal
 
-from comfort.finance.utils import cancel_gl_entries_for, create_gl_entry, get_account
+from comfort.finance.utils import cancel_gl_entries_for, create_gl_entries, get_account
 from comfort.utils import TypedDocument, ValidationError, _, get_value
 
 
@@ -31,8 +31,11 @@ class Compensation(TypedDocument):
             "Sales Order": (bank_or_cash, get_account("sales_compensations")),
         }[self.voucher_type]
 
-        create_gl_entry(self.doctype, self.name, accounts[0], 0, self.amount)
-        create_gl_entry(self.doctype, self.name, accounts[1], self.amount, 0)
+        create_gl_entries(
+            self.doctype,
+            self.name,
+            [(accounts[0], 0, self.amount), (accounts[1], self.amount, 0)],
+        )
 
     def on_cancel(self) -> None:  # pragma: no cover
         cancel_gl_entries_for(self.doctype, self.name)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Literal
 
+from comfort.finance.utils import update_account_daily_balance
 from comfort.utils import TypedDocument, ValidationError, _, get_value
 
 
@@ -15,10 +17,23 @@ class GLEntry(TypedDocument):
         "Money Transfer",
     ]
     voucher_no: str
+    sales_order: str | None
     account: str
     debit: int
     credit: int
+    creation: datetime | str
 
     def validate(self):
         if get_value("Account", self.account, "is_group"):
             raise ValidationError(_("Can't add GL Entry for group account"))
+
+    def _update_account_daily_balance(self, reverse: bool = False) -> None:
+        update_account_daily_balance(
+            [(self.account, self.creation, self.debit, self.credit)], reverse=reverse
+        )
+
+    def on_submit(self) -> None:
+        self._update_account_daily_balance()
+
+    def on_cancel(self) -> None:
+        self._update_account_daily_balance(reverse=True)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Literal
 
-from comfort.finance.utils import cancel_gl_entries_for, create_gl_entry, get_account
+from comfort.finance.utils import cancel_gl_entries_for, create_gl_entries, get_account
 from comfort.utils import TypedDocument, ValidationError, _, get_doc, get_value
 
 
@@ -18,22 +18,16 @@ class Payment(TypedDocument):
         if self.amount <= 0:
             raise ValidationError(_("Amount should be more that zero"))
 
-    def _new_gl_entry(self, account_field: str, debit: int, credit: int) -> None:
-        create_gl_entry(
-            doctype=self.doctype,
-            name=self.name,
-            account=get_account(account_field),
-            debit=debit,
-            credit=credit,
-        )
-
     def _resolve_cash_or_bank(self):
         return "cash" if self.paid_with_cash else "bank"
 
     def create_sales_gl_entries(self) -> None:
         cash_or_bank = self._resolve_cash_or_bank()
-        self._new_gl_entry(cash_or_bank, self.amount, 0)
-        self._new_gl_entry("prepaid_sales", 0, self.amount)
+        specs = [
+            (get_account(cash_or_bank), self.amount, 0),
+            (get_account("prepaid_sales"), 0, self.amount),
+        ]
+        create_gl_entries(self.doctype, self.name, specs, sales_order=self.voucher_no)
 
     def _get_purchase_values(self) -> tuple[int, int]:
         fields = (
@@ -44,14 +38,17 @@ class Payment(TypedDocument):
 
     def create_purchase_gl_entries(self) -> None:
         prepaid_inventory, purchase_delivery = self._get_purchase_values()
-        cash_or_bank = self._resolve_cash_or_bank()
-
-        self._new_gl_entry(cash_or_bank, 0, prepaid_inventory)
-        self._new_gl_entry("prepaid_inventory", prepaid_inventory, 0)
-
+        cash_or_bank = get_account(self._resolve_cash_or_bank())
+        specs = [
+            (cash_or_bank, 0, prepaid_inventory),
+            (get_account("prepaid_inventory"), prepaid_inventory, 0),
+        ]
         if purchase_delivery > 0:
-            self._new_gl_entry(cash_or_bank, 0, purchase_delivery)
-            self._new_gl_entry("purchase_delivery", purchase_delivery, 0)
+            specs += [
+                (cash_or_bank, 0, purchase_delivery),
+                (get_account("purchase_delivery"), purchase_delivery, 0),
+            ]
+        create_gl_entries(self.doctype, self.name, specs)
 
     def before_submit(self) -> None:
         if self.voucher_type == "Sales Order":
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from comfort.entities import Item
-from comfort.stock.utils import get_stock_balance
+from comfort.stock.utils import get_stock_balances
 from comfort.transactions import SalesOrder
 from comfort.utils import _, get_all, group_by_attr
 
@@ -37,8 +37,9 @@ def _get_not_purchased_sales_orders_amount():
 
 
 def _get_items_to_sell_amount():
-    counter = get_stock_balance("Available Actual")
-    purchased = get_stock_balance("Available Purchased")
+    balances = get_stock_balances(("Available Actual", "Available Purchased"))
+    counter = balances["Available Actual"]
+    purchased = balances["Available Purchased"]
     for item_code in counter:
         if item_code in purchased:
             counter[item_code] += purchased[item_code]
@@ -14,6 +14,13 @@ frappe.query_reports["General Ledger"] = {
       default: frappe.datetime.get_today(),
       reqd: 1,
     },
+    {
+      fieldname: "account",
+      label: __("Account"),
+      fieldtype: "Link",
+      options: "Account",
+      get_query: () => ({ filters: { is_group: 0 } }),
+    },
   ],
   formatter: (value, row, column, data, default_formatter) => {
     if (column.id == "voucher_type" && value) {
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any
 
 from comfort.finance import GLEntry
+from comfort.finance.utils import get_account_totals
 from comfort.utils import ValidationError, _, get_all
+from frappe.utils import add_days
 
 columns = [
     {
@@ -72,6 +75,14 @@ class _GLEntryForReport(GLEntry):
 
 
 def get_data(filters: dict[str, str]) -> list[_GLEntryForReport]:
+    # Whole `to_date` is included, same as in totals from Account Daily Balance
+    to_date = f"{filters['to_date']} 23:59:59.999999"
+    conditions: list[tuple[str, str, Any]] = [
+        ("docstatus", "!=", 2),
+        ("creation", "between", (filters["from_date"], to_date)),
+    ]
+    if filters.get("account"):
+        conditions.append(("account", "=", filters["account"]))
     return get_all(  # type: ignore
         GLEntry,
         field=(
@@ -84,14 +95,37 @@ def get_data(filters: dict[str, str]) -> list[_GLEntryForReport]:
             "credit",
             "(debit - credit) as balance",
         ),
-        filter=(
-            ("docstatus", "!=", 2),
-            ("creation", "between", (filters["from_date"], filters["to_date"])),
-        ),
+        filter=tuple(conditions),
         order_by="creation",
     )
 
 
+def get_report_summary(filters: dict[str, str]) -> list[dict[str, Any]] | None:
+    """Get opening and closing balance of account by summing its daily balances."""
+    account = filters.get("account")
+    if not account:
+        return None
+
+    before = add_days(filters["from_date"], -1)
+    opening_debit, opening_credit = get_account_totals(None, before).get(
+        account, (0, 0)
+    )
+    debit, credit = get_account_totals(filters["from_date"], filters["to_date"]).get(
+        account, (0, 0)
+    )
+    opening_balance = opening_debit - opening_credit
+    return [
+        {"value": opening_balance, "label": _("Opening"), "datatype": "Currency"},
+        {"value": debit, "label": _("Debit"), "datatype": "Currency"},
+        {"value": credit, "label": _("Credit"), "datatype": "Currency"},
+        {
+            "value": opening_balance + debit - credit,
+            "label": _("Closing"),
+            "datatype": "Currency",
+        },
+    ]
+
+
 def execute(filters: dict[str, str]):  # pragma: no cover
     validate_filters(filters)
-    return columns, get_data(filters)
+    return columns, get_data(filters), None, None, get_report_summary(filters)
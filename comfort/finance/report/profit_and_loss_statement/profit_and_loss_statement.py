@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Any
 
-import frappe
 from comfort.finance import Account
+from comfort.finance.utils import get_account_totals
 from comfort.utils import _, get_all, group_by_attr
 
 columns = [
@@ -51,17 +50,10 @@ def _filter_accounts(parent_children_map: dict[str | None, list[AccountWithTotal
 
 
 def _get_account_balance_map(filters: dict[str, str]):
-    entries: list[Any] = frappe.get_all(
-        "GL Entry",
-        fields=("account", "(debit - credit) as balance"),
-        filters=(
-            ("docstatus", "!=", 2),
-            ("creation", "between", (filters["from_date"], filters["to_date"])),
-        ),
-    )
+    totals = get_account_totals(filters["from_date"], filters["to_date"])
     account_balance_map: defaultdict[str | None, int] = defaultdict(int)
-    for entry in entries:
-        account_balance_map[entry.account] += -entry.balance
+    for account, (debit, credit) in totals.items():
+        account_balance_map[account] += credit - debit
     return account_balance_map
 
 
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-from typing import Literal
+from collections import defaultdict
+from datetime import date
+from typing import Any, Iterable, Literal
 
+import frappe
 from comfort.utils import (
     ValidationError,
     _,
-    get_all,
+    bulk_insert,
+    cancel_ledger_entries,
     get_cached_value,
-    get_doc,
+    get_standard_values,
     new_doc,
 )
+from frappe.utils import getdate
+
+GLEntryVoucherTypes = Literal[
+    "Payment",
+    "Receipt",
+    "Sales Return",
+    "Purchase Return",
+    "Compensation",
+    "Money Transfer",
+]
 
 
 def get_account(field_name: str) -> str:
@@ -22,19 +36,17 @@ def get_account(field_name: str) -> str:
 
 
 def create_gl_entry(
-    doctype: Literal[
-        "Payment",
-        "Receipt",
-        "Sales Return",
-        "Purchase Return",
-        "Compensation",
-        "Money Transfer",
-    ],
+    doctype: GLEntryVoucherTypes,
     name: str,
     account: str,
     debit: int,
     credit: int,
+    sales_order: str | None = None,
 ) -> None:
+    """Create and submit GL Entry.
+
+    Pass `sales_order` for cash and bank entries that change paid amount of Sales Order.
+    """
     from comfort.finance.doctype.gl_entry.gl_entry import GLEntry
 
     doc = new_doc(GLEntry)
@@ -43,22 +55,212 @@ def create_gl_entry(
     doc.credit = credit
     doc.voucher_type = doctype
     doc.voucher_no = name
+    doc.sales_order = sales_order
     doc.insert().submit()
 
 
+GLEntrySpec = tuple[str, int, int]  # account, debit, credit
+_ACCOUNTS_CACHE_KEY = "account_groups"
+
+
+def _load_account_groups() -> dict[str, bool]:
+    return {
+        name: bool(is_group)
+        for name, is_group in frappe.db.sql("SELECT name, is_group FROM `tabAccount`")
+    }
+
+
+def get_account_groups() -> dict[str, bool]:
+    """Get `{account: is_group}` for all Accounts from Redis."""
+    return frappe.cache().get_value(_ACCOUNTS_CACHE_KEY, _load_account_groups)
+
+
+def clear_account_groups_cache() -> None:
+    frappe.cache().delete_value(_ACCOUNTS_CACHE_KEY)
+
+
+def _validate_accounts(accounts: Iterable[str]) -> None:
+    is_group = get_account_groups()
+    for account in set(accounts):
+        if account not in is_group:
+            raise ValidationError(_("Account {} does not exist").format(account))
+        if is_group[account]:
+            raise ValidationError(_("Can't add GL Entry for group account"))
+
+
+def create_gl_entries(
+    doctype: GLEntryVoucherTypes,
+    name: str,
+    specs: Iterable[GLEntrySpec],
+    sales_order: str | None = None,
+) -> None:
+    """Post submitted GL Entries for one voucher in bulk.
+
+    Result is the same as calling `create_gl_entry` for every spec, but accounts
+    are checked with one cached lookup and entries are written with one statement.
+    Specs without amounts are skipped. Total debit should be equal to total credit.
+    Pass `sales_order` for vouchers that change paid amount of Sales Order.
+    """
+    specs = [s for s in specs if s[1] or s[2]]
+    if not specs:
+        return
+
+    if sum(s[1] for s in specs) != sum(s[2] for s in specs):
+        raise ValidationError(_("Total debit should be equal to total credit"))
+    _validate_accounts(s[0] for s in specs)
+
+    standard_values = {**get_standard_values(), "docstatus": 1}
+    entries: list[dict[str, Any]] = [
+        {
+            "name": frappe.generate_hash(length=10),
+            "account": account,
+            "debit": debit,
+            "credit": credit,
+            "voucher_type": doctype,
+            "voucher_no": name,
+            "sales_order": sales_order,
+            **standard_values,
+        }
+        for account, debit, credit in specs
+    ]
+    bulk_insert("GL Entry", entries)
+    update_account_daily_balance(
+        (e["account"], e["creation"], e["debit"], e["credit"]) for e in entries
+    )
+
+
 def cancel_gl_entries_for(
     doctype: Literal[
         "Payment", "Receipt", "Sales Return", "Purchase Return", "Compensation"
     ],
     name: str,
 ) -> None:
-    from comfort.finance.doctype.gl_entry.gl_entry import GLEntry
+    """Cancel all GL Entries of voucher at once and update daily balance."""
+    names = cancel_ledger_entries("GL Entry", doctype, name)
+    if not names:
+        return
+
+    update_account_daily_balance(
+        frappe.db.sql(
+            """
+            SELECT account, creation, debit, credit
+            FROM `tabGL Entry`
+            WHERE name IN %(names)s
+            """,
+            values={"names": tuple(names)},
+        ),
+        reverse=True,
+    )
+
+
+GLEntryAmounts = tuple[str, Any, int, int]  # account, creation, debit, credit
+_Amounts = tuple[int, int]  # debit, credit
+_DailyBalances = dict[tuple[str, date], _Amounts]
+
+
+def update_account_daily_balance(
+    entries: Iterable[GLEntryAmounts], reverse: bool = False
+) -> None:
+    """Add amounts of GL Entries to Account Daily Balance in one statement.
+
+    Pass `reverse` to subtract amounts of cancelled entries.
+    """
+    sign = -1 if reverse else 1
+    totals: defaultdict[tuple[str, date], list[int]] = defaultdict(lambda: [0, 0])
+    for account, created, debit, credit in entries:
+        total = totals[(account, getdate(created))]
+        total[0] += sign * debit
+        total[1] += sign * credit
+
+    standard_values = get_standard_values()
+    bulk_insert(
+        "Account Daily Balance",
+        [
+            {
+                "name": frappe.generate_hash(length=10),
+                "account": account,
+                "date": date_,
+                "debit": debit,
+                "credit": credit,
+                **standard_values,
+            }
+            for (account, date_), (debit, credit) in totals.items()
+        ],
+        update_on_duplicate=("modified", "modified_by"),
+        increment_on_duplicate=("debit", "credit"),
+    )
+
+
+def get_account_totals(
+    from_date: date | str | None, to_date: date | str
+) -> dict[str, _Amounts]:
+    """Get `{account: (debit, credit)}` for GL Entries made between dates inclusive.
+
+    Sums Account Daily Balance instead of scanning GL Entries. If `from_date`
+    is not set, totals are calculated since the beginning.
+    """
+    return {
+        account: (debit, credit)
+        for account, debit, credit in frappe.db.sql(
+            """
+            SELECT account, SUM(debit), SUM(credit)
+            FROM `tabAccount Daily Balance`
+            WHERE (%(from_date)s IS NULL OR date >= %(from_date)s)
+                AND date <= %(to_date)s
+            GROUP BY account
+            """,
+            values={
+                "from_date": getdate(from_date) if from_date else None,
+                "to_date": getdate(to_date),
+            },
+        )
+    }
+
+
+def _get_account_daily_balance_from_ledger() -> _DailyBalances:
+    return {
+        (account, date_): (debit, credit)
+        for account, date_, debit, credit in frappe.db.sql(
+            """
+            SELECT account, DATE(creation), SUM(debit), SUM(credit)
+            FROM `tabGL Entry`
+            WHERE docstatus != 2
+            GROUP BY account, DATE(creation)
+            """
+        )
+    }
+
+
+def check_account_daily_balance() -> dict[tuple[str, date], tuple[_Amounts, _Amounts]]:
+    """Compare Account Daily Balance with GL Entries.
+
+    Returns mismatches as `{(account, date): (balance, ledger_balance)}`
+    where both are `(debit, credit)`.
+    """
+    balances: _DailyBalances = {
+        (account, date_): (debit, credit)
+        for account, date_, debit, credit in frappe.db.sql(
+            "SELECT account, date, debit, credit FROM `tabAccount Daily Balance`"
+        )
+    }
+    ledger = _get_account_daily_balance_from_ledger()
+    res: dict[tuple[str, date], tuple[_Amounts, _Amounts]] = {}
+    for key in balances.keys() | ledger.keys():
+        balance, ledger_balance = balances.get(key, (0, 0)), ledger.get(key, (0, 0))
+        if balance != ledger_balance:
+            res[key] = (balance, ledger_balance)
+    return res
+
 
-    for entry in get_all(
-        GLEntry,
-        filter={"voucher_type": doctype, "voucher_no": name, "docstatus": ("!=", 2)},
-    ):
-        get_doc(GLEntry, entry.name).cancel()
+def rebuild_account_daily_balance() -> None:
+    """Fill Account Daily Balance from scratch using GL Entries."""
+    frappe.db.sql("DELETE FROM `tabAccount Daily Balance`")
+    update_account_daily_balance(
+        (account, date_, debit, credit)
+        for (account, date_), (debit, credit) in (
+            _get_account_daily_balance_from_ledger().items()
+        )
+    )
 
 
 def create_payment(
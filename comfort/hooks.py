@@ -44,6 +44,8 @@ global_search_doctypes = _get_global_search_doctypes()
 reqd_frappe_version = "v13.22.1"
 
 scheduler_events = {
+    "cron": {"*/10 * * * *": ["comfort.integrations.ikea.sync_purchase_history"]},
+    "daily": ["comfort.stock.utils.make_stock_balance_snapshot"],
     "weekly": [
         "comfort.entities.doctype.customer.customer.update_all_customers_from_vk"
     ],
@@ -1,36 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
 from calendar import timegm
-from datetime import date, datetime, timezone
-from functools import lru_cache
-from typing import TypedDict, cast
+from collections import Counter
+from concurrent.futures import Future
+from copy import deepcopy
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache, partial
+from typing import Any, Callable, TypedDict, TypeVar, cast
 
 import ikea_api
+import redis.exceptions
 import sentry_sdk
 from ikea_api import format_item_code as format_item_code  # For jenv hook
+from ikea_api.utils import _parse_ingka_pagelink_urls
 from ikea_api.utils import (
     unshorten_urls_from_ingka_pagelinks as orig_unshorten_urls_from_ingka_pagelinks,
 )
 from ikea_api.wrappers import types
 from ikea_api.wrappers.parsers.iows_items import get_url as get_short_url
+from ikea_api.wrappers.parsers.purchases import (
+    parse_costs_order,
+    parse_history,
+    parse_status_banner_order,
+)
 from jwt import PyJWT
 from jwt.exceptions import ExpiredSignatureError
 
 import frappe
 from comfort import syncify
-from comfort.comfort_core import IkeaSettings
-from comfort.entities import Item, ItemCategory
+from comfort.comfort_core import IkeaPurchase, IkeaSettings
+from comfort.entities import ChildItem, Item, ItemCategory
+from comfort.entities.doctype.item.item import calculate_weight_for_items
+from comfort.entities.doctype.item_component.item_component import (
+    update_item_components,
+)
 from comfort.utils import (
     ValidationError,
     _,
-    count_qty,
-    counters_are_same,
-    doc_exists,
+    after_commit,
+    bulk_insert,
+    clear_item_values_cache,
     get_all,
     get_cached_doc,
     get_cached_value,
     get_doc,
-    new_doc,
+    get_standard_values,
+    maybe_json,
 )
 from frappe.utils import add_to_date, get_datetime, now_datetime
 
@@ -48,12 +69,69 @@ def get_constants():
     return ikea_api.Constants(country="ru", language="ru")
 
 
-def _should_renew_guest_token(doc: IkeaSettings):
+_TOKENS_KEY = "ikea_tokens"
+_TOKENS_LOCAL_TTL = 60  # Seconds before in-process copy is checked against Redis
+_TOKENS_SHARED_TTL = 24 * 60 * 60
+_GUEST_TOKEN_RENEW_AHEAD = timedelta(days=1)
+
+
+class _Tokens(TypedDict):
+    guest_token: str | None
+    guest_token_expiration: datetime | None
+    authorized_token: str | None
+    authorized_token_expiration: int | None
+
+
+_tokens_lock = threading.Lock()
+_tokens: dict[
+    str, tuple[_Tokens, float]
+] = {}  # Site -> tokens and time they were loaded at
+
+
+def clear_token_cache() -> None:
+    """Drop in-process and Redis copies of tokens. Called when Ikea Settings change."""
+    with _tokens_lock:
+        _tokens.pop(frappe.local.site, None)
+    frappe.cache().delete_value(_TOKENS_KEY)
+
+
+def _store_tokens(doc: IkeaSettings) -> _Tokens:
+    tokens = _Tokens(
+        guest_token=doc.guest_token,
+        guest_token_expiration=get_datetime(doc.guest_token_expiration)
+        if doc.guest_token_expiration
+        else None,
+        authorized_token=doc.authorized_token,
+        authorized_token_expiration=doc.authorized_token_expiration,
+    )
+    frappe.cache().set_value(_TOKENS_KEY, tokens, expires_in_sec=_TOKENS_SHARED_TTL)
+    with _tokens_lock:
+        _tokens[frappe.local.site] = (tokens, time.monotonic())
+    return tokens
+
+
+def _load_tokens(use_local: bool = True) -> _Tokens:
+    """Get tokens from in-process copy, Redis or Ikea Settings, whichever is first."""
+    with _tokens_lock:
+        local = _tokens.get(frappe.local.site)
+    if use_local and local and time.monotonic() - local[1] < _TOKENS_LOCAL_TTL:
+        return local[0]
+
+    tokens: _Tokens | None = frappe.cache().get_value(_TOKENS_KEY, expires=True)
+    if tokens is None:
+        return _store_tokens(get_doc(IkeaSettings))
+    with _tokens_lock:
+        _tokens[frappe.local.site] = (tokens, time.monotonic())
+    return tokens
+
+
+def _should_renew_guest_token(tokens: _Tokens):
     return any(
         (
-            not doc.guest_token,
-            not doc.guest_token_expiration,
-            get_datetime(doc.guest_token_expiration) <= now_datetime(),  # type: ignore
+            not tokens["guest_token"],
+            not tokens["guest_token_expiration"],
+            tokens["guest_token_expiration"]
+            <= now_datetime() + _GUEST_TOKEN_RENEW_AHEAD,  # type: ignore
         )
     )
 
@@ -62,18 +140,26 @@ def _get_guest_token() -> str:
     return ikea_api.run(ikea_api.Auth(get_constants()).get_guest_token())
 
 
-def _set_renew_guest_token(doc: IkeaSettings) -> None:
+def _renew_guest_token() -> _Tokens:
+    # Other worker could renew token while we were waiting for the lock
+    tokens = _load_tokens(use_local=False)
+    if not _should_renew_guest_token(tokens):
+        return tokens
+
+    doc = get_doc(IkeaSettings)
     doc.guest_token = _get_guest_token()
     doc.guest_token_expiration = add_to_date(None, days=30)
     doc.save()
+    return _store_tokens(doc)
 
 
 def get_guest_token():
-    doc = get_cached_doc(IkeaSettings)
-    if _should_renew_guest_token(doc):
-        _set_renew_guest_token(doc)
-    assert doc.guest_token
-    return doc.guest_token
+    """Get guest token. It is renewed a day before expiration by one worker at a time."""
+    tokens = _load_tokens()
+    if _should_renew_guest_token(tokens):
+        tokens = single_flight("renew_guest_token", None, _renew_guest_token)
+    assert tokens["guest_token"]
+    return tokens["guest_token"]
 
 
 def _auth_token_expired(exp: int) -> bool | None:
@@ -84,22 +170,135 @@ def _auth_token_expired(exp: int) -> bool | None:
         return True
 
 
-def _should_renew_auth_token(doc: IkeaSettings):
+def _should_renew_auth_token(tokens: _Tokens):
     return any(
         (
-            not doc.authorized_token,
-            not doc.authorized_token_expiration,
-            _auth_token_expired(doc.authorized_token_expiration),  # type: ignore
+            not tokens["authorized_token"],
+            not tokens["authorized_token_expiration"],
+            _auth_token_expired(tokens["authorized_token_expiration"]),  # type: ignore
         )
     )
 
 
 def get_auth_token() -> str:
-    doc = get_cached_doc(IkeaSettings)
-    if _should_renew_auth_token(doc):
-        raise ValidationError(_("Update authorization info"))
-    assert doc.authorized_token
-    return doc.authorized_token
+    tokens = _load_tokens()
+    if _should_renew_auth_token(tokens):
+        # Token could be updated in other worker
+        tokens = _load_tokens(use_local=False)
+        if _should_renew_auth_token(tokens):
+            raise ValidationError(_("Update authorization info"))
+    assert tokens["authorized_token"]
+    return tokens["authorized_token"]
+
+
+_T = TypeVar("_T")
+
+_SINGLE_FLIGHT_LOCK_TIMEOUT = 120
+_SINGLE_FLIGHT_RESULT_TTL = 30
+_SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+_in_flight_lock = threading.Lock()
+_in_flight: dict[str, Future[Any]] = {}
+
+
+def _make_call_key(endpoint: str, args: Any) -> str:
+    """Make cache key from endpoint name and JSON-serializable, normalized arguments."""
+    payload = json.dumps(args, sort_keys=True, default=str)
+    return f"ikea_{endpoint}_{hashlib.sha1(payload.encode()).hexdigest()}"  # nosec
+
+
+def _release_single_flight_lock(lock_key: str, flight_id: str) -> None:
+    cache = frappe.cache()
+    try:
+        owner: bytes | None = cache.get(lock_key)
+        if owner is not None and owner.decode() == flight_id:
+            cache.delete(lock_key)
+    except redis.exceptions.ConnectionError:
+        pass  # Lock will expire by itself
+
+
+def _wait_for_single_flight_result(key: str, lock_key: str, owner: bytes):
+    """Wait until worker that holds the lock publishes result.
+    Return None if that worker is gone without result or time is out."""
+    cache = frappe.cache()
+    result_key = f"{key}_{owner.decode()}"
+    deadline = time.monotonic() + _SINGLE_FLIGHT_LOCK_TIMEOUT
+
+    while time.monotonic() < deadline:
+        # `expires=True` skips request-local cache that would memoize miss
+        if (res := cache.get_value(result_key, expires=True)) is not None:
+            return cast("tuple[Any]", res)
+        if cache.get(lock_key) != owner:
+            return cast("tuple[Any]", cache.get_value(result_key, expires=True))
+        time.sleep(_SINGLE_FLIGHT_POLL_INTERVAL)
+
+
+def _call_across_workers(key: str, func: Callable[[], _T]) -> _T:
+    """Make sure only one worker calls `func` for this key and others reuse its result.
+
+    Worker that holds Redis lock calls `func` and puts result in slot that is named
+    after lock owner, so stale results from previous calls are never picked up.
+    """
+    cache = frappe.cache()
+    lock_key = cache.make_key(f"{key}_lock")
+    flight_id = frappe.generate_hash(length=10)
+
+    while True:
+        if cache.set(lock_key, flight_id, nx=True, ex=_SINGLE_FLIGHT_LOCK_TIMEOUT):
+            try:
+                result = func()
+                cache.set_value(
+                    f"{key}_{flight_id}",
+                    (result,),
+                    expires_in_sec=_SINGLE_FLIGHT_RESULT_TTL,
+                )
+                return result
+            finally:
+                _release_single_flight_lock(lock_key, flight_id)
+
+        owner: bytes | None = cache.get(lock_key)
+        if owner is None:
+            continue  # Lock was released just now, try to acquire it
+
+        if (res := _wait_for_single_flight_result(key, lock_key, owner)) is not None:
+            return res[0]
+        if cache.get(lock_key) == owner:
+            return func()  # Timed out waiting for result
+
+
+def single_flight(endpoint: str, args: Any, func: Callable[[], _T]) -> _T:
+    """Coalesce identical concurrent IKEA calls.
+
+    Calls are identified by `endpoint` and normalized `args`. While a call
+    is running, identical calls from this process wait for it and identical calls
+    from other workers wait for its result in Redis.
+    """
+    key = _make_call_key(endpoint, args)
+    local_key: str = frappe.cache().make_key(key)  # Namespaced by site
+
+    with _in_flight_lock:
+        future = _in_flight.get(local_key)
+        is_leader = future is None
+        if future is None:
+            future = _in_flight[local_key] = Future()
+
+    if not is_leader:
+        return deepcopy(future.result())
+
+    try:
+        try:
+            result = _call_across_workers(key, func)
+        except redis.exceptions.ConnectionError:
+            result = func()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[local_key]
 
 
 def _get_zip_code():
@@ -135,9 +334,65 @@ def _check_delivery_services_response(
     frappe.msgprint(_("No available delivery options"), alert=True, indicator="red")
 
 
-def get_delivery_services(items: dict[str, int]):
+def _normalize_items(items: dict[str, int]) -> list[tuple[str, int]]:
+    """Canonical form of items counter: without zero quantities, sorted by item code."""
+    return sorted((+Counter(items)).items())
+
+
+def _get_delivery_services_cache_ttl() -> int:
+    return get_cached_value(
+        "Ikea Settings", "Ikea Settings", "delivery_services_cache_ttl"
+    )
+
+
+def _count_cache_access(name: str, hit: bool) -> None:
+    cache = frappe.cache()
+    counter = "hits" if hit else "misses"
+    try:
+        cache.incr(cache.make_key(f"ikea_{name}_cache_{counter}"))
+    except redis.exceptions.ConnectionError:
+        pass
+
+
+def get_cache_stats(name: str) -> dict[str, int]:
+    """Get hit and miss counters of IKEA cache, for example, "delivery_services"."""
+    cache = frappe.cache()
+    return {
+        counter: int(cache.get(cache.make_key(f"ikea_{name}_cache_{counter}")) or 0)
+        for counter in ("hits", "misses")
+    }
+
+
+def _get_delivery_services_cached(items: dict[str, int], use_cache: bool):
+    args = (_get_zip_code(), _normalize_items(items))
+    ttl = _get_delivery_services_cache_ttl()
+    key = _make_call_key("delivery_services", args)
+    cache = frappe.cache()
+
+    if ttl and use_cache:
+        response: types.GetDeliveryServicesResponse | None = cache.get_value(
+            key, expires=True
+        )
+        _count_cache_access("delivery_services", hit=response is not None)
+        if response is not None:
+            return response
+
+    response = single_flight(
+        "get_delivery_services", args, lambda: _get_delivery_services(items)
+    )
+    if ttl:
+        cache.set_value(key, response, expires_in_sec=ttl)
+    return response
+
+
+def get_delivery_services(items: dict[str, int], use_cache: bool = True):
+    """Get delivery services for items.
+
+    Responses are cached for `delivery_services_cache_ttl` seconds set in Ikea Settings.
+    Pass `use_cache=False` to skip cached response and get fresh one.
+    """
     _validate_delivery_services_items(items)
-    response = _get_delivery_services(items)
+    response = _get_delivery_services_cached(items, use_cache)
     if _check_delivery_services_response(response):
         return response
 
@@ -158,14 +413,104 @@ def add_items_to_cart(items: dict[str, int], authorize: bool):
     return _add_items_to_cart(items, authorize)
 
 
-def _get_purchase_history():
+_PURCHASE_HISTORY_PAGE_SIZE = 10
+
+
+def _get_purchase_history_page(skip: int) -> list[types.PurchaseHistoryItem]:
     purchases = ikea_api.Purchases(constants=get_constants(), token=get_auth_token())
-    return ikea_api.get_purchase_history(purchases=purchases)
+    response = ikea_api.run(
+        purchases.history(take=_PURCHASE_HISTORY_PAGE_SIZE, skip=skip)
+    )
+    return parse_history(get_constants(), response)
+
+
+def _parse_purchase_datetime(value: str) -> datetime:
+    """Convert ISO datetime from IKEA (in UTC) to naive datetime for storing."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _get_purchase_history_cutoff() -> datetime | None:
+    """Get datetime of the oldest purchase that could change since last sync.
+
+    It is the latest synced purchase or, if older, the oldest purchase
+    that is still in progress so that its status is refreshed too.
+    """
+    res: list[datetime | None] = frappe.db.sql_list(
+        """
+        SELECT LEAST(
+            MAX(purchase_datetime),
+            IFNULL(
+                MIN(IF(status = 'IN_PROGRESS', purchase_datetime, NULL)),
+                MAX(purchase_datetime)
+            )
+        )
+        FROM `tabIkea Purchase`
+        """
+    )
+    return get_datetime(res[0]) if res and res[0] else None
+
+
+def _fetch_new_purchases(cutoff: datetime | None):
+    purchases: list[types.PurchaseHistoryItem] = []
+    while True:
+        page = _get_purchase_history_page(skip=len(purchases))
+        purchases += page
+        if len(page) < _PURCHASE_HISTORY_PAGE_SIZE:
+            break
+        if cutoff and _parse_purchase_datetime(page[-1].datetime) <= cutoff:
+            break
+    return purchases
+
+
+def _get_purchase_values(purchase: types.PurchaseHistoryItem) -> dict[str, Any]:
+    return {
+        "name": purchase.id,
+        "purchase_id": purchase.id,
+        "status": purchase.status,
+        "price": purchase.price,
+        "purchase_datetime": _parse_purchase_datetime(purchase.datetime),
+        "datetime_formatted": purchase.datetime_formatted,
+        "store": purchase.store,
+        **get_standard_values(),
+    }
+
+
+def sync_purchase_history() -> None:
+    """Mirror purchases made since last sync to Ikea Purchase. Runs on schedule."""
+    if _should_renew_auth_token(_load_tokens()):
+        return
+
+    purchases = _fetch_new_purchases(_get_purchase_history_cutoff())
+    bulk_insert(
+        "Ikea Purchase",
+        [_get_purchase_values(p) for p in purchases],
+        update_on_duplicate=(
+            "status",
+            "price",
+            "datetime_formatted",
+            "store",
+            "modified",
+            "modified_by",
+        ),
+    )
 
 
 @frappe.whitelist()
-def get_purchase_history():
-    return [p.dict() for p in _get_purchase_history()]
+def get_purchase_history(start: int = 0, page_length: int = 20):
+    return get_all(
+        IkeaPurchase,
+        field=(
+            "purchase_id as id",
+            "status",
+            "price",
+            "purchase_datetime as datetime",
+            "datetime_formatted",
+            "store",
+        ),
+        start=int(start),
+        limit=int(page_length),
+        order_by="purchase_datetime DESC",
+    )
 
 
 class PurchaseInfoDict(TypedDict):
@@ -185,26 +530,43 @@ def _get_purchase_info(purchase_id: str) -> PurchaseInfoDict:
     )
 
 
-def _handle_purchase_info_error(exc: ikea_api.GraphQLError) -> None:
+def _is_purchase_not_found(exc: ikea_api.GraphQLError) -> bool:
     skip_messages = (
         "Purchase not found",
         "Order not found",
         "Invalid order id",
         "Exception while fetching data (/order/id) : null",
     )
-    for error in exc.errors:
-        if error.get("message") in skip_messages:
-            return
-    sentry_sdk.capture_exception(exc)
+    return any(error.get("message") in skip_messages for error in exc.errors)
+
+
+def _handle_purchase_info_error(exc: ikea_api.GraphQLError) -> None:
+    if not _is_purchase_not_found(exc):
+        sentry_sdk.capture_exception(exc)
+
+
+_PURCHASE_INFO_ATTEMPTS = 3
+_PURCHASE_INFO_BACKOFF_BASE = 0.5  # Seconds
+
+
+def _is_server_error(exc: ikea_api.APIError) -> bool:
+    return 500 <= exc.response.status_code < 600
+
+
+def _get_backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, _PURCHASE_INFO_BACKOFF_BASE * 2**attempt)  # nosec
 
 
 def _retry_get_purchase_info(purchase_id: str):
-    for _ in range(3):
+    for attempt in range(_PURCHASE_INFO_ATTEMPTS):
         try:
             return _get_purchase_info(purchase_id=purchase_id)
         except ikea_api.APIError as exc:
-            if exc.response.status_code != 504:
+            if not _is_server_error(exc):
                 raise
+        if attempt < _PURCHASE_INFO_ATTEMPTS - 1:
+            time.sleep(_get_backoff_delay(attempt))
 
 
 @frappe.whitelist()
@@ -215,22 +577,73 @@ def get_purchase_info(purchase_id: str):
         _handle_purchase_info_error(exc)
 
 
-def _make_item_category(name: str | None, url: str | None) -> None:
-    if name and not doc_exists("Item Category", name):
-        doc = new_doc(ItemCategory)
-        doc.category_name = name
-        doc.url = url
-        doc.insert()
+async def _get_purchase_info_async(
+    purchases: ikea_api.Purchases, purchase_id: str
+) -> PurchaseInfoDict:
+    endpoint = purchases.order_info(
+        order_number=purchase_id, queries=["StatusBannerOrder", "CostsOrder"]
+    )
+    status_banner, costs = await ikea_api.run_async(endpoint)
+    info = types.PurchaseInfo(
+        **parse_status_banner_order(status_banner).dict(),
+        **parse_costs_order(costs).dict(),
+    )
+    return cast(PurchaseInfoDict, info.dict())
 
 
-def _make_items_from_child_items_if_not_exist(parsed_item: types.ParsedItem) -> None:
-    for child_item in parsed_item.child_items:
-        if not doc_exists("Item", child_item.item_code):
-            doc = new_doc(Item)
-            doc.item_code = child_item.item_code
-            doc.item_name = child_item.name
-            doc.weight = child_item.weight
-            doc.insert()
+async def _retry_get_purchase_info_async(
+    purchases: ikea_api.Purchases, purchase_id: str
+) -> PurchaseInfoDict:
+    for attempt in range(_PURCHASE_INFO_ATTEMPTS - 1):
+        try:
+            return await _get_purchase_info_async(purchases, purchase_id)
+        except ikea_api.APIError as exc:
+            if not _is_server_error(exc):
+                raise
+        await asyncio.sleep(_get_backoff_delay(attempt))
+    return await _get_purchase_info_async(purchases, purchase_id)
+
+
+async def _get_purchase_info_or_error(
+    purchases: ikea_api.Purchases, purchase_id: str
+) -> PurchaseInfoDict | Exception:
+    try:
+        return await _retry_get_purchase_info_async(purchases, purchase_id)
+    except Exception as exc:
+        return exc
+
+
+class PurchaseInfoBatchResult(TypedDict):
+    results: dict[str, PurchaseInfoDict | None]  # None if purchase not found
+    errors: dict[str, str]
+
+
+@frappe.whitelist()
+def get_purchase_info_batch(purchase_ids: str | list[str]) -> PurchaseInfoBatchResult:
+    """Get purchase info for many purchases at once.
+
+    Not more than `purchase_info_concurrency` (Ikea Settings) requests are made at a time.
+    Requests that failed with 5xx are retried with jittered exponential backoff.
+    """
+    ids: list[str] = list(dict.fromkeys(maybe_json(purchase_ids)))
+    purchases = ikea_api.Purchases(constants=get_constants(), token=get_auth_token())
+    coro = syncify.gather(
+        *(_get_purchase_info_or_error(purchases, i) for i in ids),
+        limit=get_cached_value(
+            "Ikea Settings", "Ikea Settings", "purchase_info_concurrency"
+        ),
+    )
+
+    res = PurchaseInfoBatchResult(results={}, errors={})
+    for purchase_id, info in zip(ids, syncify.run(coro)):
+        if not isinstance(info, Exception):
+            res["results"][purchase_id] = info
+        elif isinstance(info, ikea_api.GraphQLError) and _is_purchase_not_found(info):
+            res["results"][purchase_id] = None
+        else:
+            sentry_sdk.capture_exception(info)
+            res["errors"][purchase_id] = str(info)
+    return res
 
 
 def _shorten_item_url_if_required(item: types.ParsedItem):
@@ -244,65 +657,221 @@ def _shorten_item_url_if_required(item: types.ParsedItem):
     )
 
 
-def _create_item(parsed_item: types.ParsedItem) -> None:
-    if doc_exists("Item", parsed_item.item_code):
-        doc = get_doc(Item, parsed_item.item_code)
-        doc.item_name = parsed_item.name
-        doc.url = _shorten_item_url_if_required(parsed_item)
-        doc.rate = parsed_item.price
-        doc.weight = parsed_item.weight
-        doc.image = parsed_item.image_url
-        if not counters_are_same(
-            count_qty(doc.child_items), count_qty(parsed_item.child_items)
-        ):
-            doc.child_items = []
-            doc.extend(
-                "child_items",
-                [
-                    {
-                        "item_code": i.item_code,
-                        "item_name": i.name,
-                        "weight": i.weight,
-                        "qty": i.qty,
-                    }
-                    for i in parsed_item.child_items
-                ],
-            )
-        doc.item_categories = []
-        if parsed_item.category_name:
-            doc.append("item_categories", {"item_category": parsed_item.category_name})
-        doc.save()
+def _create_item_categories(items: list[types.ParsedItem]) -> None:
+    categories: dict[str, str | None] = {}
+    for item in items:
+        if item.category_name:
+            categories.setdefault(item.category_name, item.category_url)
+    if not categories:
+        return
 
-    else:
-        doc = new_doc(Item)
-        doc.item_code = parsed_item.item_code
-        doc.item_name = parsed_item.name
-        doc.url = _shorten_item_url_if_required(parsed_item)
-        doc.rate = parsed_item.price
-        doc.weight = parsed_item.weight
-        doc.image = parsed_item.image_url
-        doc.child_items = []
-        doc.extend(
-            "child_items",
+    exist: list[str] = get_all(
+        ItemCategory, pluck="name", filter={"name": ("in", list(categories))}
+    )
+    standard_values = get_standard_values()
+    bulk_insert(
+        "Item Category",
+        [
+            {"name": name, "category_name": name, "url": url, **standard_values}
+            for name, url in categories.items()
+            if name not in exist
+        ],
+    )
+
+
+def _get_item_values(item: types.ParsedItem | types.ChildItem) -> dict[str, Any]:
+    if isinstance(item, types.ChildItem):
+        return {
+            "name": item.item_code,
+            "item_code": item.item_code,
+            "item_name": item.name or item.item_code,
+            "url": None,
+            "rate": 0,
+            "weight": item.weight,
+            "image": None,
+        }
+    return {
+        "name": item.item_code,
+        "item_code": item.item_code,
+        "item_name": item.name or item.item_code,
+        "url": _shorten_item_url_if_required(item),
+        "rate": item.price,
+        "weight": item.weight,
+        "image": item.image_url,
+    }
+
+
+def _replace_item_tables(items: list[types.ParsedItem]) -> None:
+    if not items:
+        return
+
+    item_codes = tuple(i.item_code for i in items)
+    for doctype in ("Child Item", "Item Category Table"):
+        frappe.db.sql(  # nosec
+            f"""
+            DELETE FROM `tab{doctype}`
+            WHERE parenttype = 'Item' AND parent IN %(items)s
+            """,
+            values={"items": item_codes},
+        )
+
+    standard_values = get_standard_values()
+
+    def make_row(item: types.ParsedItem, parentfield: str, idx: int):
+        return {
+            "name": frappe.generate_hash(length=10),
+            "parent": item.item_code,
+            "parenttype": "Item",
+            "parentfield": parentfield,
+            "idx": idx,
+            **standard_values,
+        }
+
+    bulk_insert(
+        "Child Item",
+        [
+            {
+                **make_row(item, "child_items", idx),
+                "item_code": child.item_code,
+                "item_name": child.name,
+                "qty": child.qty,
+            }
+            for item in items
+            for idx, child in enumerate(item.child_items, start=1)
+        ],
+    )
+    bulk_insert(
+        "Item Category Table",
+        [
+            {
+                **make_row(item, "item_categories", 1),
+                "item_category": item.category_name,
+            }
+            for item in items
+            if item.category_name
+        ],
+    )
+
+
+def _create_items(parsed_items: list[types.ParsedItem]) -> None:
+    """Create or update fetched items, items from their child items and item categories.
+
+    Gives the same result as saving every Item, but with fixed number of queries.
+    Items with payload that haven't changed since last fetch are not updated.
+    Catalog is updated after commit, so rolled back Items are saved again next time.
+    """
+    if not parsed_items:
+        return
+
+    items = {i.item_code: i for i in parsed_items}
+    child_items = {
+        c.item_code: c
+        for i in items.values()
+        for c in i.child_items
+        if c.item_code not in items
+    }
+    exist: list[str] = get_all(
+        Item, pluck="name", filter={"name": ("in", [*items, *child_items])}
+    )
+    catalog = _get_catalog_entries([i for i in items if i in exist])
+    items_to_save = [
+        i
+        for i in items.values()
+        if i.item_code not in catalog
+        or catalog[i.item_code]["payload_hash"] != _get_payload_hash(i)
+    ]
+    new_child_items = [i for i in child_items.values() if i.item_code not in exist]
+
+    if items_to_save or new_child_items:
+        _create_item_categories(items_to_save)
+        standard_values = get_standard_values()
+        bulk_insert(
+            "Item",
             [
-                {
-                    "item_code": i.item_code,
-                    "item_name": i.name,
-                    "weight": i.weight,
-                    "qty": i.qty,
-                }
-                for i in parsed_item.child_items
+                {**_get_item_values(i), **standard_values}
+                for i in (*items_to_save, *new_child_items)
             ],
+            update_on_duplicate=(
+                "item_name",
+                "url",
+                "rate",
+                "weight",
+                "image",
+                "modified",
+                "modified_by",
+            ),
         )
-        doc.item_categories = []
-        if parsed_item.category_name:
-            doc.append("item_categories", {"item_category": parsed_item.category_name})
-        doc.insert()
+        _replace_item_tables(items_to_save)
+        update_item_components(i.item_code for i in items_to_save)
+        calculate_weight_for_items(
+            i.item_code for i in (*items_to_save, *new_child_items)
+        )
+        for item in items_to_save:
+            frappe.clear_document_cache("Item", item.item_code)
+        clear_item_values_cache(i.item_code for i in (*items_to_save, *new_child_items))
+
+    after_commit(partial(_set_catalog_entries, list(items.values())))
+
+
+_PAGELINKS_KEY = "ikea_pagelinks"
+_PAGELINKS_TTL = 30 * 24 * 60 * 60
+
+
+def _get_cached_pagelinks(urls: list[str]) -> dict[str, list[str]]:
+    cache = frappe.cache()
+    try:
+        values: list[bytes | None] = cache.hmget(cache.make_key(_PAGELINKS_KEY), urls)
+    except redis.exceptions.ConnectionError:
+        return {}
+    return {
+        url: json.loads(value) for url, value in zip(urls, values) if value is not None
+    }
+
+
+def _set_cached_pagelinks(pagelinks: dict[str, list[str]]) -> None:
+    """Cache resolved pagelinks for `_PAGELINKS_TTL`.
+
+    Empty results are skipped: they may be caused by upstream failure.
+    """
+    pagelinks = {url: codes for url, codes in pagelinks.items() if codes}
+    if not pagelinks:
+        return
+
+    cache = frappe.cache()
+    key = cache.make_key(_PAGELINKS_KEY)
+    pipeline = cache.pipeline()
+    for url, item_codes in pagelinks.items():
+        pipeline.hset(key, url, json.dumps(item_codes))
+    pipeline.expire(key, _PAGELINKS_TTL)
+    try:
+        pipeline.execute()
+    except redis.exceptions.ConnectionError:
+        pass
+
+
+async def _resolve_pagelink(url: str) -> list[str]:
+    locations = await orig_unshorten_urls_from_ingka_pagelinks(url)
+    return ikea_api.parse_item_codes(locations)
 
 
 def _unshorten_urls_from_ingka_pagelinks(item_codes: str | list[str]) -> list[str]:
-    coro = orig_unshorten_urls_from_ingka_pagelinks(str(item_codes))
-    return syncify.run(coro)
+    """Get item codes from ingka.page.link URLs.
+
+    Pagelinks never change target, so they are resolved once and then
+    taken from cache.
+    """
+    urls = list(dict.fromkeys(_parse_ingka_pagelink_urls(str(item_codes))))
+    if not urls:
+        return []
+
+    pagelinks = _get_cached_pagelinks(urls)
+    missing = [url for url in urls if url not in pagelinks]
+    if missing:
+        coro = syncify.gather(*(_resolve_pagelink(url) for url in missing))
+        resolved = dict(zip(missing, syncify.run(coro)))
+        _set_cached_pagelinks(resolved)
+        pagelinks.update(resolved)
+    return [item_code for url in urls for item_code in pagelinks[url]]
 
 
 def parse_item_codes(item_codes: str | list[str]) -> list[str]:
@@ -315,35 +884,100 @@ def parse_item_codes(item_codes: str | list[str]) -> list[str]:
     return ikea_api.parse_item_codes(res)
 
 
-def _get_items_to_fetch(item_codes: str | list[str], force_update: bool):
-    parsed_item_codes = parse_item_codes(item_codes)
+_CATALOG_KEY = "ikea_catalog"
+_CATALOG_TTL = 7 * 24 * 60 * 60
 
-    if force_update:
-        return parsed_item_codes
-    else:
-        exist: list[str] = get_all(
-            Item,
-            pluck="item_code",
-            field="item_code",
-            filter={"item_code": ("in", parsed_item_codes)},
-        )
-        return [i for i in parsed_item_codes if i not in exist]
 
+class _CatalogEntry(TypedDict):
+    fetched_at: float  # Unix timestamp
+    payload_hash: str
+
+
+def _get_payload_hash(parsed_item: types.ParsedItem) -> str:
+    payload = parsed_item.json(sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()  # nosec
 
-def _create_item_categories(items: list[types.ParsedItem]) -> None:
-    categories: set[tuple[str | None, str | None]] = set()
-    for item in items:
-        categories.add((item.category_name, item.category_url))
-    for category in categories:
-        _make_item_category(*category)
 
+def _get_catalog_key(item_code: str) -> str:
+    return frappe.cache().make_key(f"{_CATALOG_KEY}:{item_code}")
 
-def _fetch_child_items(items: list[types.ParsedItem], force_update: bool):
-    items_to_fetch: list[str] = []
+
+def _get_catalog_entries(item_codes: list[str]) -> dict[str, _CatalogEntry]:
+    if not item_codes:
+        return {}
+    try:
+        values: list[bytes | None] = frappe.cache().mget(
+            [_get_catalog_key(i) for i in item_codes]
+        )
+    except redis.exceptions.ConnectionError:
+        return {}
+    return {
+        item_code: json.loads(value)
+        for item_code, value in zip(item_codes, values)
+        if value is not None
+    }
+
+
+def _set_catalog_entries(items: list[types.ParsedItem]) -> None:
+    """Store catalog entries of `items` for `_CATALOG_TTL`, each in its own key.
+
+    Entries outlive `item_catalog_max_age`: payload hash of stale item is still
+    used to skip saving it if it didn't change when fetched again.
+    """
+    fetched_at = time.time()
+    pipeline = frappe.cache().pipeline()
     for item in items:
-        for child in item.child_items:
-            items_to_fetch.append(child.item_code)
-    return fetch_items(items_to_fetch, force_update=force_update)
+        entry = _CatalogEntry(
+            fetched_at=fetched_at, payload_hash=_get_payload_hash(item)
+        )
+        pipeline.setex(
+            _get_catalog_key(item.item_code), _CATALOG_TTL, json.dumps(entry)
+        )
+    try:
+        pipeline.execute()
+    except redis.exceptions.ConnectionError:
+        pass
+
+
+def _get_item_catalog_max_age() -> int:
+    return get_cached_value("Ikea Settings", "Ikea Settings", "item_catalog_max_age")
+
+
+def _get_fresh_item_codes(item_codes: list[str]) -> list[str]:
+    """Get item codes that were fetched less than `item_catalog_max_age` minutes ago."""
+    max_age = _get_item_catalog_max_age()
+    if not max_age:
+        return []
+    now = time.time()
+    return [
+        item_code
+        for item_code, entry in _get_catalog_entries(item_codes).items()
+        if now - entry["fetched_at"] <= max_age * 60
+    ]
+
+
+def _get_items_to_fetch(item_codes: list[str], force_update: bool):
+    if not item_codes:
+        return []
+
+    exist: list[str] = get_all(
+        Item,
+        pluck="item_code",
+        field="item_code",
+        filter={"item_code": ("in", item_codes)},
+    )
+    if force_update:
+        exist = _get_fresh_item_codes(exist)
+    return [i for i in item_codes if i not in exist]
+
+
+def _get_known_child_item_codes(item_codes: list[str]) -> list[str]:
+    if not item_codes:
+        return []
+    child_item_codes: list[str] = get_all(
+        ChildItem, pluck="item_code", filter={"parent": ("in", item_codes)}
+    )
+    return list(dict.fromkeys(child_item_codes))
 
 
 class FetchItemsResult(TypedDict):
@@ -351,54 +985,111 @@ class FetchItemsResult(TypedDict):
     successful: list[str]
 
 
+class _ItemsChunkResult(TypedDict):
+    item_codes: list[str]
+    items: list[types.ParsedItem]
+    error: ikea_api.ItemFetchError | None
+
+
+async def _get_items_chunk(item_codes: list[str]) -> _ItemsChunkResult:
+    try:
+        items = await ikea_api.get_items(
+            constants=get_constants(), item_codes=item_codes
+        )
+    except ikea_api.ItemFetchError as exc:
+        return _ItemsChunkResult(item_codes=item_codes, items=[], error=exc)
+    return _ItemsChunkResult(item_codes=item_codes, items=items, error=None)
+
+
 def _get_items(item_codes: list[str]) -> list[types.ParsedItem]:
-    coro = ikea_api.get_items(constants=get_constants(), item_codes=item_codes)
-    return syncify.run(coro)
+    """Fetch items in chunks of `items_chunk_size` codes, `items_concurrency` chunks at once.
+
+    Chunk that failed with `ItemFetchError` doesn't affect others:
+    the error is sent to Sentry and items from the chunk are missing in the result.
+    """
+    if not item_codes:
+        return []
+
+    doc = get_cached_doc(IkeaSettings)
+    chunk_size = doc.items_chunk_size or len(item_codes)
+    chunks = [
+        item_codes[idx : idx + chunk_size]
+        for idx in range(0, len(item_codes), chunk_size)
+    ]
+    coro = syncify.gather(
+        *(_get_items_chunk(c) for c in chunks), limit=doc.items_concurrency
+    )
+
+    items: list[types.ParsedItem] = []
+    for result in syncify.run(coro):
+        if result["error"] is not None:
+            sentry_sdk.capture_exception(result["error"])
+        items += result["items"]
+    return items
+
+
+def _fetch_parsed_items(item_codes: list[str]) -> list[types.ParsedItem]:
+    return single_flight(
+        "get_items", sorted(set(item_codes)), lambda: _get_items(item_codes)
+    )
 
 
 def fetch_items(item_codes: str | list[str], force_update: bool):
-    items_to_fetch = _get_items_to_fetch(item_codes, force_update)
+    """Fetch items with their child items from IKEA and create or update them.
+
+    Items that are already in database are skipped. If `force_update` is set,
+    only items fetched less than `item_catalog_max_age` minutes ago (Ikea Settings)
+    are skipped.
+
+    Child items of combinations that are already in database are fetched in the same
+    request as parents. Another request is made only for child items of new combinations.
+    """
+    parsed_item_codes = parse_item_codes(item_codes)
+    requested_item_codes = list(
+        dict.fromkeys(
+            parsed_item_codes + _get_known_child_item_codes(parsed_item_codes)
+        )
+    )
+    items_to_fetch = _get_items_to_fetch(requested_item_codes, force_update)
     if not items_to_fetch:
-        return FetchItemsResult(unsuccessful=[], successful=[])
+        return FetchItemsResult(unsuccessful=[], successful=parsed_item_codes)
 
-    parsed_items = _get_items(items_to_fetch)
+    parsed_items = _fetch_parsed_items(items_to_fetch)
 
-    _create_item_categories(parsed_items)
-    _fetch_child_items(parsed_items, force_update)
+    new_child_item_codes = list(
+        dict.fromkeys(
+            child.item_code
+            for item in parsed_items
+            for child in item.child_items
+            if child.item_code not in requested_item_codes
+        )
+    )
+    if new_child_items_to_fetch := _get_items_to_fetch(
+        new_child_item_codes, force_update
+    ):
+        parsed_items = parsed_items + _fetch_parsed_items(new_child_items_to_fetch)
 
-    fetched_item_codes: list[str] = []
-    for parsed_item in parsed_items:
-        _make_items_from_child_items_if_not_exist(parsed_item)
-        _create_item(parsed_item)
-        fetched_item_codes.append(parsed_item.item_code)
+    _create_items(parsed_items)
+    fetched_item_codes = {i.item_code for i in parsed_items}
 
     return FetchItemsResult(
-        successful=[i for i in items_to_fetch if i in fetched_item_codes],
-        unsuccessful=[i for i in items_to_fetch if i not in fetched_item_codes],
+        successful=[
+            i
+            for i in parsed_item_codes
+            if i not in items_to_fetch or i in fetched_item_codes
+        ],
+        unsuccessful=[
+            i
+            for i in parsed_item_codes
+            if i in items_to_fetch and i not in fetched_item_codes
+        ],
     )
 
 
 @frappe.whitelist()
 def get_items(item_codes: str):  # pragma: no cover
     """Fetch items, show message about unsuccessful ones and retrieve basic information about fetched items."""
-    try:
-        response = fetch_items(item_codes, force_update=True)
-    except ikea_api.ItemFetchError as e:
-        if not (
-            e.args
-            and e.args[0]
-            and isinstance(e.args[0], list)
-            and isinstance(e.args[0][0], str)
-        ):
-            raise
-
-        # If error has this format: ItemFetchError(["item_code", ...])
-        if unsuccessful := ikea_api.parse_item_codes(e.args[0]):  # type: ignore
-            response = FetchItemsResult(unsuccessful=unsuccessful, successful=[])
-            sentry_sdk.capture_exception(e)
-        else:
-            raise
-
+    response = fetch_items(item_codes, force_update=True)
     if response["unsuccessful"]:
         frappe.msgprint(
             _("Cannot fetch those items: {}").format(
@@ -0,0 +1,7 @@
+import frappe
+from comfort.finance.utils import rebuild_account_daily_balance
+
+
+def execute() -> None:
+    frappe.reload_doc("finance", "doctype", "account_daily_balance")
+    rebuild_account_daily_balance()
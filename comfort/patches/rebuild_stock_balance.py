@@ -0,0 +1,7 @@
+import frappe
+from comfort.stock.utils import rebuild_stock_balance
+
+
+def execute() -> None:
+    frappe.reload_doc("stock", "doctype", "stock_balance_bin")
+    rebuild_stock_balance()
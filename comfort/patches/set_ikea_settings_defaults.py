@@ -0,0 +1,20 @@
+import frappe
+
+
+def execute() -> None:
+    """Set defaults of Ikea Settings fields that existing site has no value for.
+
+    Defaults from DocType are applied only when Single is created.
+    """
+    frappe.reload_doc("comfort_core", "doctype", "ikea_settings")
+    values: dict[str, str | None] = dict(
+        frappe.db.sql(
+            "SELECT field, value FROM `tabSingles` WHERE doctype = 'Ikea Settings'"
+        )
+    )
+    for df in frappe.get_meta("Ikea Settings").fields:
+        if df.default is not None and values.get(df.fieldname) in (None, ""):
+            frappe.db.set_value(
+                "Ikea Settings", "Ikea Settings", df.fieldname, df.default
+            )
+    frappe.clear_document_cache("Ikea Settings", "Ikea Settings")
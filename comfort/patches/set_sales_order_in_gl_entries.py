@@ -0,0 +1,29 @@
+import frappe
+from comfort.finance.utils import get_account
+
+
+def execute() -> None:
+    frappe.reload_doc("finance", "doctype", "gl_entry")
+    values = {"accounts": (get_account("cash"), get_account("bank"))}
+    frappe.db.sql(
+        """
+        UPDATE `tabGL Entry` AS gl_entry
+        JOIN `tabPayment` AS payment ON payment.name = gl_entry.voucher_no
+        SET gl_entry.sales_order = payment.voucher_no
+        WHERE gl_entry.voucher_type = 'Payment'
+            AND payment.voucher_type = 'Sales Order'
+            AND gl_entry.account IN %(accounts)s
+        """,
+        values=values,
+    )
+    frappe.db.sql(
+        """
+        UPDATE `tabGL Entry` AS gl_entry
+        JOIN `tabSales Return` AS sales_return
+            ON sales_return.name = gl_entry.voucher_no
+        SET gl_entry.sales_order = sales_return.sales_order
+        WHERE gl_entry.voucher_type = 'Sales Return'
+            AND gl_entry.account IN %(accounts)s
+        """,
+        values=values,
+    )
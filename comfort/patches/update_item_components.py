@@ -0,0 +1,13 @@
+import frappe
+from comfort.entities.doctype.item_component.item_component import (
+    update_item_components,
+)
+
+
+def execute() -> None:
+    frappe.reload_doc("entities", "doctype", "item_component")
+    update_item_components(
+        frappe.db.sql_list(
+            "SELECT DISTINCT parent FROM `tabChild Item` WHERE parenttype = 'Item'"
+        )
+    )
@@ -6,6 +6,12 @@ from comfort.stock.doctype.delivery_trip.delivery_trip import (
     DeliveryTrip as DeliveryTrip,
 )
 from comfort.stock.doctype.receipt.receipt import Receipt as Receipt
+from comfort.stock.doctype.stock_balance_bin.stock_balance_bin import (
+    StockBalanceBin as StockBalanceBin,
+)
+from comfort.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+    StockBalanceSnapshot as StockBalanceSnapshot,
+)
 from comfort.stock.doctype.stock_entry.stock_entry import StockEntry as StockEntry
 from comfort.stock.doctype.stock_entry_item.stock_entry_item import (
     StockEntryItem as StockEntryItem,
@@ -1,7 +1,11 @@
 from typing import Literal
 
 import frappe
-from comfort.stock.utils import cancel_stock_entries_for, create_stock_entry
+from comfort.stock.utils import (
+    StockEntrySpec,
+    cancel_stock_entries_for,
+    create_stock_entries,
+)
 from comfort.utils import TypedDocument, get_doc
 
 
@@ -13,21 +17,14 @@ class Checkout(TypedDocument):
         from comfort.transactions import PurchaseOrder
 
         doc = get_doc(PurchaseOrder, self.purchase_order)
+        specs: list[StockEntrySpec] = []
         if doc.sales_orders:
-            create_stock_entry(
-                self.doctype,
-                self.name,
-                "Reserved Purchased",
-                doc.get_items_in_sales_orders(True),
+            specs.append(
+                ("Reserved Purchased", doc.get_items_in_sales_orders(True), False)
             )
-
         if doc.items_to_sell:
-            create_stock_entry(
-                self.doctype,
-                self.name,
-                "Available Purchased",
-                doc.get_items_to_sell(True),
-            )
+            specs.append(("Available Purchased", doc.get_items_to_sell(True), False))
+        create_stock_entries(self.doctype, self.name, specs)
 
     def set_purchase_draft_status(self) -> None:
         frappe.db.set_value("Purchase Order", self.purchase_order, "status", "Draft")
@@ -13,6 +13,7 @@ from comfort.utils import (
     _,
     get_all,
     get_doc,
+    get_readonly_doc,
     get_value,
     group_by_attr,
 )
@@ -152,7 +153,7 @@ class DeliveryTrip(TypedDocument):
 
         stops: list[dict[str, Any]] = []
         for stop in self.stops:
-            doc = get_doc(SalesOrder, stop.sales_order)
+            doc = get_readonly_doc(SalesOrder, stop.sales_order)
             vk_url = get_value("Customer", stop.customer, "vk_url")
             stops.append(
                 {
@@ -175,6 +176,9 @@ class DeliveryTrip(TypedDocument):
 
     def _add_receipts_to_sales_orders(self) -> None:
         from comfort.transactions import SalesOrder
+        from comfort.transactions.doctype.sales_order.sales_order import (
+            set_sales_order_statuses,
+        )
 
         orders_have_receipt: list[str] = get_all(
             Receipt,
@@ -186,10 +190,16 @@ class DeliveryTrip(TypedDocument):
                 "docstatus": 1,
             },
         )
-        for stop in self.stops:
-            if stop.sales_order not in orders_have_receipt:
-                doc = get_doc(SalesOrder, stop.sales_order)
-                doc.add_receipt()
+        docs = [
+            get_doc(SalesOrder, stop.sales_order)
+            for stop in self.stops
+            if stop.sales_order not in orders_have_receipt
+        ]
+        for doc in docs:
+            doc.add_receipt(save=False)
+        set_sales_order_statuses(docs)
+        for doc in docs:
+            doc.save_without_validating()
 
     @frappe.whitelist()
     def set_completed_status(self) -> None:
@@ -3,9 +3,14 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Literal
 
 import frappe
-from comfort.finance.utils import cancel_gl_entries_for, create_gl_entry, get_account
+from comfort.finance.utils import cancel_gl_entries_for, create_gl_entries, get_account
 from comfort.stock.doctype.stock_entry.stock_entry import StockTypes
-from comfort.stock.utils import cancel_stock_entries_for, create_stock_entry
+from comfort.stock.utils import (
+    StockEntrySpec,
+    cancel_stock_entries_for,
+    create_stock_entries,
+    create_stock_entry,
+)
 from comfort.utils import TypedDocument, ValidationError, _, get_doc, get_value
 
 if TYPE_CHECKING:
@@ -25,9 +30,12 @@ class Receipt(TypedDocument):
             self.__voucher = frappe.get_doc(self.voucher_type, self.voucher_no)  # type: ignore
         return self.__voucher  # type: ignore
 
-    def _new_gl_entry(self, account_field: str, debit: int, credit: int) -> None:
-        create_gl_entry(
-            self.doctype, self.name, get_account(account_field), debit, credit
+    def _new_gl_entries(self, *specs: tuple[str, int, int]) -> None:
+        """Post GL Entries from `(account_field, debit, credit)` specs."""
+        create_gl_entries(
+            self.doctype,
+            self.name,
+            [(get_account(field), debit, credit) for field, debit, credit in specs],
         )
 
     def _new_stock_entry(
@@ -67,16 +75,13 @@ class Receipt(TypedDocument):
             else:
                 raise ValidationError(_("Cannot calculate services amount for Receipt"))
 
-        if inventory_amount:  # TODO: Test all this ifs
-            self._new_gl_entry("inventory", 0, inventory_amount)
-        if sales_amount:
-            self._new_gl_entry("sales", 0, sales_amount)
-        if delivery_amount:
-            self._new_gl_entry("delivery", 0, delivery_amount)
-        if installation_amount:
-            self._new_gl_entry("installation", 0, installation_amount)
-        if prepaid_sales_amount:
-            self._new_gl_entry("prepaid_sales", prepaid_sales_amount, 0)
+        self._new_gl_entries(
+            ("inventory", 0, inventory_amount),
+            ("sales", 0, sales_amount),
+            ("delivery", 0, delivery_amount),
+            ("installation", 0, installation_amount),
+            ("prepaid_sales", prepaid_sales_amount, 0),
+        )
 
     def create_sales_stock_entries(self) -> None:
         items: Any = self._voucher.get_items_with_splitted_combinations()  # type: ignore
@@ -88,30 +93,37 @@ class Receipt(TypedDocument):
             self.voucher_no,
             "items_to_sell_cost + sales_orders_cost as items_amount",
         )
-        self._new_gl_entry("prepaid_inventory", 0, items_amount)
-        self._new_gl_entry("inventory", items_amount, 0)
+        self._new_gl_entries(
+            ("prepaid_inventory", 0, items_amount),
+            ("inventory", items_amount, 0),
+        )
 
-    def _create_purchase_stock_entries_for_sales_orders(self) -> None:
+    def _get_purchase_stock_entries_for_sales_orders(self) -> list[StockEntrySpec]:
         items: Any = self._voucher.get_items_in_sales_orders(  # type: ignore
             split_combinations=True
         )
         if not items:
-            return
-        self._new_stock_entry("Reserved Purchased", items, reverse_qty=True)
-        self._new_stock_entry("Reserved Actual", items)
+            return []
+        return [("Reserved Purchased", items, True), ("Reserved Actual", items, False)]
 
-    def _create_purchase_stock_entries_for_items_to_sell(self) -> None:
+    def _get_purchase_stock_entries_for_items_to_sell(self) -> list[StockEntrySpec]:
         items: list[Any] = self._voucher.get_items_to_sell(  # type: ignore
             split_combinations=True
         )
         if not items:
-            return
-        self._new_stock_entry("Available Purchased", items, reverse_qty=True)
-        self._new_stock_entry("Available Actual", items)
-
-    def create_purchase_stock_entries(self) -> None:  # pragma: no cover
-        self._create_purchase_stock_entries_for_sales_orders()
-        self._create_purchase_stock_entries_for_items_to_sell()
+            return []
+        return [
+            ("Available Purchased", items, True),
+            ("Available Actual", items, False),
+        ]
+
+    def create_purchase_stock_entries(self) -> None:
+        create_stock_entries(
+            self.doctype,
+            self.name,
+            self._get_purchase_stock_entries_for_sales_orders()
+            + self._get_purchase_stock_entries_for_items_to_sell(),
+        )
 
     def set_status_in_voucher(self) -> None:
         from comfort.transactions import PurchaseOrder, SalesOrder
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import frappe
+from comfort.stock.utils import StockTypes
+from comfort.utils import TypedDocument
+
+
+class StockBalanceBin(TypedDocument):
+    stock_type: StockTypes
+    item_code: str
+    qty: int
+
+
+def on_doctype_update() -> None:
+    frappe.db.add_unique("Stock Balance Bin", ["stock_type", "item_code"])
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from datetime import date
+
+import frappe
+from comfort.stock.utils import StockTypes
+from comfort.utils import TypedDocument
+
+
+class StockBalanceSnapshot(TypedDocument):
+    snapshot_date: date
+    stock_type: StockTypes
+    item_code: str
+    qty: int
+
+
+def on_doctype_update() -> None:
+    frappe.db.add_unique(
+        "Stock Balance Snapshot", ["snapshot_date", "stock_type", "item_code"]
+    )
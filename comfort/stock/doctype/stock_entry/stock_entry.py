@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from collections import Counter
+from datetime import datetime
 from typing import Literal
 
 import frappe
 from comfort.stock.doctype.stock_entry_item.stock_entry_item import StockEntryItem
-from comfort.stock.utils import StockTypes
-from comfort.utils import TypedDocument
+from comfort.stock.utils import (
+    StockTypes,
+    update_stock_balance,
+    update_stock_balance_snapshots,
+)
+from comfort.utils import TypedDocument, count_qty
 
 
 class StockEntry(TypedDocument):
@@ -19,6 +25,18 @@ class StockEntry(TypedDocument):
     ]
     voucher_no: str
     items: list[StockEntryItem]
+    creation: datetime | str
+
+    def _update_stock_balance(self, counter: Counter[str]) -> None:
+        update_stock_balance(self.stock_type, counter)
+        update_stock_balance_snapshots(self.stock_type, counter, self.creation)
+
+    def on_submit(self) -> None:
+        self._update_stock_balance(count_qty(self.items))
+
+    def on_cancel(self) -> None:
+        counter = count_qty(self.items)
+        self._update_stock_balance(Counter({k: -v for k, v in counter.items()}))
 
 
 def on_doctype_update() -> None:
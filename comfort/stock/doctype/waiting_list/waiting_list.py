@@ -18,7 +18,7 @@ from comfort.utils import (
     count_qty,
     counters_are_same,
     get_all,
-    get_doc,
+    get_readonly_doc,
     group_by_attr,
 )
 
@@ -34,7 +34,7 @@ class WaitingList(TypedDocument):
 
         items: list[SalesOrderChildItem | SalesOrderItem] = []
         for order in self.sales_orders:
-            doc = get_doc(SalesOrder, order.sales_order)
+            doc = get_readonly_doc(SalesOrder, order.sales_order)
             items += doc.get_items_with_splitted_combinations()
         return items
 
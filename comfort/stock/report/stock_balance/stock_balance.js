@@ -7,6 +7,11 @@ frappe.query_reports["Stock Balance"] = {
       options:
         "\nAvailable Purchased\nAvailable Actual\nReserved Purchased\nReserved Actual",
     },
+    {
+      fieldname: "date",
+      label: __("Date"),
+      fieldtype: "Date",
+    },
   ],
   formatter(value, row, column, data, original_func) {
     if (column.id == "item_code") {
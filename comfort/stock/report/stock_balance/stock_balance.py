@@ -7,8 +7,9 @@ from comfort.stock.utils import StockTypes, get_stock_balance
 from comfort.utils import get_all, group_by_attr
 
 
-class StockBalanceFilters(TypedDict):
+class StockBalanceFilters(TypedDict, total=False):
     stock_type: StockTypes | None
+    date: str | None  # Balance at the end of this day, current if not set
 
 
 columns = [
@@ -32,7 +33,7 @@ columns = [
 def get_data(filters: StockBalanceFilters):
     if not "stock_type" in filters or not filters["stock_type"]:
         return
-    balance = get_stock_balance(filters["stock_type"])
+    balance = get_stock_balance(filters["stock_type"], as_of=filters.get("date"))
     items_with_names = get_all(
         Item,
         field=("item_code", "item_name"),
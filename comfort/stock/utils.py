@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Any, Iterable, Literal
 
-from comfort.stock.doctype.stock_entry_item.stock_entry_item import StockEntryItem
-from comfort.utils import count_qty, get_all, get_doc, new_doc
+import frappe
+from comfort.utils import (
+    bulk_insert,
+    cancel_ledger_entries,
+    count_qty,
+    get_standard_values,
+    new_doc,
+)
+from frappe.utils import add_days, get_first_day, getdate, today
 
 StockTypes = Literal[
     "Reserved Actual", "Available Actual", "Reserved Purchased", "Available Purchased"
@@ -52,38 +61,315 @@ def create_stock_entry(
     doc.insert().submit()
 
 
+StockEntrySpec = tuple[StockTypes, list[Any], bool]  # stock_type, items, reverse_qty
+
+
+def create_stock_entries(
+    doctype: Literal[
+        "Receipt", "Checkout", "Sales Return", "Purchase Return", "Sales Order"
+    ],
+    name: str,
+    specs: Iterable[StockEntrySpec],
+) -> None:
+    """Post submitted Stock Entries for one voucher in bulk.
+
+    Result is the same as calling `create_stock_entry` for every spec, but
+    entries, their items and Stock Balance Bin are written with one statement
+    each. Specs without items are skipped.
+    """
+    standard_values = {**get_standard_values(), "docstatus": 1}
+    entries: list[dict[str, Any]] = []
+    items: list[dict[str, Any]] = []
+    balance_rows: list[dict[str, Any]] = []
+
+    for stock_type, spec_items, reverse_qty in specs:
+        counter = count_qty(spec_items)
+        if reverse_qty:
+            counter = Counter({k: -v for k, v in counter.items()})
+        if not counter:
+            continue
+
+        entry_name = frappe.generate_hash(length=10)
+        entries.append(
+            {
+                "name": entry_name,
+                "stock_type": stock_type,
+                "voucher_type": doctype,
+                "voucher_no": name,
+                **standard_values,
+            }
+        )
+        items.extend(
+            {
+                "name": frappe.generate_hash(length=10),
+                "parent": entry_name,
+                "parenttype": "Stock Entry",
+                "parentfield": "items",
+                "idx": idx,
+                "item_code": item_code,
+                "qty": qty,
+                **standard_values,
+            }
+            for idx, (item_code, qty) in enumerate(counter.items(), start=1)
+        )
+        balance_rows.extend(_get_qty_rows(counter, stock_type=stock_type))
+
+    bulk_insert("Stock Entry", entries)
+    bulk_insert("Stock Entry Item", items)
+    bulk_insert(
+        "Stock Balance Bin",
+        balance_rows,
+        update_on_duplicate=("modified", "modified_by"),
+        increment_on_duplicate=("qty",),
+    )
+
+
 def cancel_stock_entries_for(
     doctype: Literal[
         "Receipt", "Checkout", "Sales Return", "Purchase Return", "Sales Order"
     ],
     name: str,
 ) -> None:
-    from comfort.stock import StockEntry
+    """Cancel all Stock Entries of voucher at once and update stock balance."""
+    names = cancel_ledger_entries(
+        "Stock Entry", doctype, name, child_doctypes=("Stock Entry Item",)
+    )
+    if not names:
+        return
 
-    entries = get_all(
-        StockEntry,
-        filter={"voucher_type": doctype, "voucher_no": name, "docstatus": ("!=", 2)},
+    balance: defaultdict[StockTypes, Counter[str]] = defaultdict(Counter)
+    by_entry: defaultdict[tuple[StockTypes, datetime], Counter[str]] = defaultdict(
+        Counter
     )
-    for entry in entries:
-        get_doc(StockEntry, entry.name).cancel()
+    for stock_type, creation, item_code, qty in frappe.db.sql(
+        """
+        SELECT entry.stock_type, entry.creation, item.item_code, item.qty
+        FROM `tabStock Entry Item` item
+        JOIN `tabStock Entry` entry ON entry.name = item.parent
+        WHERE entry.name IN %(names)s
+        """,
+        values={"names": tuple(names)},
+    ):
+        balance[stock_type][item_code] -= qty
+        by_entry[(stock_type, creation)][item_code] -= qty
 
+    for stock_type, counter in balance.items():
+        update_stock_balance(stock_type, counter)
 
-def get_stock_balance(stock_type: StockTypes) -> dict[str, int]:
-    from comfort.stock import StockEntry
+    last_snapshot_date = _get_nearest_snapshot_date(date.max)
+    for (stock_type, creation), counter in by_entry.items():
+        if last_snapshot_date and getdate(creation) < last_snapshot_date:
+            update_stock_balance_snapshots(stock_type, counter, creation)
+
+
+def _get_qty_rows(counter: Counter[str], **fields: Any) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": frappe.generate_hash(length=10),
+            **fields,
+            "item_code": item_code,
+            "qty": qty,
+            **get_standard_values(),
+        }
+        for item_code, qty in counter.items()
+    ]
+
+
+def update_stock_balance(stock_type: StockTypes, counter: Counter[str]) -> None:
+    """Add quantities to Stock Balance Bin in one statement.
+
+    Runs in the same transaction as the caller, and InnoDB row locks make
+    concurrent updates of the same bin safe.
+    """
+    bulk_insert(
+        "Stock Balance Bin",
+        _get_qty_rows(counter, stock_type=stock_type),
+        update_on_duplicate=("modified", "modified_by"),
+        increment_on_duplicate=("qty",),
+    )
+
+
+def get_stock_balances(
+    stock_types: Iterable[StockTypes],
+) -> dict[StockTypes, dict[str, int]]:
+    """Get non-zero stock balance for several stock types in one query."""
+    res: dict[StockTypes, dict[str, int]] = {t: {} for t in stock_types}
+    if not res:
+        return res
+
+    for stock_type, item_code, qty in frappe.db.sql(
+        """
+        SELECT stock_type, item_code, qty
+        FROM `tabStock Balance Bin`
+        WHERE stock_type IN %(stock_types)s AND qty != 0
+        """,
+        values={"stock_types": tuple(res)},
+    ):
+        res[stock_type][item_code] = qty
+    return res
+
+
+def get_stock_balance(
+    stock_type: StockTypes, as_of: date | str | None = None
+) -> dict[str, int]:
+    """Get current stock balance or balance at the end of `as_of` day."""
+    if as_of:
+        before = add_days(getdate(as_of), 1)
+        balance = _get_stock_balance_before(before, stock_type)
+        return {item_code: qty for (_, item_code), qty in balance.items()}
+    return get_stock_balances((stock_type,))[stock_type]
+
+
+def _get_nearest_snapshot_date(before: date) -> date | None:
+    return frappe.db.sql_list(
+        """
+        SELECT MAX(snapshot_date)
+        FROM `tabStock Balance Snapshot`
+        WHERE snapshot_date <= %s
+        """,
+        values=(before,),
+    )[0]
+
+
+def _get_stock_balance_before(
+    before: date, stock_type: StockTypes | None = None
+) -> dict[tuple[str, str], int]:
+    """Get non-zero balance by the start of `before` day.
+
+    Takes nearest snapshot and replays only Stock Entries created after it.
+    """
+    values = {
+        "snapshot_date": _get_nearest_snapshot_date(before),
+        "before": before,
+        "stock_type": stock_type,
+    }
+    return {
+        (type_, item_code): int(qty)
+        for type_, item_code, qty in frappe.db.sql(
+            """
+            SELECT stock_type, item_code, SUM(qty)
+            FROM (
+                SELECT stock_type, item_code, qty
+                FROM `tabStock Balance Snapshot`
+                WHERE snapshot_date = %(snapshot_date)s
+                UNION ALL
+                SELECT entry.stock_type, item.item_code, item.qty
+                FROM `tabStock Entry Item` item
+                JOIN `tabStock Entry` entry ON entry.name = item.parent
+                WHERE entry.docstatus = 1
+                    AND (
+                        %(snapshot_date)s IS NULL
+                        OR entry.creation >= %(snapshot_date)s
+                    )
+                    AND entry.creation < %(before)s
+            ) balance
+            WHERE %(stock_type)s IS NULL OR stock_type = %(stock_type)s
+            GROUP BY stock_type, item_code
+            HAVING SUM(qty) != 0
+            """,
+            values=values,
+        )
+    }
+
+
+def make_stock_balance_snapshot(snapshot_date: date | None = None) -> None:
+    """Save stock balance by the start of `snapshot_date`.
+
+    Runs daily. By default snapshot is made for the first day of current month,
+    and nothing is done if it exists already.
+    """
+    if snapshot_date is None:
+        snapshot_date = get_first_day(today())
+    if frappe.db.exists("Stock Balance Snapshot", {"snapshot_date": snapshot_date}):
+        return
+
+    counters: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    for (stock_type, item_code), qty in _get_stock_balance_before(
+        snapshot_date
+    ).items():
+        counters[stock_type][item_code] = qty
+    bulk_insert(
+        "Stock Balance Snapshot",
+        [
+            row
+            for stock_type, counter in counters.items()
+            for row in _get_qty_rows(
+                counter, snapshot_date=snapshot_date, stock_type=stock_type
+            )
+        ],
+    )
 
-    stock_entries = get_all(
-        StockEntry,
-        pluck="name",
-        filter={"docstatus": ("!=", 2), "stock_type": stock_type},
+
+def update_stock_balance_snapshots(
+    stock_type: StockTypes, counter: Counter[str], created: datetime | str
+) -> None:
+    """Add quantities to snapshots made after Stock Entry was created.
+
+    Snapshots only include submitted entries, so they need correction when
+    back-dated entry is cancelled or submitted after a snapshot was made.
+    """
+    snapshot_dates: list[date] = frappe.db.sql_list(
+        """
+        SELECT DISTINCT snapshot_date
+        FROM `tabStock Balance Snapshot`
+        WHERE snapshot_date > %s
+        """,
+        values=(created,),
     )
-    items = get_all(
-        StockEntryItem,
-        field=("item_code", "qty"),
-        filter={"parent": ("in", stock_entries)},
+    bulk_insert(
+        "Stock Balance Snapshot",
+        [
+            row
+            for snapshot_date in snapshot_dates
+            for row in _get_qty_rows(
+                counter, snapshot_date=snapshot_date, stock_type=stock_type
+            )
+        ],
+        update_on_duplicate=("modified", "modified_by"),
+        increment_on_duplicate=("qty",),
     )
 
-    res: dict[str, int] = {}
-    for item_code, qty in count_qty(items).items():
-        if qty != 0:
-            res[item_code] = qty
+
+def _get_stock_balance_from_ledger() -> dict[tuple[str, str], int]:
+    return {
+        (stock_type, item_code): int(qty)
+        for stock_type, item_code, qty in frappe.db.sql(
+            """
+            SELECT entry.stock_type, item.item_code, SUM(item.qty)
+            FROM `tabStock Entry Item` item
+            JOIN `tabStock Entry` entry ON entry.name = item.parent
+            WHERE entry.docstatus = 1
+            GROUP BY entry.stock_type, item.item_code
+            """
+        )
+    }
+
+
+def check_stock_balance() -> dict[tuple[str, str], tuple[int, int]]:
+    """Compare Stock Balance Bin with submitted Stock Entries.
+
+    Returns mismatches as `{(stock_type, item_code): (bin_qty, ledger_qty)}`.
+    """
+    bins: dict[tuple[str, str], int] = {
+        (stock_type, item_code): qty
+        for stock_type, item_code, qty in frappe.db.sql(
+            "SELECT stock_type, item_code, qty FROM `tabStock Balance Bin`"
+        )
+    }
+    ledger = _get_stock_balance_from_ledger()
+    res: dict[tuple[str, str], tuple[int, int]] = {}
+    for key in bins.keys() | ledger.keys():
+        bin_qty, ledger_qty = bins.get(key, 0), ledger.get(key, 0)
+        if bin_qty != ledger_qty:
+            res[key] = (bin_qty, ledger_qty)
     return res
+
+
+def rebuild_stock_balance() -> None:
+    """Fill Stock Balance Bin from scratch using submitted Stock Entries."""
+    frappe.db.sql("DELETE FROM `tabStock Balance Bin`")
+    counters: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    for (stock_type, item_code), qty in _get_stock_balance_from_ledger().items():
+        counters[stock_type][item_code] = qty
+    for stock_type, counter in counters.items():
+        update_stock_balance(stock_type, counter)  # type: ignore
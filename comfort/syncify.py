@@ -1,88 +1,126 @@
-# From https://gist.github.com/mikeckennedy/033ad92c165a9041fafc5c429e6c3c28
+"""Run coroutines from sync code on a shared background event loop.
+
+Every call is scheduled with `asyncio.run_coroutine_threadsafe`, so the caller
+blocks on a future instead of polling, and all submitted coroutines run on the
+loop concurrently.
+"""
+
+from __future__ import annotations
 
 import asyncio
 import threading
 import time
-import uuid
-from typing import Any, Awaitable, NoReturn, TypeVar
+from concurrent.futures import Future
+from typing import Awaitable, TypedDict, TypeVar
 
 import uvloop
 
 uvloop.install()
 
-_add_lock = threading.Lock()
-_receive_lock = threading.Lock()
+T = TypeVar("T")
 
-_pending_items: dict[uuid.UUID, Awaitable[Any]] = {}
-_finished_items: dict[uuid.UUID, Any] = {}
 
-T = TypeVar("T")
+class SyncifyStats(TypedDict):
+    queued: int  # Submitted but not yet started by the loop
+    in_flight: int  # Running on the loop right now
+    calls: int
+    errors: int
+    total_latency: float  # Seconds from submit to result, summed over finished calls
+    max_latency: float
+    last_latency: float
 
 
-def _add_work(aw: Awaitable[Any]) -> uuid.UUID:
-    id = uuid.uuid4()
+def _empty_stats() -> SyncifyStats:
+    return SyncifyStats(
+        queued=0,
+        in_flight=0,
+        calls=0,
+        errors=0,
+        total_latency=0.0,
+        max_latency=0.0,
+        last_latency=0.0,
+    )
 
-    with _add_lock:
-        _pending_items[id] = aw
 
-    return id
+_stats_lock = threading.Lock()
+_stats = _empty_stats()
 
 
-def _is_done(item_id: uuid.UUID) -> bool:
-    with _receive_lock:
-        return item_id in _finished_items
+def get_stats() -> SyncifyStats:
+    """Get snapshot of bridge counters. Mean latency is `total_latency / calls`."""
+    with _stats_lock:
+        return _stats.copy()
 
 
-def _get_result(id: uuid.UUID) -> Any:
-    with _receive_lock:
-        result = _finished_items[id]
-        del _finished_items[id]
+def reset_stats() -> None:
+    """Reset cumulative counters. Gauges (`queued`, `in_flight`) are kept."""
+    with _stats_lock:
+        queued, in_flight = _stats["queued"], _stats["in_flight"]
+        _stats.update(_empty_stats())
+        _stats["queued"], _stats["in_flight"] = queued, in_flight
 
-    return result
 
+def _on_start() -> None:
+    with _stats_lock:
+        _stats["queued"] -= 1
+        _stats["in_flight"] += 1
 
-def run(aw: Awaitable[T]) -> T:
-    id = _add_work(aw)
-    while not _is_done(id):
-        time.sleep(0.0005)
-        continue
 
-    result = _get_result(id)
-    if isinstance(result, Exception):
-        raise result
+def _on_finish(submitted_at: float, failed: bool) -> None:
+    latency = time.perf_counter() - submitted_at
+    with _stats_lock:
+        _stats["in_flight"] -= 1
+        _stats["calls"] += 1
+        _stats["errors"] += int(failed)
+        _stats["total_latency"] += latency
+        _stats["last_latency"] = latency
+        _stats["max_latency"] = max(_stats["max_latency"], latency)
 
-    return result
 
+async def _tracked(aw: Awaitable[T], submitted_at: float) -> T:
+    _on_start()
+    failed = True
+    try:
+        res = await aw
+        failed = False
+        return res
+    finally:
+        _on_finish(submitted_at, failed)
+
+
+def submit(aw: Awaitable[T]) -> Future[T]:
+    """Schedule awaitable on the background loop without waiting for result."""
+    with _stats_lock:
+        _stats["queued"] += 1
+    return asyncio.run_coroutine_threadsafe(_tracked(aw, time.perf_counter()), _loop)
+
+
+def run(aw: Awaitable[T]) -> T:
+    """Run awaitable on the background loop and block until it is done."""
+    if threading.current_thread() is _thread:
+        raise RuntimeError("Can't call syncify.run() from the event loop thread")
+    return submit(aw).result()
 
-def run_worker() -> NoReturn:
-    loop = uvloop.new_event_loop()
 
-    while True:
-        with _add_lock:
-            count = len(_pending_items)
+async def gather(*aws: Awaitable[T], limit: int | None = None) -> list[T]:
+    """Like `asyncio.gather()`, but runs not more than `limit` awaitables at once."""
+    if not limit:
+        return list(await asyncio.gather(*aws))
 
-        if count == 0:
-            time.sleep(0.001)
-            continue
+    semaphore = asyncio.Semaphore(limit)
 
-        with _add_lock:
-            work = list(_pending_items.items())
-            for id, _ in work:
-                del _pending_items[id]
+    async def acquire(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
 
-        running = {k: loop.create_task(w) for k, w in work}
+    return list(await asyncio.gather(*(acquire(aw) for aw in aws)))
 
-        for id, task in running.items():
-            try:
-                loop.run_until_complete(asyncio.wait((task,)))
-                result = task.result()
 
-                with _receive_lock:
-                    _finished_items[id] = result
-            except Exception as x:
-                with _receive_lock:
-                    _finished_items[id] = x
+def _run_loop() -> None:
+    asyncio.set_event_loop(_loop)
+    _loop.run_forever()
 
 
-_thread = threading.Thread(target=run_worker, daemon=True)
+_loop = uvloop.new_event_loop()
+_thread = threading.Thread(target=_run_loop, name="syncify", daemon=True)
 _thread.start()
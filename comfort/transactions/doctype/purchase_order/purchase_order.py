@@ -8,6 +8,7 @@ from typing import Any, Literal
 
 import frappe
 from comfort.entities import ChildItem
+from comfort.entities.doctype.item_component.item_component import get_components
 from comfort.finance.utils import create_payment
 from comfort.integrations.ikea import (
     PurchaseInfoDict,
@@ -25,7 +26,10 @@ from comfort.transactions.doctype.purchase_order_item_to_sell.purchase_order_ite
 from comfort.transactions.doctype.purchase_order_sales_order.purchase_order_sales_order import (
     PurchaseOrderSalesOrder,
 )
-from comfort.transactions.doctype.sales_order.sales_order import SalesOrder
+from comfort.transactions.doctype.sales_order.sales_order import (
+    SalesOrder,
+    preload_sales_order_status_facts,
+)
 from comfort.transactions.doctype.sales_order_child_item.sales_order_child_item import (
     SalesOrderChildItem,
 )
@@ -43,8 +47,9 @@ from comfort.utils import (
     _,
     count_qty,
     get_all,
-    get_cached_value,
     get_doc,
+    get_item_values,
+    get_readonly_doc,
     get_value,
     group_by_attr,
     maybe_json,
@@ -165,11 +170,11 @@ class PurchaseOrder(TypedDocument):
                 order.customer, order.total_amount = order_values
 
     def update_items_to_sell_from_db(self) -> None:
+        item_values = get_item_values(
+            (i.item_code for i in self.items_to_sell), strict=True
+        )
         for item in self.items_to_sell:
-            item_values: tuple[str, int, float] = get_value(
-                "Item", item.item_code, ("item_name", "rate", "weight")
-            )
-            item.item_name, item.rate, item.weight = item_values
+            item.item_name, item.rate, item.weight = item_values[item.item_code]
             item.amount = item.qty * item.rate
 
     def _clear_no_copy_fields_for_amended(self) -> None:
@@ -257,20 +262,8 @@ class PurchaseOrder(TypedDocument):
             res += self.items_to_sell
             return res
 
-        child_items = get_all(
-            ChildItem,
-            field=("parent", "item_code", "qty"),
-            filter={"parent": ("in", (i.item_code for i in self.items_to_sell))},
-        )
-
-        # If item to sell has child items, they are accounted wrong.
-        # now: {'39331867': 4} => {'30469171': 1, '10406797': 1}
-        # should be: {'39331867': 4} => {'30469171': 4, '10406797': 4}
-        parent_counter = count_qty(self.items_to_sell)
-        for child in child_items:
-            child.qty = child.qty * parent_counter[child.parent]
-
-        parents = {child.parent for child in child_items}
+        child_items = get_components(self.items_to_sell)
+        parents = {child.parent_item_code for child in child_items}
         items_to_sell = (i for i in self.items_to_sell if i.item_code not in parents)
 
         res += items_to_sell
@@ -334,11 +327,10 @@ class PurchaseOrder(TypedDocument):
         self.save_without_validating()
 
     def _submit_sales_orders_and_update_statuses(self) -> None:
-        for o in self.sales_orders:
-            doc = get_doc(SalesOrder, o.sales_order_name)
-            if doc.docstatus == 2:
-                continue
-            doc.set_statuses()
+        docs = [get_doc(SalesOrder, o.sales_order_name) for o in self.sales_orders]
+        docs = [doc for doc in docs if doc.docstatus != 2]
+        preload_sales_order_status_facts(docs)
+        for doc in docs:
             doc.flags.ignore_validate_update_after_submit = True
             doc.submit()
 
@@ -395,7 +387,7 @@ class PurchaseOrder(TypedDocument):
     ):  # pragma: no cover
         all_items: list[Any] = []
         for order in self.sales_orders:
-            doc = get_doc(SalesOrder, order.sales_order_name)
+            doc = get_readonly_doc(SalesOrder, order.sales_order_name)
             all_items += doc.get_items_with_splitted_combinations()
         items_to_sell = self.get_items_to_sell(split_combinations=True)
         for item in items_to_sell:
@@ -408,13 +400,12 @@ class PurchaseOrder(TypedDocument):
         )
         grouped_items = group_by_attr(i for i in all_items if i.item_code in counter)
 
+        item_values = get_item_values(grouped_items, strict=True)
         res: list[dict[str, str | int | None]] = []
         for cur_items in grouped_items.values():
             for idx, item in enumerate(cur_items):
                 if item.item_name is None:
-                    item.item_name = get_cached_value(
-                        "Item", item.item_code, "item_name"
-                    )
+                    item.item_name = item_values[item.item_code].item_name
                 res.append(
                     {
                         "item_code": item.item_code if idx == 0 else None,
@@ -3,7 +3,6 @@ from __future__ import annotations
 from collections import defaultdict
 from typing import Literal
 
-from comfort.entities import Item
 from comfort.finance.utils import cancel_gl_entries_for, create_gl_entry, get_account
 from comfort.stock.utils import cancel_stock_entries_for, create_stock_entry
 from comfort.transactions.doctype.purchase_order.purchase_order import PurchaseOrder
@@ -27,6 +26,8 @@ from comfort.utils import (
     count_qty,
     get_all,
     get_doc,
+    get_item_values,
+    get_readonly_doc,
     group_by_attr,
     new_doc,
 )
@@ -63,7 +64,7 @@ class PurchaseReturn(Return):
         # Using this way instead of _get_items_in_sales_orders(True)
         # to have `parent` and `doctype` fields in these items
         for sales_order in self._voucher.sales_orders:
-            doc = get_doc(SalesOrder, sales_order.sales_order_name)
+            doc = get_readonly_doc(SalesOrder, sales_order.sales_order_name)
             if doc.docstatus == 2:
                 continue
             items += doc.get_items_with_splitted_combinations()
@@ -137,18 +138,13 @@ class PurchaseReturn(Return):
             ):
                 return True
 
-        items_with_missing_fields = get_all(
-            Item,
-            field=("item_code", "item_name", "rate", "weight"),
-            filter={"item_code": ("in", (i.item_code for i in items if include(i)))},
-        )
-        grouped_items = group_by_attr(items_with_missing_fields)
+        item_values = get_item_values(i.item_code for i in items if include(i))
         for item in items:
-            if item.item_code in grouped_items:
-                grouped_item = grouped_items[item.item_code][0]
-                item.item_name = grouped_item.item_name
-                item.rate = grouped_item.rate  # type: ignore
-                item.weight = grouped_item.weight  # type: ignore
+            if item.item_code in item_values:
+                values = item_values[item.item_code]
+                item.item_name = values.item_name
+                item.rate = values.rate  # type: ignore
+                item.weight = values.weight  # type: ignore
             item.amount = item.qty * item.rate  # type: ignore
 
     def _split_combinations_in_voucher(self) -> None:
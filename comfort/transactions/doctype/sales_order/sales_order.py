@@ -5,18 +5,23 @@ import re
 from collections import Counter
 from datetime import datetime, timedelta
 from types import SimpleNamespace
-from typing import Any, Literal, TypedDict
+from typing import Any, Iterable, Literal, NamedTuple, TypedDict
 
 from ikea_api.wrappers.types import DeliveryService
 
 import frappe
 from comfort.comfort_core import CommissionSettings
-from comfort.entities import ChildItem, Item
+from comfort.entities.doctype.item_component.item_component import get_components
 from comfort.finance import Payment
 from comfort.finance.utils import create_payment, get_account
 from comfort.integrations.ikea import fetch_items, get_delivery_services
 from comfort.stock import Receipt
-from comfort.stock.utils import create_receipt, create_stock_entry, get_stock_balance
+from comfort.stock.utils import (
+    StockEntrySpec,
+    create_receipt,
+    create_stock_entries,
+    get_stock_balance,
+)
 from comfort.transactions.doctype.purchase_order_item_to_sell.purchase_order_item_to_sell import (
     PurchaseOrderItemToSell,
 )
@@ -41,8 +46,8 @@ from comfort.utils import (
     counters_are_same,
     doc_exists,
     get_all,
-    get_cached_doc,
     get_doc,
+    get_item_values,
     get_value,
     group_by_attr,
     new_doc,
@@ -165,12 +170,13 @@ class SalesOrder(TypedDocument):
     def update_items_from_db(self) -> None:
         """Load item properties from cache or database and calculate Amount and Total Weight."""
 
+        item_values = get_item_values((i.item_code for i in self.items), strict=True)
         for item in self.items:
-            doc = get_cached_doc(Item, item.item_code)
-            item.item_name = doc.item_name
+            values = item_values[item.item_code]
+            item.item_name = values.item_name
             if not (self.from_available_stock and item.rate):
-                item.rate = doc.rate
-            item.weight = doc.weight
+                item.rate = values.rate
+            item.weight = values.weight
 
             item.amount = item.rate * item.qty
             item.total_weight = item.weight * item.qty
@@ -182,17 +188,7 @@ class SalesOrder(TypedDocument):
         if not self.items:
             return
 
-        child_items = get_all(
-            ChildItem,
-            field=("parent as parent_item_code", "item_code", "item_name", "qty"),
-            filter={"parent": ("in", (i.item_code for i in self.items))},
-        )
-
-        item_codes_to_qty = count_qty(self.items)
-        for item in child_items:
-            item.qty = item.qty * item_codes_to_qty[item.parent_item_code]  # type: ignore
-
-        self.extend("child_items", child_items)
+        self.extend("child_items", get_components(self.items))
 
     def _validate_from_available_stock(self):
         if not self.from_available_stock:
@@ -370,35 +366,19 @@ class SalesOrder(TypedDocument):
         )
         items = self.get_items_with_splitted_combinations()
 
-        create_stock_entry(
-            ref_doctype, ref_name, stock_types[0], items, reverse_qty=True  # type: ignore
-        )
-        create_stock_entry(ref_doctype, ref_name, stock_types[1], items)  # type: ignore
+        specs: list[StockEntrySpec] = [
+            (stock_types[0], items, True),  # type: ignore
+            (stock_types[1], items, False),  # type: ignore
+        ]
+        create_stock_entries(ref_doctype, ref_name, specs)  # type: ignore
 
     def _get_paid_amount(self):
-        payments = get_all(
-            Payment,
-            pluck="name",
-            filter={"voucher_type": self.doctype, "voucher_no": self.name},
-        )
-        returns: list[Any] = frappe.get_all(
-            "Sales Return", filters={"sales_order": self.name}, pluck="name"
-        )
-        balances: list[tuple[int]] = frappe.get_all(
-            "GL Entry",
-            fields="SUM(debit - credit) as balance",
-            filters={
-                "account": ("in", (get_account("cash"), get_account("bank"))),
-                "voucher_type": ("in", ("Payment", "Sales Return")),
-                "voucher_no": ("in", payments + returns),
-                "docstatus": ("!=", 2),
-            },
-            as_list=True,
-        )
-        return sum(b[0] or 0 for b in balances)
+        return _get_paid_amounts([self.name]).get(self.name, 0)
 
-    def set_paid_and_pending_per_amount(self) -> None:
-        self.paid_amount = self._get_paid_amount()
+    def set_paid_and_pending_per_amount(self, paid_amount: int | None = None) -> None:
+        self.paid_amount = (
+            self._get_paid_amount() if paid_amount is None else paid_amount
+        )
 
         if self.total_amount == 0:
             self.per_paid = 100
@@ -421,38 +401,26 @@ class SalesOrder(TypedDocument):
 
         self.payment_status = status
 
-    def _set_delivery_status(self) -> None:
+    def _set_delivery_status(self, facts: _DeliveryFacts | None = None) -> None:
+        if facts is None:
+            facts = _get_delivery_facts([self.name])[self.name]
+
         if self.docstatus == 2:
             status = ""
-        elif doc_exists(
-            "Receipt",
-            {"voucher_type": self.doctype, "voucher_no": self.name, "docstatus": 1},
-        ):
+        elif facts.delivered:
             status = "Delivered"
         elif self.from_available_stock == "Available Actual":
             if self.docstatus == 0:
                 status = "To Purchase"
             else:
                 status = "To Deliver"
-        else:
-            if purchase_order_name := get_value(
-                "Purchase Order Sales Order",
-                fieldname="parent",
-                filters={"sales_order_name": self.name, "docstatus": 1},
-            ):
-                if doc_exists(
-                    "Receipt",
-                    {
-                        "voucher_type": "Purchase Order",
-                        "voucher_no": purchase_order_name,
-                        "docstatus": 1,
-                    },
-                ):
-                    status = "To Deliver"
-                else:
-                    status = "Purchased"
+        elif facts.in_purchase_order:
+            if facts.purchase_received:
+                status = "To Deliver"
             else:
-                status = "To Purchase"
+                status = "Purchased"
+        else:
+            status = "To Purchase"
 
         self.delivery_status = status
 
@@ -471,10 +439,20 @@ class SalesOrder(TypedDocument):
         self.status = status
 
     def set_statuses(self) -> None:
-        """Set statuses according to current Sales Order and linked Purchase Order states."""
-        self.set_paid_and_pending_per_amount()
+        """Set statuses according to current Sales Order and linked Purchase Order states.
+
+        Facts loaded with `preload_sales_order_status_facts()` are used once instead of queries.
+        """
+        facts: _StatusFacts | None = self.flags.pop("status_facts", None)
+        if facts is None:
+            set_sales_order_statuses([self])
+        else:
+            self._set_statuses_from_facts(facts)
+
+    def _set_statuses_from_facts(self, facts: _StatusFacts) -> None:
+        self.set_paid_and_pending_per_amount(facts.paid_amount)
         self._set_payment_status()
-        self._set_delivery_status()
+        self._set_delivery_status(facts.delivery)
         self._set_document_status()
 
     @frappe.whitelist()
@@ -488,15 +466,17 @@ class SalesOrder(TypedDocument):
         self.save_without_validating()
 
     @frappe.whitelist()
-    def add_receipt(self):
+    def add_receipt(self, save: bool = True):
+        """Create Receipt. If `save` is not set, statuses should be updated by caller."""
         if self.delivery_status != "To Deliver":
             raise ValidationError(
                 _("Delivery Status Sales Order should be To Deliver to add Receipt")
             )
 
         create_receipt(self.doctype, self.name)
-        self.set_statuses()
-        self.save_without_validating()
+        if save:
+            self.set_statuses()
+            self.save_without_validating()
 
     @frappe.whitelist()
     def split_combinations(self, combos_docnames: list[str], save: bool) -> None:
@@ -514,22 +494,8 @@ class SalesOrder(TypedDocument):
         for item in items_to_remove:
             self.items.remove(item)
 
-        parent_item_codes_to_qty = count_qty(removed_combos)
-
-        child_items = get_all(
-            ChildItem,
-            field=("parent", "item_code", "qty"),
-            filter={"parent": ("in", parent_item_codes_to_qty.keys())},
-        )
-
-        for parent_item_code, items in group_by_attr(child_items, "parent").items():
-            parent_item_code: str
-            items: list[ChildItem]
-            parent_qty = parent_item_codes_to_qty[parent_item_code]
-            for item in items:
-                self.append(
-                    "items", {"item_code": item.item_code, "qty": item.qty * parent_qty}
-                )
+        for item in get_components(removed_combos):
+            self.append("items", {"item_code": item.item_code, "qty": item.qty})
 
         if save:
             self.save()
@@ -724,6 +690,112 @@ class SalesOrder(TypedDocument):
         return doc.name
 
 
+class _DeliveryFacts(NamedTuple):
+    delivered: bool  # Has submitted Receipt
+    in_purchase_order: bool  # Is in submitted Purchase Order
+    purchase_received: bool  # That Purchase Order has submitted Receipt
+
+
+def _get_paid_amounts(names: Iterable[str]) -> dict[str, int]:
+    """Get sum of cash and bank GL Entries by Sales Order with one indexed query.
+
+    Payment and Sales Return link these entries to Sales Order when posting them."""
+    rows: list[tuple[str, int]] = frappe.db.sql(
+        """
+        SELECT sales_order, SUM(debit - credit)
+        FROM `tabGL Entry`
+        WHERE sales_order IN %(names)s
+            AND account IN %(accounts)s
+            AND docstatus != 2
+        GROUP BY sales_order
+        """,
+        values={
+            "names": tuple(names),
+            "accounts": (get_account("cash"), get_account("bank")),
+        },
+    )
+    return {name: amount or 0 for name, amount in rows}
+
+
+def _get_delivery_facts(names: Iterable[str]) -> dict[str, _DeliveryFacts]:
+    """Get facts that Delivery Status depends on by Sales Order with two queries."""
+    names = tuple(names)
+    delivered: list[str] = frappe.db.sql_list(
+        """
+        SELECT DISTINCT voucher_no FROM `tabReceipt`
+        WHERE voucher_type = 'Sales Order' AND voucher_no IN %(names)s
+            AND docstatus = 1
+        """,
+        values={"names": names},
+    )
+    purchase_received: dict[str, int] = dict(
+        frappe.db.sql(
+            """
+            SELECT po_sales_order.sales_order_name, MAX(receipt.name IS NOT NULL)
+            FROM `tabPurchase Order Sales Order` AS po_sales_order
+            LEFT JOIN `tabReceipt` AS receipt
+                ON receipt.voucher_type = 'Purchase Order'
+                AND receipt.voucher_no = po_sales_order.parent
+                AND receipt.docstatus = 1
+            WHERE po_sales_order.sales_order_name IN %(names)s
+                AND po_sales_order.docstatus = 1
+            GROUP BY po_sales_order.sales_order_name
+            """,
+            values={"names": names},
+        )
+    )
+    return {
+        name: _DeliveryFacts(
+            delivered=name in delivered,
+            in_purchase_order=name in purchase_received,
+            purchase_received=bool(purchase_received.get(name)),
+        )
+        for name in names
+    }
+
+
+class _StatusFacts(NamedTuple):
+    paid_amount: int
+    delivery: _DeliveryFacts
+
+
+def _get_status_facts(names: list[str]) -> dict[str, _StatusFacts]:
+    paid_amounts = _get_paid_amounts(names)
+    delivery_facts = _get_delivery_facts(names)
+    return {
+        name: _StatusFacts(paid_amounts.get(name, 0), delivery_facts[name])
+        for name in names
+    }
+
+
+def set_sales_order_statuses(docs: Iterable[SalesOrder]) -> None:
+    """Set statuses of Sales Orders with three queries no matter how many orders there are.
+
+    Documents are not saved.
+    """
+    docs = list(docs)
+    if not docs:
+        return
+
+    facts = _get_status_facts([doc.name for doc in docs])
+    for doc in docs:
+        doc._set_statuses_from_facts(facts[doc.name])
+
+
+def preload_sales_order_status_facts(docs: Iterable[SalesOrder]) -> None:
+    """Load facts that statuses depend on with three queries no matter how many orders there are.
+
+    Next `set_statuses()` of every document (for example, on submit) uses them instead of queries.
+    """
+    docs = list(docs)
+    if not docs:
+        return
+
+    facts = _get_status_facts([doc.name for doc in docs])
+    for doc in docs:
+        doc.flags.status_facts = facts[doc.name]
+
+
 @frappe.whitelist()
 def has_linked_delivery_trip(sales_order_name: str):
     name: Any = doc_exists(
@@ -3,9 +3,13 @@ from __future__ import annotations
 from copy import copy
 from typing import Literal
 
-from comfort.entities import Item
-from comfort.finance.utils import cancel_gl_entries_for, create_gl_entry, get_account
-from comfort.stock.utils import cancel_stock_entries_for, create_stock_entry
+from comfort.finance.utils import (
+    cancel_gl_entries_for,
+    create_gl_entries,
+    create_gl_entry,
+    get_account,
+)
+from comfort.stock.utils import cancel_stock_entries_for, create_stock_entries
 from comfort.transactions.doctype.purchase_order_item_to_sell.purchase_order_item_to_sell import (
     PurchaseOrderItemToSell,
 )
@@ -19,10 +23,9 @@ from comfort.utils import (
     ValidationError,
     _,
     count_qty,
-    get_all,
     get_doc,
+    get_item_values,
     get_value,
-    group_by_attr,
 )
 
 
@@ -103,12 +106,13 @@ class SalesReturn(Return):
             )
 
     def _add_missing_info_to_items_in_voucher(self) -> None:
+        item_values = get_item_values(
+            (i.item_code for i in self._voucher.items if not i.rate or not i.weight),
+            strict=True,
+        )
         for item in self._voucher.items:
             if not item.rate or not item.weight:
-                item_values: tuple[str, int, float] = get_value(
-                    "Item", item.item_code, ("item_name", "rate", "weight")
-                )
-                item.item_name, item.rate, item.weight = item_values
+                item.item_name, item.rate, item.weight = item_values[item.item_code]
 
                 item.amount = item.qty * item.rate
                 item.total_weight = item.qty * item.weight
@@ -133,15 +137,10 @@ class SalesReturn(Return):
     def _add_missing_info_to_items_in_items_to_sell(
         self, items: list[PurchaseOrderItemToSell]
     ) -> None:
-        items_with_weight = get_all(
-            Item,
-            field=("item_code", "weight"),
-            filter={"item_code": ("in", (i.item_code for i in items if not i.weight))},
-        )
-        grouped_items = group_by_attr(items_with_weight)
+        item_values = get_item_values(i.item_code for i in items if not i.weight)
         for item in items:
-            if item.item_code in grouped_items:
-                item.weight = grouped_items[item.item_code][0].weight
+            if item.item_code in item_values:
+                item.weight = item_values[item.item_code].weight
             item.amount = item.rate * item.qty
 
     def _add_items_to_sell_to_linked_purchase_order(self) -> None:
@@ -214,10 +213,11 @@ class SalesReturn(Return):
             "Delivered": ("Reserved Actual", "Available Actual"),
         }[self._voucher.delivery_status]
 
-        create_stock_entry(
-            self.doctype, self.name, stock_types[0], self.items, reverse_qty=True
+        create_stock_entries(
+            self.doctype,
+            self.name,
+            [(stock_types[0], self.items, True), (stock_types[1], self.items, False)],
         )
-        create_stock_entry(self.doctype, self.name, stock_types[1], self.items)
 
     def _make_payment_gl_entries(self) -> None:
         """Return `returned_paid_amount` from "Cash" or "Bank" to "Prepaid Sales".
@@ -232,8 +232,11 @@ class SalesReturn(Return):
         )
         amt = self.returned_paid_amount
         asset_account = "cash" if paid_with_cash else "bank"
-        create_gl_entry(self.doctype, self.name, get_account(asset_account), 0, amt)
-        create_gl_entry(self.doctype, self.name, get_account("prepaid_sales"), amt, 0)
+        specs = [
+            (get_account(asset_account), 0, amt),
+            (get_account("prepaid_sales"), amt, 0),
+        ]
+        create_gl_entries(self.doctype, self.name, specs, sales_order=self.sales_order)
 
     def before_submit(self) -> None:
         self._modify_voucher()
@@ -5,7 +5,6 @@ from types import SimpleNamespace
 from typing import Any, Callable, TypedDict
 
 import frappe
-from comfort.entities import Item
 from comfort.transactions.doctype.purchase_return_item.purchase_return_item import (
     PurchaseReturnItem,
 )
@@ -18,7 +17,7 @@ from comfort.utils import (
     ValidationError,
     _,
     count_qty,
-    get_all,
+    get_item_values,
     group_by_attr,
 )
 
@@ -69,19 +68,13 @@ class Return(TypedDocument):
         return (item for item in in_voucher.items() if item[1] > 0)
 
     def _add_missing_fields_to_items(self, items: list[Any]) -> None:
-        items_with_missing_fields = get_all(
-            Item,
-            field=("item_code", "item_name", "rate"),
-            filter={
-                "item_code": ("in", (i.item_code for i in items if not i.get("rate")))
-            },
+        item_values = get_item_values(
+            (i.item_code for i in items if not i.get("rate")), strict=True
         )
-        grouped_items = group_by_attr(items_with_missing_fields)
-
         for item in items:
             if not item.get("rate"):
-                item.item_name = grouped_items[item.item_code][0].item_name
-                item.rate = grouped_items[item.item_code][0].rate
+                item.item_name = item_values[item.item_code].item_name
+                item.rate = item_values[item.item_code].rate
 
     @frappe.whitelist()
     def get_items_available_to_add(self):
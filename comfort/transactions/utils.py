@@ -1,5 +1,8 @@
-from typing import TypeVar, Union
+from __future__ import annotations
 
+from typing import Any, Iterable, TypeVar, Union
+
+import frappe
 from comfort.entities.doctype.child_item.child_item import ChildItem
 from comfort.transactions.doctype.purchase_order_item_to_sell.purchase_order_item_to_sell import (
     PurchaseOrderItemToSell,
@@ -10,7 +13,7 @@ from comfort.transactions.doctype.sales_order_child_item.sales_order_child_item
 from comfort.transactions.doctype.sales_order_item.sales_order_item import (
     SalesOrderItem,
 )
-from comfort.utils import count_qty, group_by_attr
+from comfort.utils import bulk_update, count_qty, get_all, group_by_attr
 
 AnyChildItem = Union[
     SalesOrderItem, SalesOrderChildItem, ChildItem, PurchaseOrderItemToSell
@@ -38,3 +41,161 @@ def merge_same_items(items: list[_T]) -> list[_T]:
         cur_items[0].qty = counter[item_code]
         new_items.append(cur_items[0])
     return new_items
+
+
+SALES_ORDER_STATUS_FIELDS = (
+    "paid_amount",
+    "per_paid",
+    "pending_amount",
+    "payment_status",
+    "delivery_status",
+    "status",
+)
+PURCHASE_ORDER_TOTAL_FIELDS = (
+    "items_to_sell_cost",
+    "sales_orders_cost",
+    "total_amount",
+    "total_weight",
+    "total_margin",
+)
+
+# Document name -> field -> (old value, new value)
+Changes = dict[str, dict[str, tuple[Any, Any]]]
+
+
+def _is_changed(old: Any, new: Any) -> bool:
+    if isinstance(new, float) or isinstance(old, float):
+        return abs((old or 0) - (new or 0)) > 1e-6
+    return (old or None) != (new or None)
+
+
+def _get_changes(
+    old_values: dict[str, Any], new_values: dict[str, Any], fields: Iterable[str]
+) -> dict[str, tuple[Any, Any]]:
+    return {
+        field: (old_values[field], new_values[field])
+        for field in fields
+        if _is_changed(old_values[field], new_values[field])
+    }
+
+
+def _write_changes(doctype: str, changes: Changes) -> None:
+    bulk_update(
+        doctype,
+        {
+            name: {field: new for field, (_, new) in fields.items()}
+            for name, fields in changes.items()
+        },
+    )
+
+
+def recompute_sales_order_statuses(names: list[str], write: bool = True) -> Changes:
+    """Recalculate payment, delivery and document status of Sales Orders with fixed number of queries.
+
+    Only changed fields are written, documents are not loaded. Cancelled
+    documents are skipped. Returns changes.
+    """
+    from comfort.transactions import SalesOrder
+    from comfort.transactions.doctype.sales_order.sales_order import (
+        set_sales_order_statuses,
+    )
+
+    rows = get_all(
+        SalesOrder,
+        field=(
+            "name",
+            "docstatus",
+            "total_amount",
+            "from_available_stock",
+            *SALES_ORDER_STATUS_FIELDS,
+        ),
+        filter={"name": ("in", names), "docstatus": ("!=", 2)},
+    )
+    docs = [SalesOrder({**row, "doctype": "Sales Order"}) for row in rows]
+    set_sales_order_statuses(docs)
+
+    changes: Changes = {}
+    for row, doc in zip(rows, docs):
+        new_values = {f: doc.get(f) for f in SALES_ORDER_STATUS_FIELDS}
+        if doc_changes := _get_changes(row, new_values, SALES_ORDER_STATUS_FIELDS):
+            changes[doc.name] = doc_changes
+
+    if write:
+        _write_changes("Sales Order", changes)
+    return changes
+
+
+def recompute_purchase_order_totals(names: list[str], write: bool = True) -> Changes:
+    """Recalculate costs, weight and margin of Purchase Orders with four queries.
+
+    Same as `PurchaseOrder.calculate()`, but for many documents at once.
+    Only changed fields are written, documents are not loaded. Cancelled
+    documents are skipped. Returns changes.
+    """
+    from comfort.transactions import PurchaseOrder
+
+    values = {"names": tuple(names)}
+    rows = get_all(
+        PurchaseOrder,
+        field=("name", "delivery_cost", *PURCHASE_ORDER_TOTAL_FIELDS),
+        filter={"name": ("in", names), "docstatus": ("!=", 2)},
+    )
+    sales_orders: dict[str, tuple[int, float, int]] = {
+        name: (cost, weight, margin)
+        for name, cost, weight, margin in frappe.db.sql(
+            """
+            SELECT po_sales_order.parent,
+                SUM(items.cost), SUM(items.total_weight), SUM(sales_order.margin)
+            FROM (
+                SELECT DISTINCT parent, sales_order_name
+                FROM `tabPurchase Order Sales Order`
+                WHERE parent IN %(names)s
+            ) AS po_sales_order
+            JOIN `tabSales Order` AS sales_order
+                ON sales_order.name = po_sales_order.sales_order_name
+            LEFT JOIN (
+                SELECT parent, SUM(qty * rate) AS cost, SUM(total_weight) AS total_weight
+                FROM `tabSales Order Item`
+                WHERE docstatus != 2
+                GROUP BY parent
+            ) AS items ON items.parent = sales_order.name
+            WHERE sales_order.docstatus != 2
+            GROUP BY po_sales_order.parent
+            """,
+            values=values,
+        )
+    }
+    items_to_sell: dict[str, tuple[int, float]] = {
+        name: (cost, weight)
+        for name, cost, weight in frappe.db.sql(
+            """
+            SELECT parent, SUM(amount), SUM(weight * qty)
+            FROM `tabPurchase Order Item To Sell`
+            WHERE parent IN %(names)s
+            GROUP BY parent
+            """,
+            values=values,
+        )
+    }
+
+    changes: Changes = {}
+    for row in rows:
+        so_cost, so_weight, margin = sales_orders.get(row.name, (0, 0.0, 0))
+        its_cost, its_weight = items_to_sell.get(row.name, (0, 0.0))
+        new_values = {
+            "items_to_sell_cost": its_cost or 0,
+            "sales_orders_cost": so_cost or 0,
+            "total_weight": (so_weight or 0.0) + (its_weight or 0.0),
+            "total_margin": margin or 0,
+        }
+        new_values["total_amount"] = (
+            new_values["sales_orders_cost"]
+            + new_values["items_to_sell_cost"]
+            + (row.delivery_cost or 0)
+        )
+        if doc_changes := _get_changes(row, new_values, PURCHASE_ORDER_TOTAL_FIELDS):
+            changes[row.name] = doc_changes
+
+    if write:
+        _write_changes("Purchase Order", changes)
+    return changes
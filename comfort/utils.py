@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import json
 from collections import Counter, defaultdict
-from typing import Any, Iterable, TypeVar, cast, overload
+from functools import partial
+from typing import Any, Callable, Iterable, NamedTuple, TypeVar, cast, overload
+
+import redis.exceptions
 
 import frappe
 import frappe.auth
@@ -148,6 +151,58 @@ def _resolve_doctype_from_class(cls: type[Document]):
     return doctype
 
 
+def _get_local_map(attr: str) -> dict[Any, Any]:
+    if not hasattr(frappe.local, attr):
+        setattr(frappe.local, attr, {})
+    return getattr(frappe.local, attr)
+
+
+def _get_documents() -> dict[tuple[str, str], Document]:
+    """Documents loaded with `get_readonly_doc()` during current request or job."""
+    return _get_local_map("comfort_documents")
+
+
+def _get_values() -> dict[tuple[str, str], dict[Any, Any]]:
+    """Values loaded with `get_value()` during current request or job, by document."""
+    return _get_local_map("comfort_values")
+
+
+def _get_after_commit_callbacks() -> list[Callable[[], Any]]:
+    if not hasattr(frappe.local, "comfort_after_commit"):
+        frappe.local.comfort_after_commit = []
+    return frappe.local.comfort_after_commit
+
+
+def after_commit(func: Callable[[], Any]) -> None:
+    """Run `func` after current transaction is committed. It is dropped on rollback.
+
+    For writes to Redis that other workers should see only once data is committed.
+    Same function is run once per transaction however many times it is added.
+    """
+    callbacks = _get_after_commit_callbacks()
+    if func not in callbacks:
+        callbacks.append(func)
+
+
+def is_after_commit_pending(func: Callable[[], Any]) -> bool:
+    """Check if `func` is going to run after current transaction is committed."""
+    return func in _get_after_commit_callbacks()
+
+
+def _run_after_commit() -> None:
+    callbacks = _get_after_commit_callbacks()
+    funcs = callbacks.copy()
+    callbacks.clear()
+    for func in funcs:
+        func()
+
+
+def clear_identity_map() -> None:
+    """Forget loaded documents and values. Called on every write to database."""
+    _get_documents().clear()
+    _get_values().clear()
+
+
 def get_doc(cls: type[_T_doc], *args: Any, **kwargs: Any) -> _T_doc:
     doctype = _resolve_doctype_from_class(cls)
     if args and isinstance(args[0], dict):
@@ -158,6 +213,20 @@ def get_doc(cls: type[_T_doc], *args: Any, **kwargs: Any) -> _T_doc:
     return frappe.get_doc(doctype, *args, **kwargs)  # type: ignore
 
 
+def get_readonly_doc(cls: type[_T_doc], name: str) -> _T_doc:
+    """Load document that is not going to be changed.
+
+    Same instance is returned during request or job until anything is written
+    to database, so callers should not modify it. Use `get_doc()` to change document.
+    """
+    doctype = _resolve_doctype_from_class(cls)
+    documents = _get_documents()
+    key = (doctype, name)
+    if key not in documents:
+        documents[key] = frappe.get_doc(doctype, name)
+    return documents[key]  # type: ignore
+
+
 @overload
 def get_all(
     cls: type[_T_doc],
@@ -166,6 +235,7 @@ def get_all(
     field: str | tuple[str, ...] | None = None,
     filter: dict[str, Any] | tuple[tuple[Any, ...], ...] | None = None,
     limit: int | None = None,
+    start: int = 0,
     order_by: str | None = None,
 ) -> list[_T_doc]:
     ...
@@ -179,6 +249,7 @@ def get_all(
     field: str | tuple[str, ...] | None = None,
     filter: dict[str, Any] | tuple[tuple[Any, ...], ...] | None = None,
     limit: int | None = None,
+    start: int = 0,
     order_by: str | None = None,
 ) -> list[Any]:
     ...
@@ -191,6 +262,7 @@ def get_all(
     field: str | tuple[str, ...] | None = None,
     filter: dict[str, Any] | tuple[tuple[Any, ...], ...] | None = None,
     limit: int | None = None,
+    start: int = 0,
     order_by: str | None = None,
 ) -> list[_T_doc]:
     return cast(
@@ -201,6 +273,7 @@ def get_all(
             filters=filter,
             pluck=pluck,
             limit_page_length=limit,
+            limit_start=start,
             order_by=order_by,
         ),
     )
@@ -213,13 +286,34 @@ def get_value(
     as_dict: bool = False,
     order_by: str | None = None,
 ) -> Any:
-    return frappe.db.get_value(  # type: ignore
-        doctype=doctype,
-        filters=filters,
-        fieldname=fieldname,  # type: ignore
-        as_dict=as_dict,
-        order_by=order_by,
-    )
+    """Get value from database.
+
+    Values of document by name are queried once per request or job until anything
+    is written to database.
+    """
+    if not isinstance(filters, str):
+        return frappe.db.get_value(  # type: ignore
+            doctype=doctype,
+            filters=filters,
+            fieldname=fieldname,  # type: ignore
+            as_dict=as_dict,
+            order_by=order_by,
+        )
+
+    if not isinstance(fieldname, str):
+        fieldname = tuple(fieldname)
+    values = _get_values().setdefault((doctype, filters), {})
+    key = (fieldname, as_dict)
+    if key not in values:
+        values[key] = frappe.db.get_value(  # type: ignore
+            doctype=doctype,
+            filters=filters,
+            fieldname=fieldname,  # type: ignore
+            as_dict=as_dict,
+            order_by=order_by,
+        )
+    value = values[key]
+    return frappe._dict(value) if as_dict and value is not None else value
 
 
 def new_doc(cls: type[_T_doc]) -> _T_doc:
@@ -254,6 +348,235 @@ def copy_doc(doc: _T_doc, ignore_no_copy: bool = True) -> _T_doc:
     return frappe.copy_doc(doc, ignore_no_copy=ignore_no_copy)  # type: ignore
 
 
+def get_standard_values() -> dict[str, Any]:
+    """Get values of standard fields that Frappe sets on insert."""
+    now = frappe.utils.now()
+    return {
+        "creation": now,
+        "modified": now,
+        "owner": frappe.session.user,
+        "modified_by": frappe.session.user,
+        "docstatus": 0,
+    }
+
+
+def bulk_insert(
+    doctype: str,
+    values: list[dict[str, Any]],
+    update_on_duplicate: Iterable[str] = (),
+    chunk_size: int = 1000,
+    increment_on_duplicate: Iterable[str] = (),
+) -> None:
+    """Insert rows with one `INSERT` statement per `chunk_size` rows.
+
+    All rows should have the same keys. If row with the same name (or other
+    unique key) exists, fields from `update_on_duplicate` are overwritten and
+    fields from `increment_on_duplicate` are added to instead.
+    Rows are written as is: no hooks, validation or versions.
+    """
+    if not values:
+        return
+
+    fields = list(values[0].keys())
+    columns = ", ".join(f"`{f}`" for f in fields)
+    row_placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    update = ", ".join(
+        [f"`{f}` = VALUES(`{f}`)" for f in update_on_duplicate]
+        + [f"`{f}` = `{f}` + VALUES(`{f}`)" for f in increment_on_duplicate]
+    )
+    on_duplicate = f"ON DUPLICATE KEY UPDATE {update}" if update else ""
+
+    for idx in range(0, len(values), chunk_size):
+        chunk = values[idx : idx + chunk_size]
+        frappe.db.sql(  # nosec
+            f"""
+            INSERT INTO `tab{doctype}` ({columns})
+            VALUES {", ".join([row_placeholder] * len(chunk))}
+            {on_duplicate}
+            """,
+            values=[row[f] for row in chunk for f in fields],
+        )
+
+
+def bulk_update(
+    doctype: str, values: dict[str, dict[str, Any]], chunk_size: int = 1000
+) -> None:
+    """Update documents with one `UPDATE` per field per `chunk_size` documents.
+
+    `values` are `{name: {field: value}}`, documents can have different fields.
+    Rows are written as is: no hooks, validation or versions, `modified` is kept.
+    """
+    by_field: defaultdict[str, list[tuple[str, Any]]] = defaultdict(list)
+    for name, fields in values.items():
+        for field, value in fields.items():
+            by_field[field].append((name, value))
+
+    for field, field_values in by_field.items():
+        for idx in range(0, len(field_values), chunk_size):
+            chunk = field_values[idx : idx + chunk_size]
+            frappe.db.sql(  # nosec
+                f"""
+                UPDATE `tab{doctype}`
+                SET `{field}` = CASE name {" ".join(["WHEN %s THEN %s"] * len(chunk))} END
+                WHERE name IN %s
+                """,
+                values=[v for pair in chunk for v in pair]
+                + [tuple(pair[0] for pair in chunk)],
+            )
+
+
+def cancel_ledger_entries(
+    doctype: str,
+    voucher_type: str,
+    voucher_no: str,
+    child_doctypes: Iterable[str] = (),
+) -> list[str]:
+    """Cancel all submitted entries of voucher with one `UPDATE` per table.
+
+    For immutable ledger doctypes without cancel hooks: keeping derived data
+    in sync is up to the caller. Instead of Version for every entry, one
+    Comment listing cancelled entries is added to the voucher.
+    Returns names of cancelled entries.
+    """
+    names: list[str] = frappe.db.sql_list(  # nosec
+        f"""
+        SELECT name FROM `tab{doctype}`
+        WHERE voucher_type = %s AND voucher_no = %s AND docstatus = 1
+        FOR UPDATE
+        """,
+        values=(voucher_type, voucher_no),
+    )
+    if not names:
+        return names
+
+    values = {
+        "names": tuple(names),
+        "modified": frappe.utils.now(),
+        "modified_by": frappe.session.user,
+    }
+    frappe.db.sql(  # nosec
+        f"""
+        UPDATE `tab{doctype}`
+        SET docstatus = 2, modified = %(modified)s, modified_by = %(modified_by)s
+        WHERE name IN %(names)s
+        """,
+        values=values,
+    )
+    for child_doctype in child_doctypes:
+        frappe.db.sql(  # nosec
+            f"""
+            UPDATE `tab{child_doctype}`
+            SET docstatus = 2, modified = %(modified)s, modified_by = %(modified_by)s
+            WHERE parent IN %(names)s
+            """,
+            values=values,
+        )
+
+    frappe.get_doc(
+        {
+            "doctype": "Comment",
+            "comment_type": "Cancelled",
+            "reference_doctype": voucher_type,
+            "reference_name": voucher_no,
+            "content": _("Cancelled {}: {}").format(_(doctype), ", ".join(names)),
+        }
+    ).insert(ignore_permissions=True)
+    return names
+
+
+_ITEM_VALUES_KEY = "item_values"
+_ITEM_VALUES_TTL = 24 * 60 * 60
+
+
+class ItemValues(NamedTuple):
+    item_name: str | None
+    rate: int
+    weight: float
+
+
+def _load_item_values(item_codes: tuple[str, ...]) -> dict[str, ItemValues]:
+    return {
+        item_code: ItemValues(item_name, rate, weight)
+        for item_code, item_name, rate, weight in frappe.db.sql(
+            "SELECT name, item_name, rate, weight FROM `tabItem` WHERE name IN %(items)s",
+            values={"items": item_codes},
+        )
+    }
+
+
+def _cache_item_values(item_codes: tuple[str, ...]) -> None:
+    """Load committed values of Items and write them to Redis.
+
+    Hash expires `_ITEM_VALUES_TTL` after it is created, so values that were not
+    cleared (for example, if worker died right after commit) are not kept forever.
+    """
+    cache = frappe.cache()
+    key = cache.make_key(_ITEM_VALUES_KEY)
+    pipeline = cache.pipeline()
+    for item_code, values in _load_item_values(item_codes).items():
+        pipeline.hset(key, item_code, json.dumps(values))
+    try:
+        if cache.ttl(key) < 0:
+            pipeline.expire(key, _ITEM_VALUES_TTL)
+        pipeline.execute()
+    except redis.exceptions.ConnectionError:
+        pass
+
+
+def get_item_values(
+    item_codes: Iterable[str], strict: bool = False
+) -> dict[str, ItemValues]:
+    """Get name, rate and weight of Items with one Redis round trip.
+
+    Items that are not in cache are loaded with one query and cached after commit,
+    so rolled back changes don't get to cache. Item codes that don't exist are
+    skipped, or `DoesNotExistError` is raised if `strict` is set.
+    """
+    item_codes = list(dict.fromkeys(item_codes))
+    if not item_codes:
+        return {}
+
+    cache = frappe.cache()
+    try:
+        cached: list[bytes | None] = cache.hmget(
+            cache.make_key(_ITEM_VALUES_KEY), item_codes
+        )
+    except redis.exceptions.ConnectionError:
+        cached = [None] * len(item_codes)
+
+    res = {
+        item_code: ItemValues(*json.loads(value))
+        for item_code, value in zip(item_codes, cached)
+        if value is not None
+    }
+    misses = tuple(i for i in item_codes if i not in res)
+    if misses:
+        loaded = _load_item_values(misses)
+        if loaded:
+            after_commit(partial(_cache_item_values, tuple(loaded)))
+        res.update(loaded)
+
+    if strict:
+        for item_code in item_codes:
+            if item_code not in res:
+                raise frappe.DoesNotExistError(
+                    _("{0} {1} not found").format(_("Item"), item_code)
+                )
+    return res
+
+
+def clear_item_values_cache(item_codes: Iterable[str]) -> None:
+    item_codes = list(item_codes)
+    if not item_codes:
+        return
+
+    cache = frappe.cache()
+    try:
+        cache.pipeline().hdel(cache.make_key(_ITEM_VALUES_KEY), *item_codes).execute()
+    except redis.exceptions.ConnectionError:
+        pass
+
+
 def patch_fmt_money() -> None:  # pragma: no cover
     old_func = frappe.utils.data.fmt_money  # type: ignore
 
@@ -269,6 +592,40 @@ def patch_fmt_money() -> None:  # pragma: no cover
     frappe.utils.fmt_money = fmt_money
 
 
+_WRITE_QUERY_PREFIXES = ("insert", "update", "delete", "replace")
+
+
+def patch_database_commit() -> None:
+    """Run `after_commit()` callbacks on commit and drop them on rollback.
+
+    Loaded documents and values are forgotten on every write and on rollback,
+    so that `get_readonly_doc()` and `get_value()` are never stale.
+    """
+    from frappe.database.database import Database
+
+    old_sql = Database.sql
+    old_commit = Database.commit
+    old_rollback = Database.rollback
+
+    def sql(self: Database, query: Any, *args: Any, **kwargs: Any) -> Any:
+        if str(query).lstrip()[:7].lower().startswith(_WRITE_QUERY_PREFIXES):
+            clear_identity_map()
+        return old_sql(self, query, *args, **kwargs)
+
+    def commit(self: Database) -> None:
+        old_commit(self)
+        _run_after_commit()
+
+    def rollback(self: Database, *args: Any, **kwargs: Any) -> None:
+        old_rollback(self, *args, **kwargs)
+        _get_after_commit_callbacks().clear()
+        clear_identity_map()
+
+    Database.sql = sql
+    Database.commit = commit
+    Database.rollback = rollback
+
+
 def patch_validate_ip_address() -> None:
     def mock_validate_ip_address(user: Any) -> None:
         return
@@ -279,3 +636,4 @@ def patch_validate_ip_address() -> None:
 sentry.init()
 patch_fmt_money()
 patch_validate_ip_address()
+patch_database_commit()
@@ -18,9 +18,13 @@ from pymysql import OperationalError
 
 import comfort.entities.doctype.customer.customer
 import comfort.integrations.ikea
+import comfort.utils
 import frappe
 from comfort.comfort_core import CommissionSettings, IkeaSettings, VkApiSettings
 from comfort.entities import Customer, Item, ItemCategory
+from comfort.entities.doctype.item_component.item_component import (
+    update_item_components,
+)
 from comfort.finance import GLEntry, Payment
 from comfort.finance.chart_of_accounts import initialize_accounts
 from comfort.stock import Checkout, DeliveryTrip, Receipt
@@ -64,6 +68,18 @@ def db_transaction(db_instance: MariaDBDatabase):
     db_instance.rollback()
 
 
+@pytest.fixture(autouse=True)
+def clear_ikea_cache(db_instance: MariaDBDatabase):
+    """Redis and `frappe.local` are not rolled back with database, so clear cached IKEA responses, Items and loaded documents"""
+    yield
+    frappe.cache().delete_keys("ikea_")
+    frappe.cache().delete_value("item_components")
+    frappe.cache().delete_value("item_values")
+    frappe.cache().delete_value("account_groups")
+    comfort.utils.clear_identity_map()
+    comfort.integrations.ikea.clear_token_cache()
+
+
 @pytest.fixture
 def customer(monkeypatch: pytest.MonkeyPatch):
     class Customer(comfort.entities.doctype.customer.customer.Customer):
@@ -310,6 +326,7 @@ def sales_order(
     all_children: list[TypedDocument] = item.get_all_children()  # type: ignore
     for child in all_children:
         child.db_insert()
+    update_item_components([item.item_code])
     commission_settings.insert()
     return get_doc(
         SalesOrder,
@@ -522,6 +539,8 @@ def ikea_settings(monkeypatch: pytest.MonkeyPatch):
         (datetime.now(tz=timezone.utc) + timedelta(hours=1)).utctimetuple()
     )
     doc.zip_code = "101000"
+    doc.delivery_services_cache_ttl = 0
+    doc.item_catalog_max_age = 60
     doc.save()
     return doc
 
@@ -1,6 +1,11 @@
 import pytest
 
 from comfort.entities import ChildItem, Item
+from comfort.entities.doctype.item.item import (
+    calculate_weight_for_items,
+    defer_weight_propagation,
+    propagate_weight,
+)
 from comfort.utils import get_doc, get_value
 from frappe import ValidationError
 
@@ -103,3 +108,64 @@ def test_calculate_weight_in_parent_docs(item: Item, child_items: list[Item]):
 
 def test_calculate_weight_in_parent_docs_if_parents_not_exist(child_items: list[Item]):
     child_items[0].calculate_weight_in_parent_docs()
+
+
+def test_calculate_weight_for_items(item: Item, child_items: list[Item]):
+    item.calculate_weight()
+    item.insert()
+
+    child_items[0].weight += 10
+    child_items[0].db_update()
+    assert calculate_weight_for_items([child_items[0].item_code]) == [item.item_code]
+
+    child_item_qty: int = get_value(
+        "Child Item",
+        {"parent": item.item_code, "item_code": child_items[0].item_code},
+        "qty",
+    )
+    new_weight: float = get_value("Item", item.item_code, "weight")
+    assert new_weight == pytest.approx(item.weight + child_item_qty * 10)
+
+
+def test_calculate_weight_for_items_no_parents(child_items: list[Item]):
+    assert calculate_weight_for_items([child_items[0].item_code]) == []
+    assert calculate_weight_for_items([]) == []
+
+
+def test_propagate_weight(item: Item, child_items: list[Item]):
+    item.insert()
+
+    child_items[0].weight += 10
+    child_items[0].db_update()
+    assert propagate_weight([child_items[0].item_code]) == [item.item_code]
+
+    child_item_qty: int = get_value(
+        "Child Item",
+        {"parent": item.item_code, "item_code": child_items[0].item_code},
+        "qty",
+    )
+    new_weight: float = get_value("Item", item.item_code, "weight")
+    assert new_weight == pytest.approx(item.weight + child_item_qty * 10)
+
+
+def test_propagate_weight_skips_not_parents(item: Item, child_items: list[Item]):
+    item.insert()
+    assert propagate_weight([item.item_code]) == []
+    assert propagate_weight([]) == []
+
+
+def test_defer_weight_propagation(item: Item, child_items: list[Item]):
+    item.insert()
+    weight = item.weight
+
+    with defer_weight_propagation():
+        for child in child_items:
+            child.weight += 10
+            child.save()
+        with defer_weight_propagation():
+            pass
+        assert get_value("Item", item.item_code, "weight") == pytest.approx(weight)
+
+    exp_weight = weight + sum(c.qty * 10 for c in item.child_items)
+    new_weight: float = get_value("Item", item.item_code, "weight")
+    assert new_weight == pytest.approx(exp_weight)
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+import frappe
+from comfort.entities import Item
+from comfort.entities.doctype.item_component.item_component import (
+    get_components,
+    get_item_components,
+    update_item_components,
+)
+from comfort.utils import _run_after_commit, count_qty, counters_are_same
+
+
+def test_item_components_updated_on_insert(item: Item, child_items: list[Item]):
+    item.insert()
+    components = get_item_components()[item.item_code]
+    assert counters_are_same(
+        count_qty(SimpleNamespace(item_code=c[0], qty=c[2]) for c in components),
+        count_qty(item.child_items),
+    )
+
+
+def test_item_components_updated_on_save(item: Item, child_items: list[Item]):
+    item.insert()
+    get_item_components()  # Warm up cache
+
+    item.child_items = item.child_items[:1]
+    item.save()
+
+    assert get_item_components()[item.item_code] == [
+        (
+            item.child_items[0].item_code,
+            item.child_items[0].item_name,
+            item.child_items[0].qty,
+        )
+    ]
+
+
+def test_item_components_deleted_on_trash(item: Item, child_items: list[Item]):
+    item.insert()
+    get_item_components()  # Warm up cache
+
+    item.delete()
+    assert item.item_code not in get_item_components()
+
+
+def test_update_item_components_merges_same_items(item: Item, child_items: list[Item]):
+    item.append("child_items", {"item_code": item.child_items[0].item_code, "qty": 3})
+    item.insert()
+    exp_qty = item.child_items[0].qty + 3
+
+    update_item_components([item.item_code])
+
+    components = {c[0]: c[2] for c in get_item_components()[item.item_code]}
+    assert components[item.child_items[0].item_code] == exp_qty
+
+
+def test_update_item_components_empty():
+    update_item_components([])
+
+
+def test_item_components_not_cached_before_commit(item: Item, child_items: list[Item]):
+    item.insert()
+    get_item_components()
+    assert frappe.cache().get_value("item_components") is None
+
+    _run_after_commit()
+    get_item_components()
+    cache = frappe.cache()
+    assert item.item_code in cache.get_value("item_components")
+    assert 0 < cache.ttl(cache.make_key("item_components")) <= 24 * 60 * 60
+
+
+def test_get_components(
+    item: Item, child_items: list[Item], monkeypatch: pytest.MonkeyPatch
+):
+    item.insert()
+    _run_after_commit()
+    get_item_components()  # Warm up cache
+
+    def mock_sql(*args: Any, **kwargs: Any):
+        raise AssertionError("Should not query database")
+
+    monkeypatch.setattr(frappe.db, "sql", mock_sql)
+    components = get_components(
+        [
+            SimpleNamespace(item_code=item.item_code, qty=2),
+            SimpleNamespace(item_code=child_items[0].item_code, qty=1),
+        ]
+    )
+    monkeypatch.undo()
+
+    exp_counter = count_qty(item.child_items)
+    for key in exp_counter:
+        exp_counter[key] *= 2
+    assert counters_are_same(count_qty(components), exp_counter)
+    assert {c.parent_item_code for c in components} == {item.item_code}
@@ -4,8 +4,10 @@ import frappe
 from comfort.finance import GLEntry
 from comfort.finance.report.general_ledger.general_ledger import (
     get_data,
+    get_report_summary,
     validate_filters,
 )
+from comfort.finance.utils import create_gl_entries, rebuild_account_daily_balance
 from comfort.utils import copy_doc
 from frappe.utils import add_to_date, get_date_str, today
 
@@ -37,6 +39,7 @@ def insert_gl_entries_with_wrong_conditions(gl_entry: GLEntry):
     new_doc2: GLEntry = copy_doc(gl_entry)
     new_doc2.creation = add_to_date("2021-07-31", days=-50)
     new_doc2.db_insert()
+    rebuild_account_daily_balance()
 
 
 def test_gl_get_data(gl_entry: GLEntry):
@@ -48,3 +51,45 @@ def test_gl_get_data(gl_entry: GLEntry):
     data = get_data(filters)
     assert len(data) == 1
     assert data[0].gl_entry == gl_entry.name
+
+
+def test_gl_get_data_includes_to_date(gl_entry: GLEntry):
+    gl_entry.creation = "2021-08-31 18:00:00"
+    gl_entry.db_insert()
+    data = get_data({"from_date": "2021-07-31", "to_date": "2021-08-31"})
+    assert [d.gl_entry for d in data] == [gl_entry.name]
+
+
+def test_gl_get_data_with_account(gl_entry: GLEntry):
+    insert_gl_entries_with_wrong_conditions(gl_entry)
+    filters: dict[str, str] = {
+        "from_date": "2021-07-31",
+        "to_date": get_date_str(today()),
+        "account": "Installation",
+    }
+    assert get_data(filters) == []
+
+
+def test_gl_get_report_summary_no_account():
+    assert get_report_summary({"from_date": "2021-07-31", "to_date": today()}) is None
+
+
+def test_gl_get_report_summary(gl_entry: GLEntry):
+    insert_gl_entries_with_wrong_conditions(gl_entry)
+    create_gl_entries(
+        gl_entry.voucher_type,
+        gl_entry.voucher_no,
+        [("Delivery", 100, 0), ("Installation", 0, 100)],
+    )
+    filters: dict[str, str] = {
+        "from_date": "2021-07-31",
+        "to_date": get_date_str(today()),
+        "account": "Delivery",
+    }
+    summary = {v["label"]: v["value"] for v in get_report_summary(filters) or []}
+    assert summary == {
+        "Opening": -300,
+        "Debit": 100,
+        "Credit": 300,
+        "Closing": -500,
+    }
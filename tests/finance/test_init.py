@@ -7,12 +7,18 @@ from comfort.finance import GLEntry, Payment
 from comfort.finance.chart_of_accounts import DEFAULT_ACCOUNT_SETTINGS
 from comfort.finance.utils import (
     cancel_gl_entries_for,
+    check_account_daily_balance,
+    create_gl_entries,
     create_gl_entry,
     create_payment,
     get_account,
+    get_account_groups,
+    get_account_totals,
+    rebuild_account_daily_balance,
 )
 from comfort.transactions import SalesOrder
-from comfort.utils import get_all, get_value
+from comfort.utils import get_all, get_doc, get_value
+from frappe.utils import add_days, today
 
 
 @pytest.mark.usefixtures("accounts")
@@ -38,7 +44,7 @@ def test_create_gl_entry(payment_sales: Payment):
     create_gl_entry(payment_sales.doctype, payment_sales.name, account, debit, credit)
     entries = get_all(
         GLEntry,
-        field=("docstatus", "account", "debit", "credit"),
+        field=("docstatus", "account", "debit", "credit", "sales_order"),
         filter={
             "voucher_type": payment_sales.doctype,
             "voucher_no": payment_sales.name,
@@ -49,6 +55,111 @@ def test_create_gl_entry(payment_sales: Payment):
     assert entries[0].account == account
     assert entries[0].debit == debit
     assert entries[0].credit == credit
+    assert entries[0].sales_order is None
+
+
+def test_create_gl_entry_with_sales_order(payment_sales: Payment):
+    payment_sales.db_insert()
+    create_gl_entry(
+        payment_sales.doctype,
+        payment_sales.name,
+        get_account("cash"),
+        300,
+        0,
+        sales_order=payment_sales.voucher_no,
+    )
+    assert (
+        get_value(
+            "GL Entry",
+            {"voucher_type": payment_sales.doctype, "voucher_no": payment_sales.name},
+            "sales_order",
+        )
+        == payment_sales.voucher_no
+    )
+
+
+def test_create_gl_entries_same_as_create_gl_entry(payment_sales: Payment):
+    payment_sales.db_insert()
+    cash, bank = get_account("cash"), get_account("bank")
+    prepaid_sales = get_account("prepaid_sales")
+    sales_order = payment_sales.voucher_no
+    create_gl_entry(
+        payment_sales.doctype, payment_sales.name, cash, 300, 0, sales_order
+    )
+    create_gl_entries(
+        payment_sales.doctype,
+        payment_sales.name,
+        [(bank, 0, 300), (prepaid_sales, 300, 0), (cash, 0, 0)],
+        sales_order=sales_order,
+    )
+
+    fields = (
+        "docstatus",
+        "owner",
+        "modified_by",
+        "voucher_type",
+        "voucher_no",
+        "sales_order",
+        "LENGTH(name) as name_length",
+    )
+    entries = {
+        e.account: e
+        for e in get_all(
+            GLEntry,
+            field=fields + ("account", "debit", "credit"),
+            filter={
+                "voucher_type": payment_sales.doctype,
+                "voucher_no": payment_sales.name,
+            },
+        )
+    }
+    assert len(entries) == 3
+    assert (entries[bank].debit, entries[bank].credit) == (0, 300)
+    assert entries[bank].sales_order == sales_order
+    for field in fields:
+        assert entries[cash][field] == entries[bank][field]
+
+
+def test_create_gl_entries_raises_on_unbalanced(payment_sales: Payment):
+    with pytest.raises(
+        frappe.ValidationError, match="Total debit should be equal to total credit"
+    ):
+        create_gl_entries(
+            payment_sales.doctype,
+            payment_sales.name,
+            [(get_account("cash"), 300, 0), (get_account("bank"), 0, 200)],
+        )
+
+
+@pytest.mark.usefixtures("accounts")
+def test_create_gl_entries_raises_on_group_account(payment_sales: Payment):
+    group = next(a for a, is_group in get_account_groups().items() if is_group)
+    with pytest.raises(
+        frappe.ValidationError, match="Can't add GL Entry for group account"
+    ):
+        create_gl_entries(
+            payment_sales.doctype,
+            payment_sales.name,
+            [(group, 300, 0), (get_account("bank"), 0, 300)],
+        )
+
+
+def test_create_gl_entries_raises_on_missing_account(payment_sales: Payment):
+    with pytest.raises(frappe.ValidationError, match="Account Nope does not exist"):
+        create_gl_entries(
+            payment_sales.doctype,
+            payment_sales.name,
+            [("Nope", 300, 0), (get_account("bank"), 0, 300)],
+        )
+
+
+@pytest.mark.usefixtures("accounts")
+def test_get_account_groups_cache_cleared_on_account_insert():
+    get_account_groups()  # Warm up cache
+    frappe.get_doc(
+        {"doctype": "Account", "account_name": "New Account", "is_group": 0}
+    ).insert()
+    assert get_account_groups()["New Account"] is False
 
 
 def test_cancel_gl_entries_for(payment_sales: Payment):
@@ -69,6 +180,40 @@ def test_cancel_gl_entries_for(payment_sales: Payment):
     assert docstatus == 2
 
 
+def test_cancel_gl_entries_for_adds_one_comment(payment_sales: Payment):
+    payment_sales.db_insert()
+    for account, debit, credit in (("cash", 300, 0), ("prepaid_sales", 0, 300)):
+        create_gl_entry(
+            payment_sales.doctype,
+            payment_sales.name,
+            get_account(account),
+            debit,
+            credit,
+        )
+
+    cancel_gl_entries_for(payment_sales.doctype, payment_sales.name)
+    cancel_gl_entries_for(payment_sales.doctype, payment_sales.name)
+
+    assert get_all(
+        GLEntry,
+        pluck="docstatus",
+        filter={
+            "voucher_type": payment_sales.doctype,
+            "voucher_no": payment_sales.name,
+        },
+    ) == [2, 2]
+    comments = frappe.get_all(
+        "Comment",
+        pluck="content",
+        filters={
+            "comment_type": "Cancelled",
+            "reference_doctype": payment_sales.doctype,
+            "reference_name": payment_sales.name,
+        },
+    )
+    assert len(comments) == 1
+
+
 def test_create_payment(sales_order: SalesOrder):
     sales_order.db_insert()
     amount, paid_with_cash = 300, True
@@ -88,3 +233,67 @@ def test_create_payment(sales_order: SalesOrder):
 
     assert payments[0].amount == amount
     assert payments[0].paid_with_cash == paid_with_cash
+
+
+def test_create_gl_entry_updates_account_daily_balance(payment_sales: Payment):
+    payment_sales.db_insert()
+    cash = get_account("cash")
+    create_gl_entry(payment_sales.doctype, payment_sales.name, cash, 300, 0)
+    create_gl_entry(payment_sales.doctype, payment_sales.name, cash, 0, 100)
+
+    assert get_account_totals(today(), today())[cash] == (300, 100)
+    assert check_account_daily_balance() == {}
+
+
+def test_gl_entry_cancel_updates_account_daily_balance(payment_sales: Payment):
+    payment_sales.db_insert()
+    cash = get_account("cash")
+    create_gl_entry(payment_sales.doctype, payment_sales.name, cash, 300, 0)
+    name: str = get_value(
+        "GL Entry",
+        {"voucher_type": payment_sales.doctype, "voucher_no": payment_sales.name},
+    )
+    get_doc(GLEntry, name).cancel()
+
+    assert get_account_totals(today(), today())[cash] == (0, 0)
+    assert check_account_daily_balance() == {}
+
+
+def test_create_gl_entries_and_cancel_update_account_daily_balance(
+    payment_sales: Payment,
+):
+    payment_sales.db_insert()
+    cash, bank = get_account("cash"), get_account("bank")
+    create_gl_entries(
+        payment_sales.doctype, payment_sales.name, [(cash, 300, 0), (bank, 0, 300)]
+    )
+    assert get_account_totals(today(), today()) == {cash: (300, 0), bank: (0, 300)}
+    assert check_account_daily_balance() == {}
+
+    cancel_gl_entries_for(payment_sales.doctype, payment_sales.name)
+    assert get_account_totals(today(), today()) == {cash: (0, 0), bank: (0, 0)}
+    assert check_account_daily_balance() == {}
+
+
+def test_get_account_totals_date_range(payment_sales: Payment):
+    payment_sales.db_insert()
+    cash = get_account("cash")
+    create_gl_entry(payment_sales.doctype, payment_sales.name, cash, 300, 0)
+
+    assert get_account_totals(add_days(today(), 1), add_days(today(), 2)) == {}
+    assert get_account_totals(None, add_days(today(), -1)) == {}
+    assert get_account_totals(None, today()) == {cash: (300, 0)}
+
+
+def test_check_and_rebuild_account_daily_balance(payment_sales: Payment):
+    payment_sales.db_insert()
+    cash = get_account("cash")
+    create_gl_entry(payment_sales.doctype, payment_sales.name, cash, 300, 0)
+
+    frappe.db.sql("UPDATE `tabAccount Daily Balance` SET debit = 500")
+    mismatches = check_account_daily_balance()
+    assert list(mismatches.values()) == [((500, 0), (300, 0))]
+
+    rebuild_account_daily_balance()
+    assert check_account_daily_balance() == {}
+    assert get_account_totals(today(), today()) == {cash: (300, 0)}
@@ -33,7 +33,7 @@ def test_resolve_cash_or_bank(payment_sales: Payment, v: bool, expected: str):
 def get_gl_entries(doc: TypedDocument):
     return get_all(
         GLEntry,
-        field=("account", "debit", "credit"),
+        field=("account", "debit", "credit", "sales_order"),
         filter={"voucher_type": doc.doctype, "voucher_no": doc.name},
     )
 
@@ -51,6 +51,7 @@ def test_payment_create_sales_gl_entries(payment_sales: Payment, cash: bool):
 
     for entry in entries:
         assert entry.account in (cash_or_bank, prepaid_sales)
+        assert entry.sales_order == payment_sales.voucher_no
         if entry.account == cash_or_bank:
             assert entry.debit == payment_sales.amount
             assert entry.credit == 0
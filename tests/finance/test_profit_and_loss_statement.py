@@ -13,6 +13,7 @@ from comfort.finance.report.profit_and_loss_statement.profit_and_loss_statement
     get_income_expense_profit_loss_totals,
     get_report_summary,
 )
+from comfort.finance.utils import rebuild_account_daily_balance
 from comfort.utils import get_all, group_by_attr
 from frappe.utils import get_datetime_str, today
 from tests.finance.test_general_ledger import insert_gl_entries_with_wrong_conditions
@@ -54,6 +55,7 @@ def test_calculate_total_in_parent_accounts(gl_entry: GLEntry):
     gl_entry.name = None  # type: ignore
     gl_entry.credit = 250
     gl_entry.db_insert()
+    rebuild_account_daily_balance()
 
     account_balance_map = _get_account_balance_map(get_filters())
     parent_children_map = _get_parent_children_accounts_map()
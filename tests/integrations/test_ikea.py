@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 from calendar import timegm
+from collections import Counter
+from concurrent.futures import Future
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
@@ -9,30 +12,48 @@ from typing import Any
 import ikea_api
 import pytest
 import sentry_sdk
-from ikea_api.wrappers.types import GetDeliveryServicesResponse, ParsedItem
+from ikea_api.wrappers.types import (
+    GetDeliveryServicesResponse,
+    ParsedItem,
+    PurchaseHistoryItem,
+)
 
 import comfort.integrations.ikea
 import frappe
-from comfort.comfort_core import IkeaSettings
+from comfort.comfort_core import IkeaPurchase, IkeaSettings
 from comfort.entities import Item, ItemCategory
 from comfort.integrations.ikea import (
     FetchItemsResult,
-    _create_item,
     _create_item_categories,
-    _fetch_child_items,
+    _create_items,
+    _get_catalog_entries,
+    _get_items,
     _get_items_to_fetch,
-    _make_item_category,
-    _make_items_from_child_items_if_not_exist,
+    _get_known_child_item_codes,
+    _load_tokens,
+    _make_call_key,
+    _normalize_items,
     add_items_to_cart,
     fetch_items,
     get_auth_token,
+    get_cache_stats,
     get_delivery_services,
     get_guest_token,
     get_items,
     get_purchase_history,
     get_purchase_info,
+    get_purchase_info_batch,
+    parse_item_codes,
+    single_flight,
+    sync_purchase_history,
+)
+from comfort.utils import (
+    _run_after_commit,
+    count_qty,
+    counters_are_same,
+    get_all,
+    get_doc,
 )
-from comfort.utils import count_qty, counters_are_same, get_all, get_doc
 from frappe.exceptions import ValidationError
 from frappe.utils import add_to_date, get_datetime
 from tests.conftest import (
@@ -88,6 +109,79 @@ def test_get_guest_token_no_update(ikea_settings: IkeaSettings):
     )
 
 
+def test_get_guest_token_renews_ahead_of_expiration(ikea_settings: IkeaSettings):
+    ikea_settings.guest_token = "fff"
+    ikea_settings.guest_token_expiration = add_to_date(None, hours=1)
+    ikea_settings.save()
+    assert get_guest_token() == mock_token
+
+
+def _patch_get_guest_token_with_counter(monkeypatch: pytest.MonkeyPatch):
+    calls = 0
+
+    def mock_get_guest_token():
+        nonlocal calls
+        calls += 1
+        return mock_token
+
+    monkeypatch.setattr(
+        comfort.integrations.ikea, "_get_guest_token", mock_get_guest_token
+    )
+    return lambda: calls
+
+
+def test_get_guest_token_renews_once(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    get_calls = _patch_get_guest_token_with_counter(monkeypatch)
+    ikea_settings.guest_token = None
+    ikea_settings.save()
+
+    assert get_guest_token() == mock_token
+    assert get_guest_token() == mock_token
+    assert get_calls() == 1
+
+
+def test_get_guest_token_uses_shared_copy(ikea_settings: IkeaSettings):
+    new_token, new_expiration = "fff", add_to_date(None, days=25)
+    ikea_settings.guest_token = new_token
+    ikea_settings.guest_token_expiration = new_expiration
+    ikea_settings.save()
+    assert get_guest_token() == new_token
+
+    # Bypasses `on_change()`, so copies are not cleared
+    frappe.db.set_value("Ikea Settings", None, "guest_token", "other")
+    assert get_guest_token() == new_token
+
+    comfort.integrations.ikea._tokens.clear()
+    assert get_guest_token() == new_token
+
+
+def test_get_guest_token_renewed_by_other_worker(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    get_calls = _patch_get_guest_token_with_counter(monkeypatch)
+    ikea_settings.guest_token = None
+    ikea_settings.save()
+    tokens = _load_tokens()
+
+    new_token = "fff"
+    tokens["guest_token"] = new_token
+    tokens["guest_token_expiration"] = add_to_date(None, days=30)
+    frappe.cache().set_value("ikea_tokens", tokens)
+
+    assert get_guest_token() == new_token
+    assert get_calls() == 0
+
+
+def test_ikea_settings_change_clears_token_cache(ikea_settings: IkeaSettings):
+    assert get_guest_token() == mock_token
+    ikea_settings.guest_token = "fff"
+    ikea_settings.guest_token_expiration = add_to_date(None, days=25)
+    ikea_settings.save()
+    assert get_guest_token() == "fff"
+
+
 @pytest.mark.usefixtures("ikea_settings")
 def test_get_guest_token_return():
     assert get_guest_token() == mock_token
@@ -131,6 +225,60 @@ def test_get_authorized_api_return():
     assert get_auth_token() == mock_token
 
 
+def test_make_call_key():
+    first = _make_call_key("endpoint", {"a": 1, "b": [1, 2]})
+    second = _make_call_key("endpoint", {"b": [1, 2], "a": 1})
+    assert first == second
+    assert first != _make_call_key("other_endpoint", {"a": 1, "b": [1, 2]})
+    assert first != _make_call_key("endpoint", {"a": 2, "b": [1, 2]})
+
+
+def _must_not_be_called() -> Any:
+    raise AssertionError("Call should have been coalesced")
+
+
+def test_single_flight_calls_func():
+    assert single_flight("endpoint", ["1"], lambda: "foo") == "foo"
+    assert single_flight("endpoint", ["1"], lambda: "bar") == "bar"
+
+
+def test_single_flight_joins_call_in_same_process():
+    key = frappe.cache().make_key(_make_call_key("endpoint", ["1"]))
+    future: Future[str] = Future()
+    future.set_result("foo")
+    comfort.integrations.ikea._in_flight[key] = future
+    try:
+        assert single_flight("endpoint", ["1"], _must_not_be_called) == "foo"
+    finally:
+        del comfort.integrations.ikea._in_flight[key]
+
+
+def test_single_flight_joins_call_in_other_worker():
+    cache = frappe.cache()
+    key = _make_call_key("endpoint", ["1"])
+    lock_key = cache.make_key(f"{key}_lock")
+    cache.set(lock_key, "someflight", ex=5)
+    cache.set_value(f"{key}_someflight", ("foo",), expires_in_sec=5)
+    try:
+        assert single_flight("endpoint", ["1"], _must_not_be_called) == "foo"
+    finally:
+        cache.delete(lock_key)
+
+
+def test_single_flight_releases_lock_on_error():
+    def raise_exc():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        single_flight("endpoint", ["1"], raise_exc)
+
+    cache = frappe.cache()
+    assert (
+        cache.get(cache.make_key(f"{_make_call_key('endpoint', ['1'])}_lock")) is None
+    )
+    assert single_flight("endpoint", ["1"], lambda: "foo") == "foo"
+
+
 @pytest.mark.parametrize("v", ({}, {"11111111": 0, "22222222": 0}))
 @pytest.mark.usefixtures("ikea_settings")
 def test_get_delivery_services_no_items(v: dict[str, int]):
@@ -192,6 +340,78 @@ def test_get_delivery_services_some_delivery_options_available(
     assert "No available delivery options" not in str(frappe.message_log)
 
 
+def test_normalize_items():
+    assert _normalize_items({"2": 1, "1": 2, "3": 0}) == [("1", 2), ("2", 1)]
+    assert _normalize_items({"1": 2, "2": 1}) == _normalize_items({"2": 1, "1": 2})
+
+
+def _patch_get_delivery_services_with_counter(monkeypatch: pytest.MonkeyPatch):
+    calls: list[dict[str, int]] = []
+
+    def mock_get_delivery_services(items: dict[str, int]):
+        calls.append(items)
+        return mock_delivery_services
+
+    monkeypatch.setattr(
+        comfort.integrations.ikea, "_get_delivery_services", mock_get_delivery_services
+    )
+    return calls
+
+
+def test_get_delivery_services_cache_hit(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.db_set("delivery_services_cache_ttl", 60)
+    calls = _patch_get_delivery_services_with_counter(monkeypatch)
+    stats_before = get_cache_stats("delivery_services")
+
+    assert (
+        get_delivery_services({"14251253": 1, "50366596": 2}) == mock_delivery_services
+    )
+    assert (
+        get_delivery_services({"50366596": 2, "14251253": 1}) == mock_delivery_services
+    )
+
+    assert len(calls) == 1
+    stats_after = get_cache_stats("delivery_services")
+    assert stats_after["hits"] - stats_before["hits"] == 1
+    assert stats_after["misses"] - stats_before["misses"] == 1
+
+
+def test_get_delivery_services_cache_bypass(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.db_set("delivery_services_cache_ttl", 60)
+    calls = _patch_get_delivery_services_with_counter(monkeypatch)
+
+    get_delivery_services({"14251253": 1})
+    get_delivery_services({"14251253": 1}, use_cache=False)
+    assert len(calls) == 2
+
+
+def test_get_delivery_services_cache_different_zip_code(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.db_set("delivery_services_cache_ttl", 60)
+    calls = _patch_get_delivery_services_with_counter(monkeypatch)
+
+    get_delivery_services({"14251253": 1})
+    ikea_settings.db_set("zip_code", "101001")
+    get_delivery_services({"14251253": 1})
+    assert len(calls) == 2
+
+
+def test_get_delivery_services_cache_disabled(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.db_set("delivery_services_cache_ttl", 0)
+    calls = _patch_get_delivery_services_with_counter(monkeypatch)
+
+    get_delivery_services({"14251253": 1})
+    get_delivery_services({"14251253": 1})
+    assert len(calls) == 2
+
+
 @pytest.mark.parametrize("authorize_", (True, False))
 @pytest.mark.usefixtures("ikea_settings")
 def test_add_items_to_cart_with_items(
@@ -212,14 +432,100 @@ def test_add_items_to_cart_no_items():
         add_items_to_cart({}, authorize=False)
 
 
+def patch_get_purchase_history_page(
+    monkeypatch: pytest.MonkeyPatch, history: list[PurchaseHistoryItem]
+):
+    skips: list[int] = []
+
+    def mock_get_purchase_history_page(skip: int):
+        skips.append(skip)
+        return history[skip : skip + 1]
+
+    monkeypatch.setattr(comfort.integrations.ikea, "_PURCHASE_HISTORY_PAGE_SIZE", 1)
+    monkeypatch.setattr(
+        comfort.integrations.ikea,
+        "_get_purchase_history_page",
+        mock_get_purchase_history_page,
+    )
+    return skips
+
+
+@pytest.mark.usefixtures("ikea_settings")
+def test_sync_purchase_history_initial(monkeypatch: pytest.MonkeyPatch):
+    skips = patch_get_purchase_history_page(monkeypatch, mock_purchase_history)
+    sync_purchase_history()
+
+    assert skips == [0, 1, 2]
+    doc = get_doc(IkeaPurchase, "11111111")
+    assert doc.status == "IN_PROGRESS"
+    assert doc.price == 8326
+    assert doc.purchase_datetime == datetime(2021, 4, 19, 10, 12)
+    assert doc.store == "Интернет-магазин"
+    assert get_all(IkeaPurchase, pluck="name", order_by="name") == [
+        "11111111",
+        "111111110",
+    ]
+
+
+@pytest.mark.usefixtures("ikea_settings")
+def test_sync_purchase_history_stops_at_cutoff(monkeypatch: pytest.MonkeyPatch):
+    patch_get_purchase_history_page(monkeypatch, mock_purchase_history)
+    sync_purchase_history()
+
+    history = deepcopy(mock_purchase_history)
+    history[0].status = "COMPLETED"
+    skips = patch_get_purchase_history_page(monkeypatch, history)
+    sync_purchase_history()
+
+    assert skips == [0]
+    assert get_doc(IkeaPurchase, "11111111").status == "COMPLETED"
+
+
+@pytest.mark.usefixtures("ikea_settings")
+def test_sync_purchase_history_refreshes_in_progress(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    history = deepcopy(mock_purchase_history)
+    history[0].status = "COMPLETED"
+    history[1].status = "IN_PROGRESS"
+    patch_get_purchase_history_page(monkeypatch, history)
+    sync_purchase_history()
+
+    history[1].status = "COMPLETED"
+    skips = patch_get_purchase_history_page(monkeypatch, history)
+    sync_purchase_history()
+
+    assert skips == [0, 1]
+    assert get_doc(IkeaPurchase, "111111110").status == "COMPLETED"
+
+
+def test_sync_purchase_history_not_authorized(monkeypatch: pytest.MonkeyPatch):
+    skips = patch_get_purchase_history_page(monkeypatch, mock_purchase_history)
+    sync_purchase_history()
+    assert skips == []
+
+
 @pytest.mark.usefixtures("ikea_settings")
 def test_get_purchase_history(monkeypatch: pytest.MonkeyPatch):
+    patch_get_purchase_history_page(monkeypatch, mock_purchase_history)
+    sync_purchase_history()
+
     monkeypatch.setattr(
         comfort.integrations.ikea,
-        "_get_purchase_history",
-        lambda: mock_purchase_history,
+        "_get_purchase_history_page",
+        lambda skip: pytest.fail("Network should not be used"),  # type: ignore
     )
-    assert get_purchase_history() == mock_purchase_history
+    res = get_purchase_history()
+    assert [p["id"] for p in res] == ["11111111", "111111110"]
+    assert res[0]["status"] == "IN_PROGRESS"
+    assert res[0]["price"] == 8326
+    assert res[0]["datetime"] == datetime(2021, 4, 19, 10, 12)
+    assert res[0]["datetime_formatted"] == "19 апреля 2021, 13:12"
+    assert res[0]["store"] == "Интернет-магазин"
+
+    assert [p["id"] for p in get_purchase_history(start=1, page_length=1)] == [
+        "111111110"
+    ]
 
 
 @pytest.mark.usefixtures("ikea_settings")
@@ -242,6 +548,7 @@ def test_get_purchase_info_main(monkeypatch: pytest.MonkeyPatch):
 
 @pytest.mark.usefixtures("ikea_settings")
 def test_get_purchase_info_ikeaapierror_504(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(comfort.integrations.ikea, "_PURCHASE_INFO_BACKOFF_BASE", 0)
     exp_purchase_id = "111111110"
     count = 0
 
@@ -354,48 +661,171 @@ def test_get_purchase_info_raises_new(
         assert not called
 
 
-def test_make_item_category_not_exists(parsed_item: ParsedItem):
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
+def _make_graphql_error(err: dict[str, Any]):
+    class MockResponse:
+        status_code = 200
+        json = [{"errors": [err]}, {}]
+
+    return ikea_api.GraphQLError(MockResponse())  # type: ignore
+
+
+def test_get_purchase_info_batch(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.purchase_info_concurrency = 2
+    ikea_settings.save()
+    monkeypatch.setattr(comfort.integrations.ikea, "_PURCHASE_INFO_BACKOFF_BASE", 0)
+    attempts: Counter[str] = Counter()
+    running = 0
+    max_running = 0
+
+    async def mock_get_purchase_info_async(purchases: Any, purchase_id: str):
+        nonlocal running, max_running
+        attempts[purchase_id] += 1
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+        if purchase_id == "1" and attempts[purchase_id] < 3:
+            raise ikea_api.APIError(SimpleNamespace(status_code=502, text=""))  # type: ignore
+        elif purchase_id == "2":
+            raise _make_graphql_error({"message": "Order not found"})
+        elif purchase_id == "3":
+            raise ikea_api.APIError(SimpleNamespace(status_code=404, text=""))  # type: ignore
+        return {"delivery_cost": 100}
+
+    captured: list[Exception] = []
+    monkeypatch.setattr(
+        comfort.integrations.ikea,
+        "_get_purchase_info_async",
+        mock_get_purchase_info_async,
+    )
+    monkeypatch.setattr(sentry_sdk, "capture_exception", captured.append)
+
+    res = get_purchase_info_batch('["1", "2", "3", "4", "4"]')
+
+    assert res["results"] == {
+        "1": {"delivery_cost": 100},
+        "2": None,
+        "4": {"delivery_cost": 100},
+    }
+    assert list(res["errors"]) == ["3"]
+    assert attempts == {"1": 3, "2": 1, "3": 1, "4": 1}
+    assert max_running == 2
+    assert len(captured) == 1
+
+
+@pytest.mark.usefixtures("ikea_settings")
+def test_get_purchase_info_batch_gives_up_after_retries(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(comfort.integrations.ikea, "_PURCHASE_INFO_BACKOFF_BASE", 0)
+    attempts = 0
+
+    async def mock_get_purchase_info_async(purchases: Any, purchase_id: str):
+        nonlocal attempts
+        attempts += 1
+        raise ikea_api.APIError(SimpleNamespace(status_code=504, text=""))  # type: ignore
+
+    monkeypatch.setattr(
+        comfort.integrations.ikea,
+        "_get_purchase_info_async",
+        mock_get_purchase_info_async,
+    )
+    monkeypatch.setattr(sentry_sdk, "capture_exception", lambda exc: None)
+
+    res = get_purchase_info_batch(["1"])
+    assert res == {"results": {}, "errors": {"1": "(504, '')"}}
+    assert attempts == 3
+
+
+def test_create_item_categories_not_exist(parsed_item: ParsedItem):
+    _create_item_categories([parsed_item])
     categories = get_all(ItemCategory, field=("category_name", "url"))
     assert categories[0].category_name == parsed_item.category_name
     assert categories[0].url == parsed_item.category_url
 
 
-def test_make_item_category_exists(parsed_item: ParsedItem):
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _make_item_category(
-        parsed_item.category_name, "https://www.ikea.com/ru/ru/cat/-43638"
-    )
+def test_create_item_categories_exist(parsed_item: ParsedItem):
+    _create_item_categories([parsed_item])
+    other_item = parsed_item.copy()
+    other_item.category_url = "https://www.ikea.com/ru/ru/cat/-43638"
+    _create_item_categories([other_item])
     categories = get_all(ItemCategory, field="url")
+    assert len(categories) == 1
     assert categories[0].url == parsed_item.category_url
 
 
-def test_make_item_category_no_name(parsed_item: ParsedItem):
-    _make_item_category(None, parsed_item.category_url)
+def test_create_item_categories_no_name(parsed_item: ParsedItem):
+    parsed_item.category_name = None
+    _create_item_categories([parsed_item])
     categories = get_all(ItemCategory, field="url")
     assert len(categories) == 0
 
 
-def test_make_items_from_child_items_if_not_exist(parsed_item: ParsedItem):
-    _make_items_from_child_items_if_not_exist(parsed_item)
+def test_create_items_makes_child_items(parsed_item: ParsedItem):
+    _create_items([parsed_item])
     items_in_db = {item.item_code for item in get_all(Item, field="item_code")}
-    assert len({i.item_code for i in parsed_item.child_items} ^ items_in_db) == 0
+    exp_items = {i.item_code for i in parsed_item.child_items}
+    exp_items.add(parsed_item.item_code)
+    assert len(exp_items ^ items_in_db) == 0
+
+    child = parsed_item.child_items[0]
+    doc = get_doc(Item, child.item_code)
+    assert doc.item_name == child.name
+    assert doc.weight == child.weight
+
+
+def test_create_items_doesnt_update_existing_child_items(parsed_item: ParsedItem):
+    child = parsed_item.child_items[0]
+    _create_items([parsed_item])
+    child.name = "New Child Name"
+    parsed_item.name = "New Name"
+    _create_items([parsed_item])
+    assert get_doc(Item, child.item_code).item_name != child.name
+
+
+def test_create_items_calculates_weight(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+    exp_weight = sum(i.weight * i.qty for i in parsed_item.child_items)
+    assert get_doc(Item, parsed_item.item_code).weight == pytest.approx(exp_weight)
+
+
+def test_create_items_calculates_weight_in_parent_items(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+
+    child = parsed_item.child_items[0]
+    _create_items(
+        [
+            ParsedItem(
+                is_combination=False,
+                item_code=child.item_code,
+                name=child.name,
+                image_url=parsed_item.image_url,
+                weight=child.weight + 10,
+                child_items=[],
+                price=100,
+                url=f"https://www.ikea.com/ru/ru/p/-{child.item_code}",
+                category_name=parsed_item.category_name,
+                category_url=parsed_item.category_url,
+            )
+        ]
+    )
 
-    _make_items_from_child_items_if_not_exist(parsed_item)  # test if not exists block
-    items_in_db = {item.item_code for item in get_all(Item, field="item_code")}
-    assert len({i.item_code for i in parsed_item.child_items} ^ items_in_db) == 0
+    exp_weight = sum(i.weight * i.qty for i in parsed_item.child_items)
+    exp_weight += 10 * child.qty
+    assert get_doc(Item, parsed_item.item_code).weight == pytest.approx(exp_weight)
 
 
-def test_create_item_exists(parsed_item: ParsedItem):
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _create_item(parsed_item)
+def test_create_items_exists(parsed_item: ParsedItem):
+    _create_items([parsed_item])
 
     parsed_item.name = "My New Fancy Item Name"
     parsed_item.url = "https://www.ikea.com/ru/ru/p/-s29128563"
     parsed_item.price = 10000253
     parsed_item.category_name = "New category"
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _create_item(parsed_item)
+    _create_items([parsed_item])
 
     doc = get_doc(Item, parsed_item.item_code)
 
@@ -410,12 +840,11 @@ def test_create_item_exists(parsed_item: ParsedItem):
     assert doc.item_categories[0].item_category == parsed_item.category_name
 
 
-def test_create_item_exists_child_items_changed(parsed_item: ParsedItem):
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _create_item(parsed_item)
+def test_create_items_exists_child_items_changed(parsed_item: ParsedItem):
+    _create_items([parsed_item])
 
     parsed_item.child_items.pop()
-    _create_item(parsed_item)
+    _create_items([parsed_item])
 
     doc = get_doc(Item, parsed_item.item_code)
     assert counters_are_same(
@@ -423,16 +852,60 @@ def test_create_item_exists_child_items_changed(parsed_item: ParsedItem):
     )
 
 
-def test_create_item_not_exists(parsed_item: ParsedItem):
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _create_item(parsed_item)
+def test_create_items_payload_not_changed(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+    _run_after_commit()
+    modified = get_doc(Item, parsed_item.item_code).modified
+    fetched_at = _get_catalog_entries([parsed_item.item_code])[parsed_item.item_code][
+        "fetched_at"
+    ]
+
+    _create_items([parsed_item])
+    _run_after_commit()
+
+    assert get_doc(Item, parsed_item.item_code).modified == modified
+    assert (
+        _get_catalog_entries([parsed_item.item_code])[parsed_item.item_code][
+            "fetched_at"
+        ]
+        >= fetched_at
+    )
+
+
+def test_create_items_updates_catalog_after_commit(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+    assert _get_catalog_entries([parsed_item.item_code]) == {}
+
+    _run_after_commit()
+    assert parsed_item.item_code in _get_catalog_entries([parsed_item.item_code])
+
+
+def test_create_items_catalog_entries_expire(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+    _run_after_commit()
+    cache = frappe.cache()
+    ttl = cache.ttl(cache.make_key(f"ikea_catalog:{parsed_item.item_code}"))
+    assert 0 < ttl <= 7 * 24 * 60 * 60
+
+
+def test_create_items_catalog_not_updated_on_rollback(parsed_item: ParsedItem):
+    _create_items([parsed_item])
+    frappe.db.rollback()
+    _run_after_commit()
+    assert _get_catalog_entries([parsed_item.item_code]) == {}
+
+
+def test_create_items_not_exists(parsed_item: ParsedItem):
+    _create_items([parsed_item])
     doc = get_doc(Item, parsed_item.item_code)
 
     assert doc.item_code == parsed_item.item_code
     assert doc.item_name == parsed_item.name
     assert doc.url == parsed_item.url
     assert doc.rate == parsed_item.price
-    assert doc.weight == parsed_item.weight
+    assert doc.weight == pytest.approx(
+        sum(i.weight * i.qty for i in parsed_item.child_items)
+    )
     assert counters_are_same(
         count_qty(doc.child_items), count_qty(parsed_item.child_items)
     )
@@ -440,18 +913,17 @@ def test_create_item_not_exists(parsed_item: ParsedItem):
     assert doc.item_categories[0].item_category == parsed_item.category_name
 
 
-def test_create_item_not_exists_no_child_items(parsed_item: ParsedItem):
+def test_create_items_not_exists_no_child_items(parsed_item: ParsedItem):
     parsed_item.child_items = []
-    _make_item_category(parsed_item.category_name, parsed_item.category_url)
-    _create_item(parsed_item)
+    _create_items([parsed_item])
     doc = get_doc(Item, parsed_item.item_code)
 
     assert len(doc.child_items) == 0
 
 
-def test_create_item_not_exists_no_item_category(parsed_item: ParsedItem):
+def test_create_items_not_exists_no_item_category(parsed_item: ParsedItem):
     parsed_item.category_name = ""
-    _create_item(parsed_item)
+    _create_items([parsed_item])
     doc = get_doc(Item, parsed_item.item_code)
 
     assert len(doc.item_categories) == 0
@@ -462,6 +934,33 @@ def test_get_items_to_fetch_force_update():
     assert len(res) == 1
 
 
+def test_get_items_to_fetch_force_update_fresh(
+    ikea_settings: IkeaSettings, parsed_item: ParsedItem
+):
+    _create_items([parsed_item])
+    _run_after_commit()
+    res = _get_items_to_fetch([parsed_item.item_code], force_update=True)
+    assert len(res) == 0
+
+
+def test_get_items_to_fetch_force_update_stale(
+    ikea_settings: IkeaSettings, parsed_item: ParsedItem
+):
+    ikea_settings.item_catalog_max_age = 0
+    ikea_settings.save()
+    _create_items([parsed_item])
+    res = _get_items_to_fetch([parsed_item.item_code], force_update=True)
+    assert len(res) == 1
+
+
+def test_get_items_to_fetch_force_update_not_in_catalog(
+    ikea_settings: IkeaSettings, item: Item
+):
+    item.db_insert()
+    res = _get_items_to_fetch([item.item_code], force_update=True)
+    assert len(res) == 1
+
+
 def test_get_items_to_fetch_not_force_update(item: Item):
     item.db_insert()
     res = _get_items_to_fetch([item.item_code], force_update=False)
@@ -477,28 +976,80 @@ def test_create_item_categories(parsed_item: ParsedItem):
     assert len({new_category, parsed_item.category_name} ^ categories_in_db) == 0
 
 
-@pytest.mark.parametrize("force_update", (True, False))
-def test_fetch_child_items(monkeypatch: pytest.MonkeyPatch, force_update: bool):
-    exp_result = "some items"
-    exp_child_items = ["1248129", "124812958"]
+@pytest.mark.usefixtures("child_items")
+def test_get_known_child_item_codes(item: Item):
+    item.insert()
+    res = _get_known_child_item_codes([item.item_code])
+    assert sorted(res) == sorted({i.item_code for i in item.child_items})
 
-    def mock_fetch_items(item_codes: list[str], force_update: bool):
-        assert item_codes == exp_child_items
-        assert force_update == force_update
-        return exp_result
 
-    monkeypatch.setattr(comfort.integrations.ikea, "fetch_items", mock_fetch_items)
-    assert (
-        _fetch_child_items(
-            [  # type: ignore
-                SimpleNamespace(
-                    child_items=[SimpleNamespace(item_code=i) for i in exp_child_items]
-                )
-            ],
-            force_update,
-        )
-        == exp_result
+def test_get_known_child_item_codes_no_items():
+    assert _get_known_child_item_codes([]) == []
+
+
+def patch_unshorten_urls(monkeypatch: pytest.MonkeyPatch):
+    calls: list[str] = []
+
+    async def mock_unshorten_urls(message: str):
+        calls.append(message)
+        item_code = {"abc": "10014030", "xyz": "29128569"}[message[-3:]]
+        return [f"https://www.ikea.com/ru/ru/p/-{item_code}/"]
+
+    monkeypatch.setattr(
+        comfort.integrations.ikea,
+        "orig_unshorten_urls_from_ingka_pagelinks",
+        mock_unshorten_urls,
+    )
+    return calls
+
+
+def test_parse_item_codes_caches_pagelinks(monkeypatch: pytest.MonkeyPatch):
+    calls = patch_unshorten_urls(monkeypatch)
+    message = "https://ingka.page.link/abc and https://ingka.page.link/xyz"
+
+    assert parse_item_codes(message) == ["10014030", "29128569"]
+    assert parse_item_codes(message + " 50366596") == [
+        "50366596",
+        "10014030",
+        "29128569",
+    ]
+    assert sorted(calls) == [
+        "https://ingka.page.link/abc",
+        "https://ingka.page.link/xyz",
+    ]
+
+
+def test_parse_item_codes_doesnt_cache_empty_pagelinks(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    calls: list[str] = []
+
+    async def mock_unshorten_urls(message: str):
+        calls.append(message)
+        return []
+
+    monkeypatch.setattr(
+        comfort.integrations.ikea,
+        "orig_unshorten_urls_from_ingka_pagelinks",
+        mock_unshorten_urls,
     )
+    message = "https://ingka.page.link/abc"
+    assert parse_item_codes(message) == []
+    assert parse_item_codes(message) == []
+    assert len(calls) == 2
+
+
+def test_parse_item_codes_pagelinks_expire(monkeypatch: pytest.MonkeyPatch):
+    patch_unshorten_urls(monkeypatch)
+    parse_item_codes("https://ingka.page.link/abc")
+    cache = frappe.cache()
+    assert 0 < cache.ttl(cache.make_key("ikea_pagelinks")) <= 30 * 24 * 60 * 60
+
+
+def test_parse_item_codes_no_pagelinks(monkeypatch: pytest.MonkeyPatch):
+    calls = patch_unshorten_urls(monkeypatch)
+    assert parse_item_codes(["100.140.30", "29128569"]) == ["10014030", "29128569"]
+    assert calls == []
 
 
 def test_fetch_items_no_items_to_fetch(monkeypatch: pytest.MonkeyPatch):
@@ -508,86 +1059,134 @@ def test_fetch_items_no_items_to_fetch(monkeypatch: pytest.MonkeyPatch):
     monkeypatch.setattr(
         comfort.integrations.ikea, "_get_items_to_fetch", mock_get_items_to_fetch
     )
-    assert fetch_items([], True) == FetchItemsResult(unsuccessful=[], successful=[])
+    assert fetch_items(["10014030"], True) == FetchItemsResult(
+        unsuccessful=[], successful=["10014030"]
+    )
 
 
 @pytest.mark.parametrize("input_force_update", (True, False))
 def test_fetch_items_main(monkeypatch: pytest.MonkeyPatch, input_force_update: bool):
-    called_get_items_to_fetch = False
-    called_get_items = False
-    called_create_item_categories = False
-    called_fetch_child_items = False
-    called_make_items_from_child_items_if_not_exist = False
-    called_create_item = False
+    called_create_items = False
 
-    input_item_codes = ["123"]
-    items_to_fetch = ["012", "123"]
-    parsed_items = [SimpleNamespace(item_code="123")]
+    input_item_codes = ["10014030", "10366598", "20277974"]
+    items_to_fetch = ["10014030", "10366598"]
+    parsed_items = [SimpleNamespace(item_code="10366598", child_items=[])]
 
-    def mock_get_items_to_fetch(item_codes: list[str], force_update: bool):
+    def mock_get_known_child_item_codes(item_codes: list[str]):
         assert item_codes == input_item_codes
+        return []
+
+    def mock_get_items_to_fetch(item_codes: list[str], force_update: bool):
         assert force_update == input_force_update
-        nonlocal called_get_items_to_fetch
-        called_get_items_to_fetch = True
+        if not item_codes:
+            return []
+        assert item_codes == input_item_codes
         return items_to_fetch
 
     def mock_get_items(item_codes: list[str]):
         assert item_codes == items_to_fetch
-        nonlocal called_get_items
-        called_get_items = True
         return parsed_items
 
-    def mock_create_item_categories(items: list[Any]):
+    def mock_create_items(items: list[Any]):
         assert items == parsed_items
-        nonlocal called_create_item_categories
-        called_create_item_categories = True
+        nonlocal called_create_items
+        called_create_items = True
 
-    def mock_fetch_child_items(items: list[Any], force_update: bool):
-        assert items == parsed_items
-        assert force_update == input_force_update
-        nonlocal called_fetch_child_items
-        called_fetch_child_items = True
-
-    def mock_make_items_from_child_items_if_not_exist(item: Any):
-        assert item == parsed_items[0]
-        nonlocal called_make_items_from_child_items_if_not_exist
-        called_make_items_from_child_items_if_not_exist = True
-
-    def mock_called_create_item(item: Any):
-        assert item == parsed_items[0]
-        nonlocal called_create_item
-        called_create_item = True
-
-    monkeypatch.setattr(
-        comfort.integrations.ikea, "_get_items_to_fetch", mock_get_items_to_fetch
-    )
-    monkeypatch.setattr(comfort.integrations.ikea, "_get_items", mock_get_items)
     monkeypatch.setattr(
         comfort.integrations.ikea,
-        "_create_item_categories",
-        mock_create_item_categories,
+        "_get_known_child_item_codes",
+        mock_get_known_child_item_codes,
     )
     monkeypatch.setattr(
-        comfort.integrations.ikea, "_fetch_child_items", mock_fetch_child_items
-    )
-    monkeypatch.setattr(
-        comfort.integrations.ikea,
-        "_make_items_from_child_items_if_not_exist",
-        mock_make_items_from_child_items_if_not_exist,
-    )
-    monkeypatch.setattr(
-        comfort.integrations.ikea, "_create_item", mock_called_create_item
+        comfort.integrations.ikea, "_get_items_to_fetch", mock_get_items_to_fetch
     )
+    monkeypatch.setattr(comfort.integrations.ikea, "_get_items", mock_get_items)
+    monkeypatch.setattr(comfort.integrations.ikea, "_create_items", mock_create_items)
 
     resp = fetch_items(input_item_codes, input_force_update)
-    assert resp == FetchItemsResult(unsuccessful=["012"], successful=["123"])
-
-    assert called_get_items_to_fetch
-    assert called_get_items
-    assert called_create_item_categories
-    assert called_fetch_child_items
-    assert called_make_items_from_child_items_if_not_exist
-    assert called_create_item
+    assert resp == FetchItemsResult(
+        unsuccessful=["10014030"], successful=["10366598", "20277974"]
+    )
+    assert called_create_items
+
+
+@pytest.mark.usefixtures("child_items")
+def test_fetch_items_fetches_known_child_items_with_parents(
+    monkeypatch: pytest.MonkeyPatch, item: Item
+):
+    item.insert()
+    calls: list[list[str]] = []
+
+    def mock_get_items(item_codes: list[str]):
+        calls.append(item_codes)
+        return []
+
+    monkeypatch.setattr(comfort.integrations.ikea, "_get_items", mock_get_items)
+    monkeypatch.setattr(comfort.integrations.ikea, "_create_items", lambda items: None)
+
+    fetch_items([item.item_code], force_update=True)
+    assert len(calls) == 1
+    assert calls[0][0] == item.item_code
+    assert sorted(calls[0][1:]) == sorted({i.item_code for i in item.child_items})
+
+
+def test_fetch_items_fetches_new_child_items(
+    monkeypatch: pytest.MonkeyPatch, parsed_item: ParsedItem
+):
+    child_item_codes = list(dict.fromkeys(i.item_code for i in parsed_item.child_items))
+    calls: list[list[str]] = []
+    created_items: list[str] = []
+
+    def mock_get_items(item_codes: list[str]):
+        calls.append(item_codes)
+        if item_codes == [parsed_item.item_code]:
+            return [parsed_item]
+        return []
+
+    def mock_create_items(items: list[ParsedItem]):
+        created_items.extend(i.item_code for i in items)
+
+    monkeypatch.setattr(comfort.integrations.ikea, "_get_items", mock_get_items)
+    monkeypatch.setattr(comfort.integrations.ikea, "_create_items", mock_create_items)
+
+    resp = fetch_items([parsed_item.item_code], force_update=True)
+    assert calls == [[parsed_item.item_code], child_item_codes]
+    assert created_items == [parsed_item.item_code]
+    assert resp == FetchItemsResult(unsuccessful=[], successful=[parsed_item.item_code])
+
+
+def test_get_items_in_chunks(
+    monkeypatch: pytest.MonkeyPatch, ikea_settings: IkeaSettings
+):
+    ikea_settings.items_chunk_size = 2
+    ikea_settings.items_concurrency = 2
+    ikea_settings.save()
+
+    item_codes = ["10014030", "10366598", "20277974", "40277973", "40366634"]
+    failing_item_code = "20277974"
+    chunks: list[list[str]] = []
+
+    async def mock_get_items(constants: Any, item_codes: list[str]):
+        chunks.append(item_codes)
+        if failing_item_code in item_codes:
+            raise ikea_api.ItemFetchError(
+                SimpleNamespace(status_code=400, text=""), [failing_item_code]
+            )
+        return [SimpleNamespace(item_code=i) for i in item_codes]
+
+    captured: list[Exception] = []
+    monkeypatch.setattr(ikea_api, "get_items", mock_get_items)
+    monkeypatch.setattr(sentry_sdk, "capture_exception", captured.append)
+
+    res = _get_items(item_codes)
+
+    assert sorted(chunks) == sorted([item_codes[:2], item_codes[2:4], item_codes[4:]])
+    assert [i.item_code for i in res] == ["10014030", "10366598", "40366634"]
+    assert len(captured) == 1
+
+
+def test_get_items_no_item_codes():
+    assert _get_items([]) == []
 
 
 def test_get_items_success(monkeypatch: pytest.MonkeyPatch, item_no_children: Item):
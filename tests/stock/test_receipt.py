@@ -19,23 +19,21 @@ def test_voucher_property(receipt_sales: Receipt):
     )
 
 
-def test_new_gl_entry(receipt_sales: Receipt):
-    account, debit, credit = "cash", 300, 0
+def test_new_gl_entries(receipt_sales: Receipt):
     receipt_sales.db_insert()
-    receipt_sales._new_gl_entry(account, debit, credit)
+    receipt_sales._new_gl_entries(("cash", 300, 0), ("bank", 0, 300), ("sales", 0, 0))
 
-    values: tuple[str, int, int] = get_value(
-        "GL Entry",
-        filters={
+    entries = get_all(
+        GLEntry,
+        field=("account", "debit", "credit"),
+        filter={
             "voucher_type": receipt_sales.doctype,
             "voucher_no": receipt_sales.name,
         },
-        fieldname=("account", "debit", "credit"),
     )
-
-    assert get_account(account) == values[0]
-    assert debit == values[1]
-    assert credit == values[2]
+    assert sorted((e.account, e.debit, e.credit) for e in entries) == sorted(
+        [(get_account("cash"), 300, 0), (get_account("bank"), 0, 300)]
+    )
 
 
 @pytest.mark.parametrize("reverse_qty", (True, False, None))
@@ -165,9 +163,9 @@ def test_create_purchase_gl_entries(
         assert dict(entry) in exp_entries  # type: ignore
 
 
-def test_create_purchase_stock_entries_for_sales_orders(receipt_purchase: Receipt):
+def test_create_purchase_stock_entries(receipt_purchase: Receipt):
     receipt_purchase.db_insert()
-    receipt_purchase._create_purchase_stock_entries_for_sales_orders()
+    receipt_purchase.create_purchase_stock_entries()
 
     entries = get_all(
         StockEntry,
@@ -176,18 +174,24 @@ def test_create_purchase_stock_entries_for_sales_orders(receipt_purchase: Receip
             "voucher_no": receipt_purchase.name,
         },
     )
-    for entry in entries:
-        entry = get_doc(StockEntry, entry.name)
-        assert entry.stock_type in ("Reserved Purchased", "Reserved Actual")
-        if entry.stock_type == "Reserved Purchased":
-            for i in entry.items:
+    stock_types: set[str] = set()
+    for e in entries:
+        entry = get_doc(StockEntry, e.name)
+        stock_types.add(entry.stock_type)
+        for i in entry.items:
+            if entry.stock_type in ("Reserved Purchased", "Available Purchased"):
                 assert i.qty < 0
-        elif entry.stock_type == "Reserved Actual":
-            for i in entry.items:
+            else:
                 assert i.qty > 0
+    assert stock_types == {
+        "Reserved Purchased",
+        "Reserved Actual",
+        "Available Purchased",
+        "Available Actual",
+    }
 
 
-def test_create_purchase_stock_entries_for_sales_orders_not_executed_if_no_items():
+def test_create_purchase_stock_entries_not_executed_if_no_items():
     purchase_order = new_doc(PurchaseOrder)
     purchase_order.db_insert()
 
@@ -196,7 +200,7 @@ def test_create_purchase_stock_entries_for_sales_orders_not_executed_if_no_items
         {"voucher_type": purchase_order.doctype, "voucher_no": purchase_order.name},
     )
     receipt_purchase.db_insert()
-    receipt_purchase._create_purchase_stock_entries_for_sales_orders()
+    receipt_purchase.create_purchase_stock_entries()
 
     first_entry_name: str | None = get_value(
         "Stock Entry",
@@ -205,31 +209,7 @@ def test_create_purchase_stock_entries_for_sales_orders_not_executed_if_no_items
     assert first_entry_name is None
 
 
-def test_create_purchase_stock_entries_for_items_to_sell_executed(
-    receipt_purchase: Receipt,
-):
-    receipt_purchase.db_insert()
-    receipt_purchase._create_purchase_stock_entries_for_items_to_sell()
-
-    entries = get_all(
-        StockEntry,
-        filter={
-            "voucher_type": receipt_purchase.doctype,
-            "voucher_no": receipt_purchase.name,
-        },
-    )
-    for e in entries:
-        entry = get_doc(StockEntry, e.name)
-        assert entry.stock_type in ("Available Purchased", "Available Actual")
-        if entry.stock_type == "Available Purchased":
-            for i in entry.items:
-                assert i.qty < 0
-        elif entry.stock_type == "Available Actual":
-            for i in entry.items:
-                assert i.qty > 0
-
-
-def test_create_purchase_stock_entries_for_items_to_sell_not_executed_if_no_item(
+def test_create_purchase_stock_entries_no_items_to_sell(
     receipt_purchase: Receipt, purchase_order: PurchaseOrder
 ):
     for doc in purchase_order.items_to_sell:
@@ -238,13 +218,17 @@ def test_create_purchase_stock_entries_for_items_to_sell_not_executed_if_no_item
     purchase_order.db_update_all()
 
     receipt_purchase.db_insert()
-    receipt_purchase._create_purchase_stock_entries_for_items_to_sell()
+    receipt_purchase.create_purchase_stock_entries()
 
-    first_entry_name: str | None = get_value(
-        "Stock Entry",
-        {"voucher_type": receipt_purchase.doctype, "voucher_no": receipt_purchase.name},
+    stock_types = get_all(
+        StockEntry,
+        pluck="stock_type",
+        filter={
+            "voucher_type": receipt_purchase.doctype,
+            "voucher_no": receipt_purchase.name,
+        },
     )
-    assert first_entry_name is None
+    assert set(stock_types) == {"Reserved Purchased", "Reserved Actual"}
 
 
 @pytest.mark.parametrize("docstatus", (0, 1))
@@ -22,7 +22,7 @@ def test_stock_balance_get_data_with_filter(item_no_children: Item):
             "stock_type": "Available Actual",
             "items": [{"item_code": item_no_children.item_code, "qty": qty}],
         },
-    ).insert()
+    ).insert().submit()
     assert get_data(filters={"stock_type": "Available Actual"}) == [
         {
             "item_code": item_no_children.item_code,
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 from collections import Counter
+from datetime import date, datetime
 from types import SimpleNamespace
 
 import pytest
 
-from comfort.stock import Receipt, StockEntry
+import frappe
+from comfort.stock import Receipt, StockBalanceSnapshot, StockEntry, StockEntryItem
 from comfort.stock.utils import (
     cancel_stock_entries_for,
+    check_stock_balance,
     create_checkout,
     create_receipt,
+    create_stock_entries,
     create_stock_entry,
     get_stock_balance,
+    get_stock_balances,
+    make_stock_balance_snapshot,
+    rebuild_stock_balance,
 )
 from comfort.transactions import PurchaseOrder, SalesOrder
 from comfort.utils import count_qty, counters_are_same, get_all, get_doc, get_value
@@ -89,6 +96,55 @@ def test_create_stock_entry(
     assert doc.stock_type == stock_type
 
 
+def test_create_stock_entries(receipt_sales: Receipt):
+    receipt_sales.db_insert()
+    items = [
+        SimpleNamespace(item_code="10014030", qty=2),
+        SimpleNamespace(item_code="10366598", qty=1),
+        SimpleNamespace(item_code="10014030", qty=1),
+    ]
+    create_stock_entries(
+        receipt_sales.doctype,
+        receipt_sales.name,
+        [
+            ("Reserved Actual", items, True),
+            ("Available Actual", items, False),
+            ("Available Purchased", [], False),
+        ],
+    )
+
+    entries = get_all(
+        StockEntry,
+        pluck="name",
+        filter={
+            "voucher_type": receipt_sales.doctype,
+            "voucher_no": receipt_sales.name,
+        },
+    )
+    assert len(entries) == 2
+    for name in entries:
+        doc = get_doc(StockEntry, name)
+        assert doc.docstatus == 1
+        exp_items = count_qty(items)
+        if doc.stock_type == "Reserved Actual":
+            exp_items = reverse_qtys(exp_items)
+        assert counters_are_same(count_qty(doc.items), exp_items)
+
+    assert get_stock_balances(("Reserved Actual", "Available Actual")) == {
+        "Reserved Actual": {"10014030": -3, "10366598": -1},
+        "Available Actual": {"10014030": 3, "10366598": 1},
+    }
+    assert check_stock_balance() == {}
+
+    cancel_stock_entries_for(receipt_sales.doctype, receipt_sales.name)
+    assert get_stock_balance("Available Actual") == {}
+    assert get_stock_balance("Reserved Actual") == {}
+    assert check_stock_balance() == {}
+    assert set(
+        get_all(StockEntryItem, pluck="docstatus", filter={"parent": ("in", entries)})
+    ) == {2}
+
+
 def test_cancel_stock_entries_for(receipt_sales: Receipt):
     receipt_sales.insert()
     receipt_sales.submit()
@@ -132,5 +188,133 @@ def test_get_stock_balance(
                     {"item_code": "10366598", "qty": second_qty},
                 ],
             },
-        ).insert()
+        ).insert().submit()
     assert get_stock_balance("Available Actual") == expected_res
+
+
+def test_get_stock_balance_ignores_cancelled(receipt_sales: Receipt):
+    entry = get_doc(
+        StockEntry,
+        {
+            "stock_type": "Available Actual",
+            "voucher_type": receipt_sales.doctype,
+            "voucher_no": receipt_sales.name,
+            "items": [{"item_code": "10014030", "qty": 2}],
+        },
+    ).insert()
+    assert get_stock_balance("Available Actual") == {}
+
+    entry.submit()
+    assert get_stock_balance("Available Actual") == {"10014030": 2}
+    assert get_stock_balance("Reserved Actual") == {}
+
+    entry.cancel()
+    assert get_stock_balance("Available Actual") == {}
+
+
+def test_get_stock_balances(receipt_sales: Receipt):
+    for stock_type, qty in (("Available Actual", 2), ("Available Purchased", 3)):
+        get_doc(
+            StockEntry,
+            {
+                "stock_type": stock_type,
+                "voucher_type": receipt_sales.doctype,
+                "voucher_no": receipt_sales.name,
+                "items": [
+                    {"item_code": "10014030", "qty": qty},
+                    {"item_code": "10366598", "qty": 0},
+                ],
+            },
+        ).insert().submit()
+
+    assert get_stock_balances(
+        ("Available Actual", "Available Purchased", "Reserved Actual")
+    ) == {
+        "Available Actual": {"10014030": 2},
+        "Available Purchased": {"10014030": 3},
+        "Reserved Actual": {},
+    }
+
+
+def test_get_stock_balances_no_types():
+    assert get_stock_balances(()) == {}
+
+
+def make_stock_entry_created_at(receipt: Receipt, qty: int, creation: datetime):
+    entry = get_doc(
+        StockEntry,
+        {
+            "stock_type": "Available Actual",
+            "voucher_type": receipt.doctype,
+            "voucher_no": receipt.name,
+            "items": [{"item_code": "10014030", "qty": qty}],
+        },
+    ).insert()
+    entry.submit()
+    frappe.db.set_value(
+        "Stock Entry", entry.name, "creation", creation, update_modified=False
+    )
+    return get_doc(StockEntry, entry.name)
+
+
+@pytest.mark.parametrize("with_snapshot", (True, False))
+def test_get_stock_balance_as_of(receipt_sales: Receipt, with_snapshot: bool):
+    make_stock_entry_created_at(receipt_sales, 2, datetime(2021, 9, 15))
+    make_stock_entry_created_at(receipt_sales, 3, datetime(2021, 10, 1, 12))
+    make_stock_entry_created_at(receipt_sales, 4, datetime(2021, 10, 20))
+    if with_snapshot:
+        make_stock_balance_snapshot(date(2021, 10, 1))
+
+    assert get_stock_balance("Available Actual", as_of="2021-09-01") == {}
+    assert get_stock_balance("Available Actual", as_of="2021-09-30") == {"10014030": 2}
+    assert get_stock_balance("Available Actual", as_of=date(2021, 10, 1)) == {
+        "10014030": 5
+    }
+    assert get_stock_balance("Available Actual", as_of="2021-10-20") == {"10014030": 9}
+    assert get_stock_balance("Reserved Actual", as_of="2021-10-20") == {}
+
+
+def test_make_stock_balance_snapshot(receipt_sales: Receipt):
+    make_stock_entry_created_at(receipt_sales, 2, datetime(2021, 9, 15))
+    make_stock_balance_snapshot(date(2021, 10, 1))
+    make_stock_entry_created_at(receipt_sales, 3, datetime(2021, 9, 20))
+    make_stock_balance_snapshot(date(2021, 10, 1))
+
+    snapshots = get_all(
+        StockBalanceSnapshot, field=("snapshot_date", "stock_type", "item_code", "qty")
+    )
+    assert [s.qty for s in snapshots] == [2]
+    assert snapshots[0].snapshot_date == date(2021, 10, 1)
+    assert snapshots[0].stock_type == "Available Actual"
+    assert snapshots[0].item_code == "10014030"
+
+
+def test_cancel_back_dated_stock_entry_updates_snapshot(receipt_sales: Receipt):
+    entry = make_stock_entry_created_at(receipt_sales, 2, datetime(2021, 9, 15))
+    make_stock_entry_created_at(receipt_sales, 3, datetime(2021, 9, 20))
+    make_stock_balance_snapshot(date(2021, 10, 1))
+
+    entry.cancel()
+
+    assert get_all(StockBalanceSnapshot, pluck="qty") == [3]
+    assert get_stock_balance("Available Actual", as_of="2021-10-01") == {"10014030": 3}
+
+
+def test_check_and_rebuild_stock_balance(receipt_sales: Receipt):
+    get_doc(
+        StockEntry,
+        {
+            "stock_type": "Available Actual",
+            "voucher_type": receipt_sales.doctype,
+            "voucher_no": receipt_sales.name,
+            "items": [{"item_code": "10014030", "qty": 2}],
+        },
+    ).insert().submit()
+    assert check_stock_balance() == {}
+
+    frappe.db.sql("UPDATE `tabStock Balance Bin` SET qty = 5")
+    assert check_stock_balance() == {("Available Actual", "10014030"): (5, 2)}
+
+    rebuild_stock_balance()
+    assert check_stock_balance() == {}
+    assert get_stock_balance("Available Actual") == {"10014030": 2}
@@ -7,6 +7,7 @@ import pytest
 
 import comfort.utils as utils
 import frappe
+from comfort.entities import Item
 from comfort.utils import count_qty, counters_are_same, group_by_attr, maybe_json
 
 
@@ -69,3 +70,208 @@ def test_maybe_json():
 def test_validation_error():
     with pytest.raises(frappe.exceptions.ValidationError):
         raise utils.ValidationError
+
+
+def test_bulk_insert():
+    values = [
+        {
+            "name": name,
+            "category_name": name,
+            "url": None,
+            **utils.get_standard_values(),
+        }
+        for name in ("First", "Second", "Third")
+    ]
+    utils.bulk_insert("Item Category", values, chunk_size=2)
+    assert set(frappe.get_all("Item Category", pluck="name")) == {
+        "First",
+        "Second",
+        "Third",
+    }
+
+
+def test_bulk_insert_update_on_duplicate():
+    url = "https://www.ikea.com/ru/ru/cat/-43638"
+    values = [{"name": "First", "category_name": "First", "url": None}]
+    utils.bulk_insert("Item Category", values)
+    values[0]["url"] = url
+    utils.bulk_insert("Item Category", values, update_on_duplicate=("url",))
+    assert frappe.db.get_value("Item Category", "First", "url") == url
+
+
+def test_bulk_insert_increment_on_duplicate():
+    values = [{"name": "First", "item_code": "10014030", "qty": 2}]
+    utils.bulk_insert("Stock Entry Item", values)
+    utils.bulk_insert("Stock Entry Item", values, increment_on_duplicate=("qty",))
+    assert frappe.db.get_value("Stock Entry Item", "First", "qty") == 4
+
+
+def test_get_item_values(item_no_children: Item):
+    item_no_children.insert()
+    exp = utils.ItemValues(
+        item_no_children.item_name, item_no_children.rate, item_no_children.weight
+    )
+    assert utils.get_item_values([item_no_children.item_code, "0"]) == {
+        item_no_children.item_code: exp
+    }
+    assert utils.get_item_values([]) == {}
+
+
+def test_get_item_values_strict_raises(item_no_children: Item):
+    item_no_children.insert()
+    with pytest.raises(frappe.DoesNotExistError, match="Item 0 not found"):
+        utils.get_item_values([item_no_children.item_code, "0"], strict=True)
+
+
+def test_get_item_values_cached_after_commit(item_no_children: Item):
+    item_no_children.insert()
+    utils.get_item_values([item_no_children.item_code])
+    key = frappe.cache().make_key("item_values")
+    assert frappe.cache().hmget(key, [item_no_children.item_code]) == [None]
+
+    utils._run_after_commit()
+    assert frappe.cache().hmget(key, [item_no_children.item_code]) != [None]
+    assert 0 < frappe.cache().ttl(key) <= 24 * 60 * 60
+
+
+def test_get_item_values_cache_ttl_not_extended(item_no_children: Item):
+    item_no_children.insert()
+    key = frappe.cache().make_key("item_values")
+    frappe.cache().pipeline().hset(key, "0", "[]").expire(key, 100).execute()
+
+    utils.get_item_values([item_no_children.item_code])
+    utils._run_after_commit()
+    assert 0 < frappe.cache().ttl(key) <= 100
+
+
+def test_get_item_values_from_cache(
+    item_no_children: Item, monkeypatch: pytest.MonkeyPatch
+):
+    item_no_children.insert()
+    exp = utils.get_item_values([item_no_children.item_code])
+    utils._run_after_commit()
+
+    def mock_sql(*args: Any, **kwargs: Any):
+        raise AssertionError("Should not query database")
+
+    monkeypatch.setattr(frappe.db, "sql", mock_sql)
+    assert utils.get_item_values([item_no_children.item_code]) == exp
+
+
+def test_get_item_values_cache_cleared_on_change(item_no_children: Item):
+    item_no_children.insert()
+    utils.get_item_values([item_no_children.item_code])
+
+    item_no_children.rate += 100
+    item_no_children.save()
+
+    values = utils.get_item_values([item_no_children.item_code])
+    assert values[item_no_children.item_code].rate == item_no_children.rate
+
+
+def test_get_doc_not_shared(item_no_children: Item):
+    item_no_children.insert()
+    doc = utils.get_doc(Item, item_no_children.item_code)
+    assert utils.get_doc(Item, item_no_children.item_code) is not doc
+
+
+def test_get_readonly_doc(item_no_children: Item):
+    item_no_children.insert()
+    doc = utils.get_readonly_doc(Item, item_no_children.item_code)
+    assert utils.get_readonly_doc(Item, item_no_children.item_code) is doc
+    assert utils.get_doc(Item, item_no_children.item_code) is not doc
+
+
+def test_get_readonly_doc_forgotten_on_write(item_no_children: Item):
+    item_no_children.insert()
+    doc = utils.get_readonly_doc(Item, item_no_children.item_code)
+    frappe.db.set_value("Item", item_no_children.item_code, "rate", doc.rate + 100)
+
+    new_doc = utils.get_readonly_doc(Item, item_no_children.item_code)
+    assert new_doc is not doc
+    assert new_doc.rate == doc.rate + 100
+
+
+def test_get_readonly_doc_forgotten_on_rollback(item_no_children: Item):
+    item_no_children.insert()
+    doc = utils.get_readonly_doc(Item, item_no_children.item_code)
+    frappe.db.rollback()
+    assert utils._get_documents().get(("Item", doc.name)) is None
+
+
+def test_get_value_identity_map(
+    item_no_children: Item, monkeypatch: pytest.MonkeyPatch
+):
+    item_no_children.insert()
+    args = ("Item", item_no_children.item_code, ("item_name", "rate"))
+    exp = utils.get_value(*args)
+
+    def mock_get_value(*args: Any, **kwargs: Any):
+        raise AssertionError("Should not query database")
+
+    monkeypatch.setattr(frappe.db, "get_value", mock_get_value)
+    assert utils.get_value(*args) == exp
+    monkeypatch.undo()
+
+    item_no_children.db_set("rate", item_no_children.rate + 100)
+    assert utils.get_value(*args)[1] == item_no_children.rate
+
+
+def test_clear_identity_map(item_no_children: Item):
+    item_no_children.insert()
+    doc = utils.get_readonly_doc(Item, item_no_children.item_code)
+    utils.clear_identity_map()
+    assert utils.get_readonly_doc(Item, item_no_children.item_code) is not doc
+
+
+def test_bulk_update():
+    utils.bulk_insert(
+        "Item Category",
+        [
+            {"name": name, "category_name": name, "url": None}
+            for name in ("First", "Second", "Third")
+        ],
+    )
+    url = "https://www.ikea.com/ru/ru/cat/-43638"
+    utils.bulk_update(
+        "Item Category",
+        {"First": {"url": url}, "Second": {"url": url, "category_name": "Other"}},
+        chunk_size=1,
+    )
+    assert frappe.get_all(
+        "Item Category", fields=("name", "category_name", "url"), order_by="name"
+    ) == [
+        {"name": "First", "category_name": "First", "url": url},
+        {"name": "Second", "category_name": "Other", "url": url},
+        {"name": "Third", "category_name": "Third", "url": None},
+    ]
+
+
+def test_after_commit_runs_once():
+    calls: list[int] = []
+    utils.after_commit(lambda: calls.append(1))
+    utils._run_after_commit()
+    utils._run_after_commit()
+    assert calls == [1]
+
+
+def test_after_commit_same_func_added_once():
+    calls: list[int] = []
+
+    def func():
+        calls.append(1)
+
+    utils.after_commit(func)
+    utils.after_commit(func)
+    assert utils.is_after_commit_pending(func)
+    utils._run_after_commit()
+    assert calls == [1]
+    assert not utils.is_after_commit_pending(func)
+
+
+def test_after_commit_dropped_on_rollback():
+    calls: list[int] = []
+    utils.after_commit(lambda: calls.append(1))
+    frappe.db.rollback()
+    utils._run_after_commit()
+    assert calls == []
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from comfort import syncify
+
+
+async def _sleep_and_return(v: int, delay: float = 0.1):
+    await asyncio.sleep(delay)
+    return v
+
+
+def test_run_returns_result():
+    assert syncify.run(_sleep_and_return(1, 0)) == 1
+
+
+def test_run_raises():
+    async def raise_exc():
+        raise ValueError("some error")
+
+    with pytest.raises(ValueError, match="some error"):
+        syncify.run(raise_exc())
+
+
+def test_run_is_concurrent():
+    results: list[int] = []
+
+    def target(v: int):
+        results.append(syncify.run(_sleep_and_return(v, 0.2)))
+
+    threads = [threading.Thread(target=target, args=(v,)) for v in range(10)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == list(range(10))
+    assert time.perf_counter() - start < 1
+
+
+def test_gather_with_limit():
+    running = 0
+    max_running = 0
+
+    async def track(v: int):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return v
+
+    res = syncify.run(syncify.gather(*(track(v) for v in range(6)), limit=2))
+    assert res == list(range(6))
+    assert max_running == 2
+
+
+def test_stats():
+    async def raise_exc():
+        raise ValueError
+
+    syncify.reset_stats()
+    syncify.run(_sleep_and_return(1, 0))
+    with pytest.raises(ValueError):
+        syncify.run(raise_exc())
+
+    stats = syncify.get_stats()
+    assert stats["queued"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["total_latency"] > 0
@@ -6,10 +6,16 @@ from types import SimpleNamespace
 import pytest
 
 import frappe
-from comfort.transactions import PurchaseReturn, SalesOrder, SalesReturn
+from comfort.finance.utils import create_payment
+from comfort.transactions import PurchaseOrder, PurchaseReturn, SalesOrder, SalesReturn
 from comfort.transactions.return_ import _ReturnAddItemsPayloadItem
-from comfort.transactions.utils import delete_empty_items, merge_same_items
-from comfort.utils import count_qty, get_value, group_by_attr
+from comfort.transactions.utils import (
+    delete_empty_items,
+    merge_same_items,
+    recompute_purchase_order_totals,
+    recompute_sales_order_statuses,
+)
+from comfort.utils import copy_doc, count_qty, get_value, group_by_attr
 
 
 def test_return_delete_empty_items(sales_return: SalesReturn):
@@ -165,3 +171,50 @@ def test_merge_same_items(sales_order: SalesOrder):
 
     assert len(sales_order.items) == 2
     assert all(c == 1 for c in c.values())
+
+
+def test_recompute_sales_order_statuses(sales_order: SalesOrder):
+    sales_order.insert()
+    create_payment(
+        sales_order.doctype,
+        sales_order.name,
+        sales_order.total_amount,
+        paid_with_cash=True,
+    )
+
+    changes = recompute_sales_order_statuses([sales_order.name], write=False)
+    assert changes[sales_order.name]["payment_status"] == ("Unpaid", "Paid")
+    assert get_value("Sales Order", sales_order.name, "payment_status") == "Unpaid"
+
+    recompute_sales_order_statuses([sales_order.name])
+    assert get_value(
+        "Sales Order", sales_order.name, ("payment_status", "paid_amount")
+    ) == ("Paid", sales_order.total_amount)
+    assert recompute_sales_order_statuses([sales_order.name]) == {}
+
+
+def test_recompute_purchase_order_totals(purchase_order: PurchaseOrder):
+    purchase_order.insert()
+    exp_values = {
+        f: purchase_order.get(f)
+        for f in ("sales_orders_cost", "items_to_sell_cost", "total_weight")
+    }
+    assert recompute_purchase_order_totals([purchase_order.name]) == {}
+
+    frappe.db.set_value(
+        "Purchase Order",
+        purchase_order.name,
+        {"sales_orders_cost": 0, "items_to_sell_cost": 0, "total_weight": 0},
+    )
+    changes = recompute_purchase_order_totals([purchase_order.name])
+    assert {f: v[1] for f, v in changes[purchase_order.name].items()} == exp_values
+
+
+def test_recompute_purchase_order_totals_duplicated_sales_order(
+    purchase_order: PurchaseOrder,
+):
+    purchase_order.insert()
+    row = copy_doc(purchase_order.sales_orders[0])
+    row.parent = purchase_order.name
+    row.db_insert()
+    assert recompute_purchase_order_totals([purchase_order.name]) == {}
@@ -10,6 +10,7 @@ from ikea_api.wrappers.types import GetDeliveryServicesResponse
 
 import comfort.integrations.ikea
 import comfort.transactions.doctype.purchase_order.purchase_order
+import comfort.transactions.doctype.sales_order.sales_order
 import frappe
 from comfort.entities import Item
 from comfort.integrations.ikea import FetchItemsResult, PurchaseInfoDict
@@ -25,6 +26,7 @@ from comfort.transactions.doctype.purchase_order.purchase_order import (
 )
 from comfort.transactions.utils import AnyChildItem
 from comfort.utils import (
+    copy_doc,
     count_qty,
     counters_are_same,
     get_all,
@@ -579,6 +581,39 @@ def test_purchase_order_fetch_items_specs(
     assert "Information about items updated" in str(frappe.message_log)
 
 
+def test_submit_sales_orders_and_update_statuses_queries(
+    purchase_order: PurchaseOrder, monkeypatch: pytest.MonkeyPatch
+):
+    other_order = copy_doc(
+        get_doc(SalesOrder, purchase_order.sales_orders[0].sales_order_name)
+    )
+    other_order.insert()
+    purchase_order.append("sales_orders", {"sales_order_name": other_order.name})
+    purchase_order.db_insert()
+
+    module = comfort.transactions.doctype.sales_order.sales_order
+    calls: list[str] = []
+
+    def count_calls(func: Any):
+        def wrapper(names: Any):
+            calls.append(func.__name__)
+            return func(names)
+
+        return wrapper
+
+    for name in ("_get_paid_amounts", "_get_delivery_facts"):
+        monkeypatch.setattr(module, name, count_calls(getattr(module, name)))
+
+    purchase_order._submit_sales_orders_and_update_statuses()
+
+    assert calls == ["_get_paid_amounts", "_get_delivery_facts"]
+    for order in purchase_order.sales_orders:
+        doc = get_doc(SalesOrder, order.sales_order_name)
+        assert doc.docstatus == 1
+        assert doc.status == "In Progress"
+        assert not doc.flags.status_facts
+
+
 def test_add_purchase_info_and_submit_info_loaded(purchase_order: PurchaseOrder):
     purchase_order.db_insert()
     purchase_id = "111111110"
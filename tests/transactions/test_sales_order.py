@@ -32,9 +32,11 @@ from comfort.transactions.doctype.sales_order.sales_order import (
     get_sales_orders_in_purchase_order,
     get_sales_orders_not_in_purchase_order,
     has_linked_delivery_trip,
+    set_sales_order_statuses,
     validate_params_from_available_stock,
 )
 from comfort.utils import (
+    copy_doc,
     count_qty,
     counters_are_same,
     get_all,
@@ -664,6 +666,30 @@ def test_set_delivery_status_from_available_actual_stock_delivered(
     assert sales_order.delivery_status == "Delivered"
 
 
+def test_set_sales_order_statuses(sales_order: SalesOrder, receipt_sales: Receipt):
+    receipt_sales.docstatus = 1
+    receipt_sales.db_insert()
+    other_order = copy_doc(sales_order)
+    other_order.insert()
+    create_payment(
+        other_order.doctype,
+        other_order.name,
+        other_order.total_amount,
+        paid_with_cash=True,
+    )
+
+    set_sales_order_statuses([sales_order, other_order])
+
+    assert sales_order.delivery_status == "Delivered"
+    assert other_order.delivery_status == "To Purchase"
+    assert other_order.payment_status == "Paid"
+    assert other_order.pending_amount == 0
+
+
+def test_set_sales_order_statuses_empty():
+    set_sales_order_statuses([])
+
+
 @pytest.mark.parametrize(
     "docstatus,payment_status,delivery_status,expected_status",
     (
@@ -366,7 +366,7 @@ def test_sales_return_make_payment_gl_entries_create(
     sales_return._make_payment_gl_entries()
     entries = get_all(
         GLEntry,
-        field=("account", "debit", "credit"),
+        field=("account", "debit", "credit", "sales_order"),
         filter={"voucher_type": sales_return.doctype, "voucher_no": sales_return.name},
     )
     cash_account = get_account("cash")
@@ -375,6 +375,7 @@ def test_sales_return_make_payment_gl_entries_create(
     assert len(entries) == 2
     for entry in entries:
         assert entry.account in (cash_account, bank_account, sales_account)
+        assert entry.sales_order == sales_return.sales_order
         if entry.account in (cash_account, bank_account):
             assert entry.account == get_account(exp_asset_account)
             assert entry.debit == 0